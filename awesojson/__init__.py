@@ -6,9 +6,25 @@ __author__ = 'Vincent Philippon'
 __license__ = 'MIT'
 __copyright__ = 'Copyright 2015 Vincent Philippon'
 
-from .api import (dump, dumps,
-                  load, loads,
+import sys
+
+from .api import (dump, dump_iter, dump_lines, dumpb, dumps, dumps_oob,
+                  get_cache_info,
+                  iterload, iterload_path,
+                  load, load_lines, load_path, loads, loads_oob, loads_parallel,
+                  register_batch_decoder,
+                  register_batch_encoder,
+                  register_class,
                   register_encoder,
                   register_decoder)
+from .codec import Codec
+from .encoder import Batch, RawBuffer
+from .instrumentation import disable_stats, enable_stats, reset_stats, stats
+from .lazy import LazyObject, decoded, resolve
+from .registry import Registry, default_registry
 from .utils import get_fqcn
 
+if sys.modules.get('numpy') is not None:  # NumPy is only imported by the application
+    from . import ndarray
+    ndarray.register()
+
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.aio
+~~~~~~~~~~~~~
+
+This module implements the AwesoJSON API for asyncio streams.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import asyncio
+
+from . import api
+from .codec import DEFAULT_CHUNK_SIZE
+
+
+async def dump(obj, writer, codec=None, offload=False, executor=None,
+               chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+    """
+    Serialize a Python object as a JSON formated stream to an ``asyncio.StreamWriter``.
+
+    The encoding functions registered to ``AwesoJSONEncoder`` are used to generate
+    a JSON representation for `obj`'s type.
+
+    The output is written by blocks of `chunk_size` characters, waiting for the writer
+    to drain after each block. With `offload`, the whole document is encoded in
+    `executor` (the event loop's default executor if ``None``) instead of the event loop.
+
+    :param obj: The Python object
+    :param asyncio.StreamWriter writer: The stream writer that receives the stream
+    :param Codec codec: The codec to use. Default is the shared default ``Codec``
+    :param bool offload: Encode in `executor` instead of the event loop
+    :param executor: The ``concurrent.futures.Executor`` used with `offload`
+    :param int chunk_size: The size of the blocks written to `writer`
+    :param str encoding: The encoding of the bytes written to `writer`
+
+    :raises Exception: There's no registered encoder function that suits `obj`'s type
+
+    Usage::
+        >>> import awesojson.aio
+        >>> awesojson.register_encoder(my_encode_fct, datetime.datetime)
+        >>> await awesojson.aio.dump(datetime.datetime.now(), writer)
+    """
+    codec = codec or api._default_codec
+
+    if offload:
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(executor, codec.dumps, obj)
+        for start in range(0, len(text), chunk_size):
+            writer.write(text[start:start + chunk_size].encode(encoding))
+            await writer.drain()
+        return
+
+    parts = []
+    size = 0
+    for chunk in codec.encoder.iterencode(obj):
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            writer.write(''.join(parts).encode(encoding))
+            await writer.drain()
+            parts = []
+            size = 0
+    if parts:
+        writer.write(''.join(parts).encode(encoding))
+        await writer.drain()
+
+
+async def load(reader, codec=None, offload=False, executor=None):
+    """
+    Deserialize the JSON document read from an ``asyncio.StreamReader`` until its end.
+
+    The decoding functions registered to ``AwesoJSONDecoder`` are used to generate
+    a Python object of the right type. With `offload`, the document is decoded in
+    `executor` (the event loop's default executor if ``None``) instead of the event loop.
+
+    :param asyncio.StreamReader reader: The stream reader containing a JSON document
+    :param Codec codec: The codec to use. Default is the shared default ``Codec``
+    :param bool offload: Decode in `executor` instead of the event loop
+    :param executor: The ``concurrent.futures.Executor`` used with `offload`
+
+    :raises Exception: The JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object
+
+    :returns: The deserialized Python object
+
+    Usage::
+        >>> import awesojson.aio
+        >>> awesojson.register_decoder(my_decode_fct, awesojson.get_fqcn(datetime.datetime))
+        >>> python_datetime = await awesojson.aio.load(reader)
+    """
+    codec = codec or api._default_codec
+    data = await reader.read()
+    if offload:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, codec.loads, data)
+    return codec.loads(data)
+
+
+async def load_lines(reader, codec=None):
+    """
+    Iteratively deserialize the JSON Lines read from an ``asyncio.StreamReader``.
+
+    Blank lines are skipped. Lines are limited by the `limit` of `reader`.
+
+    :param asyncio.StreamReader reader: The stream reader containing the JSON Lines
+    :param Codec codec: The codec to use. Default is the shared default ``Codec``
+
+    :raises Exception: A JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object
+
+    :returns: An asynchronous iterator over the deserialized Python objects
+
+    Usage::
+        >>> import awesojson.aio
+        >>> async for python_event in awesojson.aio.load_lines(reader):
+        ...     print(python_event)
+    """
+    codec = codec or api._default_codec
+    async for line in reader:
+        if line.strip():
+            yield codec.loads(line)
@@ -12,8 +12,13 @@ This module implements the AwesoJSON API.
 
 import json
 
+from .codec import DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, DEFAULT_PARALLEL_THRESHOLD, Codec
 from .decoder import AwesoJSONDecoder
 from .encoder import AwesoJSONEncoder
+from .utils import BYTES_TYPES, decode_bytes, get_fqcn
+from . import classes
+
+_default_codec = Codec()
 
 
 def load(filehandle, **kwargs):
@@ -23,9 +28,11 @@ def load(filehandle, **kwargs):
     The decoding functions registered to ``AwesoJSONDecoder`` are used to generate
     a Python object of the right type.
 
+    Without extra arguments, the shared default ``Codec`` is used.
     See ``json.load`` for more function arguments and details.
 
-    :param file filehandle: The file-like object (supporting ``.read()``) containing a JSON document
+    :param file filehandle: The file-like object (supporting ``.read()``) containing a JSON document,
+                            opened in text or binary mode
 
     :raises Exception: The JSON document contains an object with no registered
                        decoder function which suits the *defined* `awesojsontype` for that object
@@ -37,19 +44,151 @@ def load(filehandle, **kwargs):
         >>> awesojson.register_decoder(my_decode_fct, awesojson.get_fqcn(datetime.datetime))
         >>> python_datetime = awesojson.load(json_file_datetime)
     """
-    return json.load(filehandle, cls=AwesoJSONDecoder, **kwargs)
+    if not kwargs:
+        return _default_codec.load(filehandle)
+    return loads(filehandle.read(), **kwargs)
+
+
+def load_path(path, mmap=True, **kwargs):
+    """
+    Deserialize the file at `path` containing a JSON document to a Python object.
+
+    The decoding functions registered to ``AwesoJSONDecoder`` are used to generate
+    a Python object of the right type.
+
+    With `mmap`, the file is memory-mapped and decoded straight from the mapped
+    buffer instead of being read to a private copy first.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONDecoder`` for more function arguments and details.
+
+    :param str path: The path of the file containing a JSON document
+    :param bool mmap: Memory-map the file instead of reading it
+
+    :raises Exception: The JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object
+
+    :returns: The deserialized Python object
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_decoder(my_decode_fct, awesojson.get_fqcn(datetime.datetime))
+        >>> python_snapshot = awesojson.load_path('snapshot.json')
+    """
+    codec = Codec(decoder_kwargs=kwargs) if kwargs else _default_codec
+    return codec.load_path(path, mmap)
+
+
+def iterload_path(path, mmap=True, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """
+    Iteratively deserialize the file at `path` containing a top-level JSON array.
+
+    See ``iterload``. With `mmap`, the chunks are read from a memory-mapping of the
+    file, so that processes streaming the same file share its page cache.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONDecoder`` for more function arguments and details.
+
+    :param str path: The path of the file containing a JSON array
+    :param bool mmap: Memory-map the file instead of reading it
+    :param int chunk_size: The size of the chunks read from the file
+
+    :raises Exception: The JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object
+
+    :returns: An iterator over the deserialized Python objects of the array
+
+    Usage::
+        >>> import awesojson
+        >>> for python_record in awesojson.iterload_path('export.json'):
+        ...     print(python_record)
+    """
+    codec = Codec(decoder_kwargs=kwargs) if kwargs else _default_codec
+    return codec.iterload_path(path, mmap, chunk_size)
+
+
+def iterload(filehandle, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """
+    Iteratively deserialize a file-like object containing a top-level JSON array.
+
+    Each element of the array is decoded and yielded as soon as it is read, using the
+    decoding functions registered to ``AwesoJSONDecoder``, so that huge arrays can be
+    processed with bounded memory.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONDecoder`` for more function arguments and details.
+
+    :param file filehandle: The file-like object (supporting ``.read()``) containing a JSON array
+    :param int chunk_size: The size of the chunks read from `filehandle`
+
+    :raises Exception: The JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object
+
+    :returns: An iterator over the deserialized Python objects of the array
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_decoder(my_decode_fct, awesojson.get_fqcn(datetime.datetime))
+        >>> for python_datetime in awesojson.iterload(json_file_datetime_array):
+        ...     print(python_datetime)
+    """
+    codec = Codec(decoder_kwargs=kwargs) if kwargs else _default_codec
+    return codec.iterload(filehandle, chunk_size)
+
+
+def load_lines(filehandle, workers=None, batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+    """
+    Iteratively deserialize a file-like object containing JSON Lines (one JSON document per line).
+
+    The decoding functions registered to ``AwesoJSONDecoder`` are used to generate
+    Python objects of the right type. Blank lines are skipped.
+
+    With `workers`, batches of `batch_size` lines are decoded in a pool of `workers`
+    processes and yielded in order. The registered decoder functions and the decoded
+    objects must then be picklable.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONDecoder`` for more function arguments and details.
+
+    :param file filehandle: The file-like object (iterable over lines) containing the JSON Lines
+    :param int workers: The number of worker processes. Default is to decode in the current process
+    :param int batch_size: The number of lines decoded per worker task
+
+    :raises Exception: A JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object
+
+    :returns: An iterator over the deserialized Python objects
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_decoder(my_decode_fct, awesojson.get_fqcn(datetime.datetime))
+        >>> for python_event in awesojson.load_lines(jsonl_file_events, workers=4):
+        ...     print(python_event)
+    """
+    if workers:
+        from . import parallel  # Only load multiprocessing when it's used
+        return parallel.load_lines(filehandle, workers, batch_size, decoder_kwargs=kwargs)
+    codec = Codec(decoder_kwargs=kwargs) if kwargs else _default_codec
+    return codec.load_lines(filehandle)
 
 
 def loads(strvalue, **kwargs):
     """
-    Deserialize a ``str`` or ``unicode`` object containing a JSON document to a Python object.
+    Deserialize a ``str``, ``unicode`` or bytes-like object containing a JSON document to a Python object.
 
     The decoding functions registered to ``AwesoJSONDecoder`` are used to generate
     a Python object of the right type.
 
+    Bytes-like objects (``bytes``, ``bytearray`` and ``memoryview``) are decoded
+    directly from their buffer.
+
+    With `select`, only the values at the given JSON paths are decoded and returned,
+    e.g. ``['items[*].id', 'meta.ts']``. See ``AwesoJSONDecoder`` for the other options.
+
+    Without extra arguments, the shared default ``Codec`` is used.
     See ``json.loads`` for more function arguments and details.
 
-    :param (str|unicode) strvalue: The string object containing a JSON document
+    :param (str|unicode|bytes|bytearray|memoryview) strvalue: The string object containing a JSON document
 
     :raises Exception: The JSON document contains an object with no registered
                        decoder function which suits the *defined* `awesojsontype` for that object
@@ -60,10 +199,42 @@ def loads(strvalue, **kwargs):
         >>> import awesojson
         >>> awesojson.register_decoder(my_decode_fct, awesojson.get_fqcn(datetime.datetime))
         >>> python_datetime = awesojson.loads(json_string_datetime)
+        >>> route = awesojson.loads(json_string_order, select=['items[*].id', 'meta.ts'])
     """
+    if not kwargs:
+        return _default_codec.loads(strvalue)
+    if isinstance(strvalue, BYTES_TYPES):
+        strvalue = decode_bytes(strvalue)
     return json.loads(strvalue, cls=AwesoJSONDecoder, **kwargs)
 
 
+def loads_oob(strvalue, buffers, **kwargs):
+    """
+    Deserialize a JSON document written by ``dumps_oob`` with its out-of-band buffers.
+
+    The buffer placeholders are replaced by the objects of `buffers`, without copying them.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONDecoder`` for more function arguments and details.
+
+    :param (str|bytes|bytearray|memoryview) strvalue: The string object containing a JSON document
+    :param list buffers: The out-of-band buffers of the document
+
+    :raises Exception: The JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object,
+                       or a reference to an unknown buffer
+
+    :returns: The deserialized Python object
+
+    Usage::
+        >>> import awesojson
+        >>> document, buffers = awesojson.dumps_oob({'image': image_bytes})
+        >>> python_object = awesojson.loads_oob(document, buffers)
+    """
+    codec = Codec(decoder_kwargs=kwargs) if kwargs else _default_codec
+    return codec.loads_oob(strvalue, buffers)
+
+
 def dump(obj, filehandle, **kwargs):
     """
     Serialize a Python object as a JSON formated stream to a file-like object.
@@ -71,6 +242,7 @@ def dump(obj, filehandle, **kwargs):
     The encoding functions registered to ``AwesoJSONEncoder`` are used to generate
     a JSON representation for `obj`'s type.
 
+    Without extra arguments, the shared default ``Codec`` is used.
     See ``json.dump`` for more function arguments and details.
 
     :param obj: The Python object
@@ -87,9 +259,131 @@ def dump(obj, filehandle, **kwargs):
         >>> python_datetime = datetime.datetime.now()
         >>> awesojson.dump(python_datetime, json_file_datetime)
     """
+    if not kwargs:
+        return _default_codec.dump(obj, filehandle)
     return json.dump(obj, filehandle, cls=AwesoJSONEncoder, **kwargs)
 
 
+def dump_iter(iterable, filehandle, buffer_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """
+    Serialize the elements of an iterable as a JSON array stream to a file-like object.
+
+    The elements are encoded one at a time with the encoding functions registered to
+    ``AwesoJSONEncoder``, so that generators can be serialized without building a list.
+    The output is written by blocks of `buffer_size` characters.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONEncoder`` for more function arguments and details.
+
+    :param iterable: The iterable of Python objects
+    :param file filehandle: The file-like object (supporting ``.write()``) that receives the stream
+    :param int buffer_size: The size of the blocks written to `filehandle`
+
+    :raises Exception: `compact_types` or `share_references` is enabled, or there's no
+                       registered encoder function that suits an element's type
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_encoder(my_encode_fct, datetime.datetime)
+        >>> python_datetimes = (datetime.datetime.now() for _ in range(1000000))
+        >>> awesojson.dump_iter(python_datetimes, json_file_datetime_array)
+    """
+    codec = Codec(encoder_kwargs=kwargs) if kwargs else _default_codec
+    codec.dump_iter(iterable, filehandle, buffer_size)
+
+
+def dump_lines(iterable, filehandle, workers=None, batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+    """
+    Serialize the objects of an iterable as JSON Lines (one JSON document per line) to a file-like object.
+
+    The encoding functions registered to ``AwesoJSONEncoder`` are used to generate
+    a JSON representation for each object's type.
+
+    With `workers`, batches of `batch_size` objects are encoded in a pool of `workers`
+    processes and written in order. The registered encoder functions and the objects
+    must then be picklable.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONEncoder`` for more function arguments and details.
+
+    :param iterable: The iterable of Python objects
+    :param file filehandle: The file-like object (supporting ``.write()``) that receives the lines
+    :param int workers: The number of worker processes. Default is to encode in the current process
+    :param int batch_size: The number of objects encoded per worker task
+
+    :raises Exception: There's no registered encoder function that suits an object's type
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_encoder(my_encode_fct, datetime.datetime)
+        >>> awesojson.dump_lines(python_events, jsonl_file_events, workers=4)
+    """
+    if workers:
+        from . import parallel  # Only load multiprocessing when it's used
+        parallel.dump_lines(iterable, filehandle, workers, batch_size, encoder_kwargs=kwargs)
+    else:
+        codec = Codec(encoder_kwargs=kwargs) if kwargs else _default_codec
+        codec.dump_lines(iterable, filehandle)
+
+
+def dumpb(obj, into=None, **kwargs):
+    """
+    Serialize a Python object to UTF-8 encoded JSON ``bytes``.
+
+    The encoding functions registered to ``AwesoJSONEncoder`` are used to generate
+    a JSON representation for `obj`'s type.
+
+    With `into`, the output is appended to the given ``bytearray`` instead, block by
+    block, without building the whole document as a ``str`` first.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONEncoder`` for more function arguments and details.
+
+    :param obj: The Python object
+    :param bytearray into: The buffer that receives the output
+
+    :raises Exception: There's no registered encoder function that suits `obj`'s type
+
+    :returns: The JSON serialization of the Python object, or `into`
+    :rtype: (bytes|bytearray)
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_encoder(my_encode_fct, datetime.datetime)
+        >>> sock.sendall(awesojson.dumpb(datetime.datetime.now()))
+    """
+    codec = Codec(encoder_kwargs=kwargs) if kwargs else _default_codec
+    return codec.dumpb(obj, into)
+
+
+def dumps_oob(obj, **kwargs):
+    """
+    Serialize a Python object to a JSON formatted ``str``, with its binary buffers out-of-band.
+
+    ``bytes``, ``bytearray``, ``memoryview`` and ``RawBuffer`` objects are not copied
+    into the document: they are written as ``{"awesojsonbuffer": <index>}`` placeholders,
+    and returned separately as a list of ``memoryview``. The document and the buffers
+    can then be sent without concatenating them, e.g. with ``os.writev`` or ``socket.sendmsg``.
+
+    Without extra arguments, the shared default ``Codec`` is used.
+    See ``json.JSONEncoder`` for more function arguments and details.
+
+    :param obj: The Python object
+
+    :raises Exception: There's no registered encoder function that suits `obj`'s type
+
+    :returns: The JSON serialization of the Python object, and its buffers
+    :rtype: (str, list)
+
+    Usage::
+        >>> import awesojson
+        >>> document, buffers = awesojson.dumps_oob({'image': image_bytes})
+        >>> python_object = awesojson.loads_oob(document, buffers)
+    """
+    codec = Codec(encoder_kwargs=kwargs) if kwargs else _default_codec
+    return codec.dumps_oob(obj)
+
+
 def dumps(obj, **kwargs):
     """
     Serialize a Python object to a JSON formated ``str`` or ``unicode``.
@@ -97,6 +391,7 @@ def dumps(obj, **kwargs):
     The encoding functions registered to ``AwesoJSONEncoder`` are used to generate
     a JSON representation for `obj`'s type.
 
+    Without extra arguments, the shared default ``Codec`` is used.
     See ``json.dumps`` for more function arguments and details.
 
     :param obj: The Python object
@@ -112,10 +407,43 @@ def dumps(obj, **kwargs):
         >>> python_datetime = datetime.datetime.now()
         >>> json_string_datetime = awesojson.dumps(python_datetime)
     """
+    if not kwargs:
+        return _default_codec.dumps(obj)
     return json.dumps(obj, cls=AwesoJSONEncoder, **kwargs)
 
 
-def register_decoder(decoder_fct, type_identifier):
+def loads_parallel(strvalue, workers=None, threshold=DEFAULT_PARALLEL_THRESHOLD, **kwargs):
+    """
+    Deserialize a ``str`` or bytes-like object containing a large JSON array, using a pool of processes.
+
+    The array is split in chunks of elements that are decoded in `workers` processes,
+    with the decoding functions registered to ``AwesoJSONDecoder``, and gathered back
+    in order. The registered decoder functions and the decoded objects must be picklable.
+
+    Documents smaller than `threshold` characters, or which aren't arrays, are decoded
+    in the current process like with ``loads``.
+
+    See ``json.JSONDecoder`` for more function arguments and details.
+
+    :param (str|bytes|bytearray|memoryview) strvalue: The string object containing a JSON document
+    :param int workers: The number of worker processes. Default is the number of CPUs
+    :param int threshold: The minimum size of documents decoded in parallel
+
+    :raises Exception: The JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object
+
+    :returns: The deserialized Python object
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_decoder(my_decode_fct, awesojson.get_fqcn(datetime.datetime))
+        >>> python_datetimes = awesojson.loads_parallel(json_string_datetime_array, workers=4)
+    """
+    from . import parallel  # Only load multiprocessing when it's used
+    return parallel.loads(strvalue, workers, threshold, decoder_kwargs=kwargs)
+
+
+def register_decoder(decoder_fct, type_identifier, arguments='data', cache_size=None):
     """
     Register a function to use for the JSON deserialization of a given object type identifier.
 
@@ -123,19 +451,53 @@ def register_decoder(decoder_fct, type_identifier):
     as the function to use to deserialize the objects for which the textual type identifier matches
     the `type_identifier` string.
 
+    With the ``'kwargs'`` `arguments`, the data of the objects is passed as keyword arguments,
+    so that a class can be registered as is. With ``'pairs'``, it is passed as an iterable of
+    its key/value pairs.
+
+    For immutable types, a `cache_size` enables a LRU cache of the decoded objects, keyed on
+    their data: repeated values are decoded once and the same object is returned each time.
+    See ``get_cache_info`` for its statistics.
+
     :param decoder_fct: The decoder function to register
     :param str type_identifier: The textual type identifier of the ``type`` to register
+    :param str arguments: How the data is passed: ``'data'``, ``'kwargs'`` or ``'pairs'``
+    :param int cache_size: The maximum number of decoded objects to cache
+
+    :raises Exception: The `arguments` are unknown, or the `cache_size` is not positive
 
     Usage::
         >>> import awesojson
         >>> awesojson.register_decoder(my_decode_fct, 'datetime.datetime')
         >>> # or
         >>> awesojson.register_decoder(my_decode_fct, awesojson.get_fqcn(datetime.datetime))
+        >>> # or
+        >>> awesojson.register_decoder(MyRecord, 'my.Record', arguments='kwargs')
+        >>> awesojson.register_decoder(Currency, 'my.Currency', cache_size=1024)
     """
-    AwesoJSONDecoder.register_decoder(decoder_fct, type_identifier)
+    AwesoJSONDecoder.register_decoder(decoder_fct, type_identifier, arguments, cache_size)
+
+
+def get_cache_info(type_identifier):
+    """
+    Get the statistics of the decode cache of a given object type identifier.
+
+    Will return ``None`` if no cache was enabled with ``register_decoder`` for `type_identifier`.
+
+    :param str type_identifier: The textual type identifier of the ``type``
+
+    :returns: The hits, misses, maximum size and current size of the cache
+    :rtype: functools._CacheInfo
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.get_cache_info('my.Currency')
+        CacheInfo(hits=998, misses=2, maxsize=1024, currsize=2)
+    """
+    return AwesoJSONDecoder.get_cache_info(type_identifier)
 
 
-def register_encoder(encoder_fct, type_object, type_identifier=None):
+def register_encoder(encoder_fct, type_object, type_identifier=None, cache_size=None):
     """
     Register a function to use for the JSON serialization of a given object type.
 
@@ -143,17 +505,97 @@ def register_encoder(encoder_fct, type_object, type_identifier=None):
     as the function to use to serialize the objects for which the ``type`` matches `type_object`.
     The `type_identifier` will be used as the textual type identifier.
 
+    For immutable types, a `cache_size` enables a LRU cache of the JSON text of the objects,
+    kept by each encoder and keyed by identity: objects found in the cache are spliced into
+    the output without calling `encoder_fct` again.
+
     :param encoder_fct: The encoder function to register
     :param type type_object: The type object to register
     :param str type_identifier: The textual type identifier. Default is the fully qualified class name
+    :param int cache_size: The maximum number of encoded objects to cache
 
-    :raises Exception: The `type_object` is not a ``type``
+    :raises Exception: The `type_object` is not a ``type``, or the `cache_size` is not positive
 
     Usage::
         >>> import awesojson
         >>> awesojson.register_encoder(my_encode_fct, datetime.datetime)
         >>> # or
         >>> awesojson.register_encoder(my_encode_fct, datetime.datetime, 'datetime.datetime')
+        >>> # or
+        >>> awesojson.register_encoder(my_encode_fct, Currency, cache_size=1024)
+    """
+    AwesoJSONEncoder.register_encoder(encoder_fct, type_object, type_identifier, cache_size)
+
+
+def register_class(type_object, type_identifier=None):
+    """
+    Register generated functions to use for the JSON serialization and deserialization of a record class.
+
+    The fields of dataclasses, namedtuples and classes with ``__slots__`` are inspected once,
+    and specialized encoder and decoder functions are generated and registered to the
+    ``AwesoJSONEncoder`` and ``AwesoJSONDecoder`` classes. The objects are written as the
+    dictionary of their fields.
+
+    :param type type_object: The record class to register
+    :param str type_identifier: The textual type identifier. Default is the fully qualified class name
+
+    :raises Exception: The `type_object` is not a dataclass, a namedtuple or a class with ``__slots__``
+
+    :returns: `type_object`, so that ``register_class`` can be used as a class decorator
+    :rtype: type
+
+    Usage::
+        >>> import awesojson
+        >>> @awesojson.register_class
+        ... @dataclasses.dataclass
+        ... class Point(object):
+        ...     x: int
+        ...     y: int
     """
+    if type_identifier is None:
+        type_identifier = get_fqcn(type_object)
+    encoder_fct = classes.make_encoder(type_object)
+    decoder_fct = classes.make_decoder(type_object)
     AwesoJSONEncoder.register_encoder(encoder_fct, type_object, type_identifier)
+    AwesoJSONDecoder.register_decoder(decoder_fct, type_identifier)
+    return type_object
+
+
+def register_batch_decoder(batch_decoder_fct, type_identifier):
+    """
+    Register a function to use for the JSON deserialization of a ``Batch`` of a given object type identifier.
+
+    The batch decoding function `batch_decoder_fct` will be registered to the ``AwesoJSONDecoder``
+    class. It is called once with the list of data of an encoded ``Batch``, and returns the list
+    of deserialized objects. Without a batch function, the decoder function is called for each item.
+
+    :param batch_decoder_fct: The batch decoder function to register
+    :param str type_identifier: The textual type identifier of the ``type`` to register
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_batch_decoder(my_batch_decode_fct, 'decimal.Decimal')
+    """
+    AwesoJSONDecoder.register_batch_decoder(batch_decoder_fct, type_identifier)
+
+
+def register_batch_encoder(batch_encoder_fct, type_object, type_identifier=None):
+    """
+    Register a function to use for the JSON serialization of a ``Batch`` of a given object type.
 
+    The batch encoding function `batch_encoder_fct` will be registered to the ``AwesoJSONEncoder``
+    class. It is called once with the items of a ``Batch`` of `type_object` objects, and returns
+    the list of their data. Without a batch function, the encoder function is called for each item.
+
+    :param batch_encoder_fct: The batch encoder function to register
+    :param type type_object: The type object to register
+    :param str type_identifier: The textual type identifier. Default is the fully qualified class name
+
+    :raises Exception: The `type_object` is not a ``type``
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.register_batch_encoder(my_batch_encode_fct, decimal.Decimal)
+        >>> json_string = awesojson.dumps(awesojson.Batch(prices))
+    """
+    AwesoJSONEncoder.register_batch_encoder(batch_encoder_fct, type_object, type_identifier)
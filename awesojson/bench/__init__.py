@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.bench
+~~~~~~~~~~~~~~~
+
+This module implements the AwesoJSON benchmarks against the plain ``json`` module.
+
+Each workload is encoded and decoded with AwesoJSON and with ``json``, and the
+best time of each operation is reported as operations and megabytes per second,
+along with the peak memory allocated by one operation, traced with ``tracemalloc``.
+
+Usage::
+    $ python -m awesojson.bench --output results.json
+    $ python -m awesojson.bench --compare results.json
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+
+from .. import __version__
+from ..codec import Codec
+from ..registry import Registry
+from . import workloads
+
+RESULTS_FORMAT = 1
+
+
+def _operations(typed, plain, registry):
+    """
+    Build the operations of a workload, by library.
+    """
+    codec = Codec(registry=registry)
+    text = json.dumps(plain)
+    return text, [
+        ('awesojson', 'encode', codec.dumps, typed),
+        ('json', 'encode', json.dumps, plain),
+        ('awesojson', 'decode', codec.loads, text),
+        ('json', 'decode', json.loads, text),
+    ]
+
+
+def _peak_memory(fct, arg):
+    tracemalloc.start()
+    try:
+        fct(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(scale=1.0, repeat=5, names=None):
+    """
+    Run the benchmarks.
+
+    :param float scale: The factor of the size of the documents
+    :param int repeat: The number of times each operation is timed, the best time is kept
+    :param list names: The names of the workloads to run. Default is all of them
+
+    :raises Exception: A workload name is unknown
+
+    :returns: The results, serializable to JSON
+    :rtype: dict
+    """
+    selected = [workload for workload in workloads.WORKLOADS if names is None or workload[0] in names]
+    unknown = set(names or ()) - set(name for name, _ in selected)
+    if unknown:
+        raise Exception("Unknown workloads {0}".format(sorted(unknown)))
+
+    # The registrations of the benchmarks are kept out of the global registry, and the
+    # registrations of the application are kept out of the benchmarks
+    registry = Registry(isolated=True)
+    workloads.register(registry)
+    results = []
+    for name, workload in selected:
+        typed, plain = workload(scale)
+        text, operations = _operations(typed, plain, registry)
+        size = len(text.encode('utf-8'))
+        for library, operation, fct, arg in operations:
+            best = min(timeit.repeat(lambda: fct(arg), repeat=repeat, number=1))
+            results.append({
+                'workload': name,
+                'library': library,
+                'operation': operation,
+                'bytes': size,
+                'seconds': best,
+                'ops_per_sec': 1 / best,
+                'mb_per_sec': size / best / 1e6,
+                'peak_memory': _peak_memory(fct, arg),
+            })
+
+    return {
+        'format': RESULTS_FORMAT,
+        'awesojson': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'scale': scale,
+        'results': results,
+    }
+
+
+def compare(results, baseline):
+    """
+    Get the speed of each result relative to the same result of a `baseline` run.
+
+    :param dict results: The results of ``run``
+    :param dict baseline: The results of a previous ``run``
+
+    :raises Exception: The results can't be compared
+
+    :returns: The ratio of the operations per second by (workload, library, operation)
+    :rtype: dict
+    """
+    if baseline.get('format') != RESULTS_FORMAT or baseline.get('scale') != results['scale']:
+        raise Exception("Results of a different format or scale can't be compared")
+    previous = dict(((result['workload'], result['library'], result['operation']), result['ops_per_sec'])
+                    for result in baseline['results'])
+    ratios = {}
+    for result in results['results']:
+        key = (result['workload'], result['library'], result['operation'])
+        if key in previous:
+            ratios[key] = result['ops_per_sec'] / previous[key]
+    return ratios
+
+
+def report(results, ratios=None, out=None):
+    """
+    Write the results as a table, with the overhead of AwesoJSON over ``json``.
+
+    :param dict results: The results of ``run``
+    :param dict ratios: The results of ``compare``, to add a column of relative speed
+    :param file out: The file-like object to write to. Default is ``sys.stdout``
+    """
+    out = out or sys.stdout
+    plain = dict(((result['workload'], result['operation']), result['seconds'])
+                 for result in results['results'] if result['library'] == 'json')
+    header = '{0:<17} {1:<10} {2:<7} {3:>10} {4:>9} {5:>10} {6:>9}'.format(
+        'workload', 'library', 'op', 'ops/s', 'MB/s', 'peak KiB', 'vs json')
+    if ratios is not None:
+        header += ' {0:>9}'.format('vs base')
+    out.write(header + '\n')
+    for result in results['results']:
+        key = (result['workload'], result['library'], result['operation'])
+        line = '{0:<17} {1:<10} {2:<7} {3:>10.1f} {4:>9.1f} {5:>10.0f} {6:>8.2f}x'.format(
+            result['workload'], result['library'], result['operation'], result['ops_per_sec'],
+            result['mb_per_sec'], result['peak_memory'] / 1024.0,
+            result['seconds'] / plain[(result['workload'], result['operation'])])
+        if ratios is not None:
+            line += ' {0:>8.2f}x'.format(ratios[key]) if key in ratios else ' {0:>9}'.format('-')
+        out.write(line + '\n')
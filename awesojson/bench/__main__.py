@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.bench.__main__
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements the command line of the AwesoJSON benchmarks.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import json
+import sys
+
+from . import compare, report, run
+from .workloads import WORKLOADS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m awesojson.bench',
+                                     description='Benchmark AwesoJSON against the json module.')
+    parser.add_argument('--workload', action='append', choices=[name for name, _ in WORKLOADS],
+                        help='run this workload only, can be repeated')
+    parser.add_argument('--scale', type=float, default=1.0, help='factor of the size of the documents')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timings of each operation')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare with the results of this JSON file')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as filehandle:
+            baseline = json.load(filehandle)
+        if baseline.get('scale') != args.scale:
+            parser.error('--compare results were run with --scale {0}'.format(baseline.get('scale')))
+
+    results = run(args.scale, args.repeat, args.workload)
+    ratios = None if baseline is None else compare(results, baseline)
+    report(results, ratios)
+    if args.output:
+        with open(args.output, 'w') as filehandle:
+            json.dump(results, filehandle, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.bench.workloads
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements the generated documents of the AwesoJSON benchmarks.
+
+Each workload builds the same document twice: with typed objects, for AwesoJSON,
+and in its tagged dictionary form, for the plain ``json`` module. Both are written
+to the same JSON text, so the difference of speed is the overhead of the registry.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import random
+
+TYPE_IDENTIFIER = 'awesojson.bench.Record'
+
+
+class Record(object):
+    """
+    The registered type of the tagged workloads.
+    """
+
+    __slots__ = ('id', 'name', 'score')
+
+    def __init__(self, id, name, score):
+        self.id = id
+        self.name = name
+        self.score = score
+
+
+def encode_record(record):
+    return {'id': record.id, 'name': record.name, 'score': record.score}
+
+
+def decode_record(data):
+    return Record(data['id'], data['name'], data['score'])
+
+
+def register(registry):
+    """
+    Register the codec of ``Record`` to `registry`.
+
+    :param Registry registry: The registry of the benchmarked codec
+    """
+    registry.register_encoder(encode_record, Record, TYPE_IDENTIFIER)
+    registry.register_decoder(decode_record, TYPE_IDENTIFIER)
+
+
+def _tagged(record):
+    return {'awesojsontype': TYPE_IDENTIFIER, 'data': encode_record(record)}
+
+
+def flat_dicts(scale):
+    rand = random.Random(0)
+    document = [{'id': i, 'name': 'item {0}'.format(i), 'price': rand.random() * 100,
+                 'active': i % 2 == 0, 'parent': None}
+                for i in range(int(20000 * scale))]
+    return document, document
+
+
+def deep_nesting(scale):
+    def nested(depth, i):
+        if not depth:
+            return {'leaf': i}
+        return {'level': depth, 'children': [nested(depth - 1, i), i]}
+    document = [nested(20, i) for i in range(int(1000 * scale))]
+    return document, document
+
+
+def tagged(ratio):
+    every = int(round(1 / ratio))
+
+    def workload(scale):
+        typed, plain = [], []
+        for i in range(int(20000 * scale)):
+            record = Record(i, 'record {0}'.format(i), i * 0.5)
+            if i % every:
+                typed.append(encode_record(record))
+                plain.append(encode_record(record))
+            else:
+                typed.append(record)
+                plain.append(_tagged(record))
+        return typed, plain
+    return workload
+
+
+def homogeneous_list(scale):
+    rand = random.Random(0)
+    document = [rand.random() for _ in range(int(200000 * scale))]
+    return document, document
+
+
+def big_strings(scale):
+    rand = random.Random(0)
+    alphabet = u'abcdefghijklmnopqrstuvwxyz0123456789 "\\\né中'
+    document = [u''.join(rand.choice(alphabet) for _ in range(int(250000 * scale))) for _ in range(4)]
+    return document, document
+
+
+WORKLOADS = [
+    ('flat_dicts', flat_dicts),
+    ('deep_nesting', deep_nesting),
+    ('tagged_1pct', tagged(0.01)),
+    ('tagged_10pct', tagged(0.1)),
+    ('tagged_100pct', tagged(1)),
+    ('homogeneous_list', homogeneous_list),
+    ('big_strings', big_strings),
+]
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.classes
+~~~~~~~~~~~~~~~~~
+
+This module implements the generated AwesoJSON codecs for record classes:
+dataclasses, namedtuples and classes with ``__slots__``.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import dataclasses
+
+
+def class_fields(type_object):
+    """
+    Get the names of the fields of a record class, and the names of the fields its constructor takes.
+
+    The fields are the dataclass fields, the namedtuple ``_fields`` or the ``__slots__``
+    of the class and its bases, in that order of precedence.
+
+    :param type type_object: The record class
+
+    :raises Exception: The `type_object` is not a dataclass, a namedtuple or a class with ``__slots__``
+
+    :returns: The names of all the fields, and the names of the constructor arguments.
+              The arguments are ``None`` when the instances are created without calling the constructor
+    :rtype: (tuple, tuple)
+    """
+    if not isinstance(type_object, type):
+        raise Exception("type_object is not a type")
+
+    if dataclasses.is_dataclass(type_object):
+        fields = dataclasses.fields(type_object)
+        return (tuple(field.name for field in fields),
+                tuple(field.name for field in fields if field.init))
+
+    if issubclass(type_object, tuple) and hasattr(type_object, '_fields'):
+        return tuple(type_object._fields), tuple(type_object._fields)
+
+    fields = []
+    for base in reversed(type_object.__mro__):
+        slots = base.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for slot in slots:
+            if slot.startswith('__') and not slot.endswith('__'):
+                slot = '_' + base.__name__.lstrip('_') + slot  # Private name mangling
+            if slot not in ('__dict__', '__weakref__') and slot not in fields:
+                fields.append(slot)
+    if not fields:
+        raise Exception("No dataclass fields, _fields or __slots__ for type {0}".format(type_object))
+    return tuple(fields), None
+
+
+def _compile(name, source, namespace):
+    exec(compile(source, '<awesojson {0}>'.format(name), 'exec'), namespace)
+    return namespace[name]
+
+
+class GeneratedFunction(object):
+    """
+    A function generated for a record class.
+
+    The generated code cannot be pickled, so the function pickles as the record class and
+    the factory which generated it, and is generated again when unpickled. This lets the
+    registries holding it be sent to the worker processes of :mod:`awesojson.parallel`.
+
+    :param fct factory: The module-level function which generated the function
+    :param type type_object: The record class
+    :param fct function: The generated function
+    """
+    __slots__ = ('factory', 'type_object', 'function')
+
+    def __init__(self, factory, type_object, function):
+        self.factory = factory
+        self.type_object = type_object
+        self.function = function
+
+    def __call__(self, obj):
+        return self.function(obj)
+
+    def __reduce__(self):
+        return self.factory, (self.type_object,)
+
+    def __repr__(self):
+        return '<awesojson {0} for {1!r}>'.format(self.factory.__name__, self.type_object)
+
+
+def make_encoder(type_object):
+    """
+    Generate the encoder function of a record class.
+
+    The function builds the dictionary of the fields with a single literal, instead of
+    looking the fields up by name for each object.
+
+    :param type type_object: The record class
+
+    :raises Exception: The `type_object` is not a dataclass, a namedtuple or a class with ``__slots__``
+
+    :returns: The encoder function, which can be pickled when `type_object` can
+    :rtype: GeneratedFunction
+    """
+    fields, _ = class_fields(type_object)
+    if issubclass(type_object, tuple):
+        values = ['obj[{0}]'.format(index) for index in range(len(fields))]
+    else:
+        values = ['obj.{0}'.format(field) for field in fields]
+    name = 'encode_' + type_object.__name__
+    source = 'def {0}(obj):\n    return {{{1}}}\n'.format(
+        name, ', '.join('{0!r}: {1}'.format(field, value) for field, value in zip(fields, values)))
+    return GeneratedFunction(make_encoder, type_object, _compile(name, source, {}))
+
+
+def make_decoder(type_object):
+    """
+    Generate the decoder function of a record class.
+
+    Namedtuples are created straight from the tuple of their fields. Other classes are
+    created by passing the constructor arguments by keyword, or without calling the
+    constructor for the classes with ``__slots__``, and their other fields are set
+    one by one. Classes overriding ``__setattr__``, like frozen dataclasses, have
+    these fields set with ``object.__setattr__``.
+
+    :param type type_object: The record class
+
+    :raises Exception: The `type_object` is not a dataclass, a namedtuple or a class with ``__slots__``
+
+    :returns: The decoder function, which can be pickled when `type_object` can
+    :rtype: GeneratedFunction
+    """
+    fields, arguments = class_fields(type_object)
+    if issubclass(type_object, tuple):
+        lines = ['return new(cls, ({0},))'.format(
+            ', '.join('data[{0!r}]'.format(field) for field in fields))]
+    else:
+        if arguments is None:
+            lines = ['obj = new(cls)']
+            attributes = fields
+        elif arguments == fields:
+            lines = ['obj = cls(**data)']
+            attributes = ()
+        else:
+            lines = ['obj = cls({0})'.format(
+                ', '.join('{0}=data[{0!r}]'.format(argument) for argument in arguments))]
+            attributes = [field for field in fields if field not in arguments]
+        if type_object.__setattr__ is object.__setattr__:
+            lines.extend('obj.{0} = data[{0!r}]'.format(field) for field in attributes)
+        else:
+            lines.extend('setattr(obj, {0!r}, data[{0!r}])'.format(field) for field in attributes)
+        lines.append('return obj')
+    name = 'decode_' + type_object.__name__
+    source = 'def {0}(data):\n{1}\n'.format(name, '\n'.join('    ' + line for line in lines))
+    new = tuple.__new__ if issubclass(type_object, tuple) else object.__new__
+    function = _compile(name, source, {'cls': type_object, 'new': new, 'setattr': object.__setattr__})
+    return GeneratedFunction(make_decoder, type_object, function)
@@ -0,0 +1,469 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.codec
+~~~~~~~~~~~~~~~
+
+This module implements the reusable AwesoJSON codec.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import codecs
+import json
+import mmap as _mmap
+import os
+import re
+
+from .decoder import AwesoJSONDecoder
+from .encoder import AwesoJSONEncoder
+from .utils import BYTES_TYPES, decode_bytes
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PARALLEL_THRESHOLD = 4 * 1024 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_ELEMENT_ENDS = frozenset(' \t\n\r,]')
+
+
+class Codec(object):
+    """
+    A reusable pair of ``AwesoJSONEncoder`` and ``AwesoJSONDecoder``.
+
+    The encoder and decoder (and the decoder's scanner) are built once, with the
+    given options, and reused for every call. This avoids the per-call setup cost
+    of ``json.dumps(obj, cls=...)`` and ``json.loads(s, cls=...)``.
+
+    Usage::
+        >>> import awesojson
+        >>> codec = awesojson.Codec(encoder_kwargs={'sort_keys': True})
+        >>> json_string = codec.dumps(python_object)
+        >>> python_object = codec.loads(json_string)
+    """
+
+    def __init__(self, encoder_cls=AwesoJSONEncoder, decoder_cls=AwesoJSONDecoder,
+                 encoder_kwargs=None, decoder_kwargs=None, registry=None):
+        """
+        :param type encoder_cls: The ``AwesoJSONEncoder`` (sub)class to use
+        :param type decoder_cls: The ``AwesoJSONDecoder`` (sub)class to use
+        :param dict encoder_kwargs: Keyword arguments for the encoder, see ``json.JSONEncoder``
+        :param dict decoder_kwargs: Keyword arguments for the decoder, see ``json.JSONDecoder``
+        :param Registry registry: The registered functions to use, e.g. per tenant. Default is the
+                                  ``registry`` of the encoder and decoder classes
+        """
+        encoder_kwargs = dict(encoder_kwargs or {})
+        decoder_kwargs = dict(decoder_kwargs or {})
+        if registry is not None:
+            encoder_kwargs['registry'] = decoder_kwargs['registry'] = registry
+        self.encoder_kwargs = encoder_kwargs
+        self.decoder_kwargs = decoder_kwargs
+        self.encoder = encoder_cls(**encoder_kwargs)
+        self.decoder = decoder_cls(**decoder_kwargs)
+
+    def dumps(self, obj):
+        """
+        Serialize a Python object to a JSON formated ``str``.
+
+        :param obj: The Python object
+
+        :raises Exception: There's no registered encoder function that suits `obj`'s type
+
+        :returns: The JSON serialization of the Python object
+        :rtype: str
+        """
+        return self.encoder.encode(obj)
+
+    def dump(self, obj, filehandle):
+        """
+        Serialize a Python object as a JSON formated stream to a file-like object.
+
+        :param obj: The Python object
+        :param file filehandle: The file-like object (supporting ``.write()``) that receives the stream
+
+        :raises Exception: There's no registered encoder function that suits `obj`'s type
+        """
+        writer = _BufferedWriter(filehandle, DEFAULT_CHUNK_SIZE)
+        for chunk in self.encoder.iterencode(obj):
+            writer.write(chunk)
+        writer.flush()
+
+    def dump_iter(self, iterable, filehandle, buffer_size=DEFAULT_CHUNK_SIZE):
+        """
+        Serialize the elements of an iterable as a JSON array stream to a file-like object.
+
+        The elements are encoded one at a time, so that generators and iterators can be
+        serialized without building a list first. The output is written by blocks of
+        `buffer_size` characters.
+
+        The type table of `compact_types` (and `share_references`) comes before the
+        document, and can only be known once every element is encoded, so these
+        options can't be used to write a stream.
+
+        :param iterable: The iterable of Python objects
+        :param file filehandle: The file-like object (supporting ``.write()``) that receives the stream
+        :param int buffer_size: The size of the blocks written to `filehandle`
+
+        :raises Exception: The encoder is configured with `compact_types`, or there's no
+                           registered encoder function that suits an element's type
+        """
+        encoder = self.encoder
+        if encoder.compact_types:
+            raise Exception("A JSON array stream can't be written with compact_types")
+
+        writer = _BufferedWriter(filehandle, buffer_size)
+
+        indent = encoder.indent
+        if indent is None:
+            newline = ''
+        else:
+            if not isinstance(indent, str):
+                indent = ' ' * indent
+            newline = '\n' + indent
+        separator = encoder.item_separator + newline
+
+        writer.write('[')
+        delimiter = newline
+        for obj in iterable:
+            writer.write(delimiter)
+            delimiter = separator
+            chunk = encoder.encode(obj)
+            if indent is not None:
+                # JSON strings never contain raw newlines, only indentation does
+                chunk = chunk.replace('\n', newline)
+            writer.write(chunk)
+        if indent is not None and delimiter is separator:
+            writer.write('\n')
+        writer.write(']')
+        writer.flush()
+
+    def dumpb(self, obj, into=None):
+        """
+        Serialize a Python object to UTF-8 encoded JSON ``bytes``.
+
+        With `into`, the output is appended to the given ``bytearray`` instead. The document
+        is encoded in one pass, then appended block by block, so the whole document is never
+        held as ``bytes`` next to the ``str``.
+
+        :param obj: The Python object
+        :param bytearray into: The buffer that receives the output
+
+        :raises Exception: There's no registered encoder function that suits `obj`'s type
+
+        :returns: The JSON serialization of the Python object, or `into`
+        :rtype: (bytes|bytearray)
+        """
+        text = self.encoder.encode(obj)
+        if into is None:
+            return text.encode('utf-8')
+
+        for start in range(0, len(text), DEFAULT_CHUNK_SIZE):
+            into += text[start:start + DEFAULT_CHUNK_SIZE].encode('utf-8')
+        return into
+
+    def dumps_oob(self, obj):
+        """
+        Serialize a Python object to a JSON formatted ``str``, with its binary buffers out-of-band.
+
+        :param obj: The Python object
+
+        :raises Exception: There's no registered encoder function that suits `obj`'s type
+
+        :returns: The JSON serialization of the Python object, and its buffers
+        :rtype: (str, list)
+        """
+        buffers = []
+        return self.encoder.with_buffers(buffers).encode(obj), buffers
+
+    def loads_oob(self, strvalue, buffers):
+        """
+        Deserialize a JSON document written by ``dumps_oob`` with its out-of-band buffers.
+
+        :param (str|bytes|bytearray|memoryview) strvalue: The string object containing a JSON document
+        :param list buffers: The out-of-band buffers of the document
+
+        :raises Exception: The JSON document contains an object with no registered
+                           decoder function which suits the *defined* `awesojsontype` for that object,
+                           or a reference to an unknown buffer
+
+        :returns: The deserialized Python object
+        """
+        if isinstance(strvalue, BYTES_TYPES):
+            strvalue = decode_bytes(strvalue)
+        return self.decoder.with_buffers(buffers).decode(strvalue)
+
+    def loads(self, strvalue):
+        """
+        Deserialize a ``str`` or bytes-like object containing a JSON document to a Python object.
+
+        :param (str|bytes|bytearray|memoryview) strvalue: The string object containing a JSON document
+
+        :raises Exception: The JSON document contains an object with no registered
+                           decoder function which suits the *defined* `awesojsontype` for that object
+
+        :returns: The deserialized Python object
+        """
+        if isinstance(strvalue, BYTES_TYPES):
+            strvalue = decode_bytes(strvalue)
+        return self.decoder.decode(strvalue)
+
+    def load(self, filehandle):
+        """
+        Deserialize a file-like object containing a JSON document to a Python object.
+
+        :param file filehandle: The file-like object (supporting ``.read()``) containing a JSON document
+
+        :raises Exception: The JSON document contains an object with no registered
+                           decoder function which suits the *defined* `awesojsontype` for that object
+
+        :returns: The deserialized Python object
+        """
+        return self.loads(filehandle.read())
+
+    def iterload(self, filehandle, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Iteratively deserialize a file-like object containing a top-level JSON array.
+
+        The file is read in chunks of `chunk_size` and each element of the array is
+        decoded and yielded as soon as it is complete, so that memory stays bounded
+        by the size of the largest element rather than the size of the document.
+
+        :param file filehandle: The file-like object (supporting ``.read()``) containing a JSON array
+        :param int chunk_size: The size of the chunks read from `filehandle`
+
+        :raises ValueError: The JSON document is not a valid JSON array
+        :raises Exception: The JSON document contains an object with no registered
+                           decoder function which suits the *defined* `awesojsontype` for that object
+
+        :returns: An iterator over the deserialized Python objects of the array
+        """
+        raw_decode = self.decoder.raw_decode
+        stream = _StreamBuffer(filehandle, chunk_size)
+
+        pos = stream.skip_whitespace(0)
+        if stream.text[pos:pos + 1] != '[':
+            raise json.JSONDecodeError("Expecting '['", stream.text, pos)
+        pos = stream.skip_whitespace(pos + 1)
+        if stream.text[pos:pos + 1] == ']':
+            stream.check_end(pos + 1)
+            return
+
+        while True:
+            read_size = chunk_size
+            while True:
+                end = None
+                try:
+                    obj, end = raw_decode(stream.text, pos)
+                except json.JSONDecodeError:
+                    if stream.eof:
+                        raise
+                # A number is only complete once a delimiter follows it, e.g. "1." or "1.5e"
+                if end is not None and (stream.eof or stream.text[end:end + 1] in _ELEMENT_ENDS):
+                    break
+                stream.fill(pos, read_size)
+                pos = 0
+                read_size *= 2
+            yield obj
+
+            pos = stream.skip_whitespace(end)
+            delimiter = stream.text[pos:pos + 1]
+            if delimiter == ']':
+                stream.check_end(pos + 1)
+                return
+            if delimiter != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", stream.text, pos)
+            pos = stream.skip_whitespace(pos + 1)
+
+    def load_path(self, path, mmap=True):
+        """
+        Deserialize the file at `path` containing a JSON document to a Python object.
+
+        With `mmap`, the file is memory-mapped and decoded straight from the mapped
+        buffer, so the raw file content is read from the shared page cache instead of
+        being copied to a private ``bytes`` object first.
+
+        :param str path: The path of the file containing a JSON document
+        :param bool mmap: Memory-map the file instead of reading it
+
+        :raises Exception: The JSON document contains an object with no registered
+                           decoder function which suits the *defined* `awesojsontype` for that object
+
+        :returns: The deserialized Python object
+        """
+        with open(path, 'rb') as filehandle:
+            if not mmap or not os.fstat(filehandle.fileno()).st_size:
+                return self.load(filehandle)
+            with _mmap.mmap(filehandle.fileno(), 0, access=_mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    return self.loads(view)
+
+    def iterload_path(self, path, mmap=True, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Iteratively deserialize the file at `path` containing a top-level JSON array.
+
+        See ``iterload``. With `mmap`, the chunks are read from a memory-mapping of the
+        file, so that processes streaming the same file share its page cache.
+
+        :param str path: The path of the file containing a JSON array
+        :param bool mmap: Memory-map the file instead of reading it
+        :param int chunk_size: The size of the chunks read from the file
+
+        :raises ValueError: The JSON document is not a valid JSON array
+        :raises Exception: The JSON document contains an object with no registered
+                           decoder function which suits the *defined* `awesojsontype` for that object
+
+        :returns: An iterator over the deserialized Python objects of the array
+        """
+        with open(path, 'rb') as filehandle:
+            if not mmap or not os.fstat(filehandle.fileno()).st_size:
+                for obj in self.iterload(filehandle, chunk_size):
+                    yield obj
+                return
+            with _mmap.mmap(filehandle.fileno(), 0, access=_mmap.ACCESS_READ) as mapped:
+                for obj in self.iterload(mapped, chunk_size):
+                    yield obj
+
+    def dump_lines(self, iterable, filehandle, buffer_size=DEFAULT_CHUNK_SIZE, workers=None, batch_size=None):
+        """
+        Serialize the objects of an iterable as JSON Lines to a file-like object.
+
+        Each object is written as a JSON document on its own line. With `workers`, batches
+        of objects are encoded in a process pool with the encoder options and the registry
+        of this codec, see ``awesojson.parallel.dump_lines``.
+
+        :param iterable: The iterable of Python objects
+        :param file filehandle: The file-like object (supporting ``.write()``) that receives the lines
+        :param int buffer_size: The size of the blocks written to `filehandle`
+        :param int workers: The number of worker processes. Default is to encode in the current process
+        :param int batch_size: The number of objects encoded per worker task
+
+        :raises Exception: The encoder is configured with an `indent`, or there's no
+                           registered encoder function that suits an object's type
+        """
+        if self.encoder.indent is not None:
+            raise Exception("JSON Lines can't be written with an indent")
+
+        if workers:
+            from . import parallel  # The parallel module builds on this one
+            parallel.dump_lines(iterable, filehandle, workers, batch_size or DEFAULT_BATCH_SIZE,
+                                encoder_kwargs=self.encoder_kwargs, registry=self.encoder.registry)
+            return
+
+        writer = _BufferedWriter(filehandle, buffer_size)
+        encode = self.encoder.encode
+        for obj in iterable:
+            writer.write(encode(obj))
+            writer.write('\n')
+        writer.flush()
+
+    def load_lines(self, filehandle, workers=None, batch_size=None):
+        """
+        Iteratively deserialize a file-like object containing JSON Lines.
+
+        Blank lines are skipped. With `workers`, batches of lines are decoded in a process
+        pool with the decoder options and the registry of this codec, see
+        ``awesojson.parallel.load_lines``.
+
+        :param file filehandle: The file-like object (iterable over lines) containing the JSON Lines
+        :param int workers: The number of worker processes. Default is to decode in the current process
+        :param int batch_size: The number of lines decoded per worker task
+
+        :raises Exception: A JSON document contains an object with no registered
+                           decoder function which suits the *defined* `awesojsontype` for that object
+
+        :returns: An iterator over the deserialized Python objects
+        """
+        if workers:
+            from . import parallel  # The parallel module builds on this one
+            return parallel.load_lines(filehandle, workers, batch_size or DEFAULT_BATCH_SIZE,
+                                       decoder_kwargs=self.decoder_kwargs, registry=self.decoder.registry)
+        return self._load_lines(filehandle)
+
+    def _load_lines(self, filehandle):
+        loads = self.loads
+        for line in filehandle:
+            if line.strip():
+                yield loads(line)
+
+
+class _BufferedWriter(object):
+    """
+    Accumulate text and write it to a file-like object by blocks of `buffer_size`.
+    """
+
+    def __init__(self, filehandle, buffer_size):
+        self._write = filehandle.write
+        self.buffer_size = buffer_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self._write(''.join(self._parts))
+            self._parts = []
+            self._size = 0
+
+
+class _StreamBuffer(object):
+    """
+    Text buffer over a file-like object, filled on demand.
+
+    ``bytes`` chunks are decoded incrementally, with the encoding (UTF-8, UTF-16 or UTF-32)
+    detected from the first bytes like ``json.loads`` does.
+    """
+
+    def __init__(self, filehandle, chunk_size):
+        self.read = filehandle.read
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.eof = False
+        self._bytes_decoder = None
+
+    def fill(self, pos, size=None):
+        """
+        Drop the text before `pos` and append the next chunk of the file.
+
+        Positions in ``text`` are shifted by `pos` after this call.
+        """
+        chunk = self.read(size or self.chunk_size)
+        if isinstance(chunk, (bytes, bytearray)) and self._bytes_decoder is None:
+            # The encoding is detected from the first 4 bytes
+            while 0 < len(chunk) < 4:
+                more = self.read(4 - len(chunk))
+                if not more:
+                    break
+                chunk += more
+            self._bytes_decoder = codecs.getincrementaldecoder(json.detect_encoding(bytes(chunk[:4])))()
+        if not chunk:
+            self.eof = True
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = self._bytes_decoder.decode(chunk, final=self.eof)
+        self.text = self.text[pos:] + chunk
+
+    def skip_whitespace(self, pos):
+        """
+        Get the position of the next non-whitespace character from `pos`, reading as needed.
+
+        Returns ``len(text)`` at the end of the file.
+        """
+        while True:
+            pos = _WHITESPACE.match(self.text, pos).end()
+            if pos < len(self.text) or self.eof:
+                return pos
+            self.fill(pos)
+            pos = 0
+
+    def check_end(self, pos):
+        """
+        Ensure that only whitespace follows `pos` until the end of the file.
+        """
+        pos = self.skip_whitespace(pos)
+        if pos != len(self.text):
+            raise json.JSONDecodeError("Extra data", self.text, pos)
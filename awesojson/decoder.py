@@ -10,7 +10,62 @@ This module implements the AwesoJSON decoder classes.
 :license: MIT, see LICENSE for more details.
 """
 
+import copy
 import json
+import re
+
+from . import instrumentation
+from .lazy import LazyObject
+from .registry import default_registry
+
+_COMPACT_HEAD = re.compile(r'\{[ \t\n\r]*"awesojsontypes"[ \t\n\r]*:[ \t\n\r]*')
+_COMPACT_DOC = re.compile(r'[ \t\n\r]*,[ \t\n\r]*"awesojsondoc"[ \t\n\r]*:[ \t\n\r]*')
+_COMPACT_END = re.compile(r'[ \t\n\r]*\}')
+_PATH_SEGMENT = re.compile(r'(?:^|\.)([^.\[\]]+)|\[(\*|[0-9]+)\]')
+_ALL_ITEMS = '[*]'
+_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+
+
+def parse_selection(paths):
+    """
+    Parse JSON paths to the tree of the selected keys and indexes.
+
+    A path is a dotted sequence of keys, each followed by any number of ``[<index>]``
+    or ``[*]`` (all the items of a list), e.g. ``items[*].id``. The selected items of a
+    list are kept in order, and ``[*]`` takes precedence over the indexes of the same list.
+
+    :param list paths: The JSON paths
+
+    :raises Exception: A path is invalid
+
+    :returns: The selection tree, where ``None`` selects a whole value
+    :rtype: dict
+    """
+    tree = {}
+    for path in paths:
+        segments = []
+        end = 0
+        for match in _PATH_SEGMENT.finditer(path):
+            if match.start() != end:
+                break
+            key, index = match.groups()
+            if key is not None:
+                segments.append(key)
+            else:
+                segments.append(_ALL_ITEMS if index == '*' else int(index))
+            end = match.end()
+        if not segments or end != len(path) or path.startswith('.'):
+            raise Exception("Invalid path {0}".format(path))
+
+        node = tree
+        for segment in segments[:-1]:
+            child = node.setdefault(segment, {})
+            if child is None:  # A shorter path already selects the whole value
+                break
+            node = child
+        else:
+            node[segments[-1]] = None
+    return tree
 
 
 class AwesoJSONDecoder(json.JSONDecoder):
@@ -24,19 +79,63 @@ class AwesoJSONDecoder(json.JSONDecoder):
     parsed data. This allow users to define the decoding functions wherever
     they want and use this adapter class to register them to be used when
     deserializing JSON objects.
+
+    Documents written with a type table by ``AwesoJSONEncoder`` (`compact_types`) are
+    recognized, and each of their type identifiers is resolved to its decoder
+    function once per document. In these documents, the objects tagged with an
+    ``awesojsonid`` are shared by all the ``{"awesojsonref": <id>}`` referencing them.
+
+    With `pairs` enabled, or an `object_pairs_hook`, the tagged objects are decoded
+    straight from their key/value pairs with ``object_pairs_handler``, without building
+    their dictionary first. The other objects are built by the `object_pairs_hook`.
+
+    With `lazy` enabled, the tagged objects are decoded to ``LazyObject`` proxies holding
+    their data, and their decoder function only runs when they are first used. Encoded
+    ``Batch`` objects are still decoded at once. ``awesojson.resolve`` decodes all the
+    proxies of a document.
+
+    With `select`, only the values at the given JSON paths are kept, e.g. ``items[*].id``.
+    The document is checked and decoded without hooks, then the registered decoder
+    functions only run for the selected values.
+
+    The decoder functions are looked up in the ``Registry`` given to the decoder, or in
+    the ``registry`` of the class, the global registry by default.
+
+    A decoder returned by ``with_buffers`` replaces the ``{"awesojsonbuffer": <index>}``
+    placeholders by the given out-of-band buffers.
+
+    With `prescan` enabled, documents are first searched for the `awesojsontype`
+    tag and documents without any tag are decoded without the Python-level
+    ``object_handler`` hook.
+
+    While ``awesojson.enable_stats`` is in effect, the calls of the decoder functions
+    are timed and recorded per textual type identifier, when they run for lazy objects.
     """
 
-    _decoder_table = {}
+    registry = default_registry
+    _buffers = None
 
     @classmethod
-    def register_decoder(cls, decoder_fct, type_identifier):
+    def register_decoder(cls, decoder_fct, type_identifier, arguments='data', cache_size=None):
         """
         Register `decoder_fct` as the decode function for `type_identifier`.
 
+        By default, the decode function receives the data of the object as is. With the
+        ``'kwargs'`` `arguments`, the data is passed as keyword arguments, e.g. to a class,
+        and with ``'pairs'``, as an iterable of its key/value pairs.
+
+        With a `cache_size`, the decoded objects are kept in a LRU cache keyed on their
+        data, and the same object is returned for the same data, in every document.
+        It must only be used for immutable types.
+
         :param decoder_fct: The decoder function to register
         :param str type_identifier: The textual type identifier of the ``type`` to register
+        :param str arguments: How the data is passed: ``'data'``, ``'kwargs'`` or ``'pairs'``
+        :param int cache_size: The maximum number of decoded objects to cache
+
+        :raises Exception: The `arguments` are unknown, or the `cache_size` is not positive
         """
-        cls._decoder_table[type_identifier] = decoder_fct
+        cls.registry.register_decoder(decoder_fct, type_identifier, arguments, cache_size)
 
     @classmethod
     def get_decoder(cls, type_identifier):
@@ -49,11 +148,304 @@ class AwesoJSONDecoder(json.JSONDecoder):
 
         :returns: Decoder function registered for `type_identifier`
         """
-        return cls._decoder_table.get(type_identifier)
+        return cls.registry.get_decoder(type_identifier)
+
+    @classmethod
+    def get_cache_info(cls, type_identifier):
+        """
+        Get the statistics of the decode cache of `type_identifier`.
+
+        Will return ``None`` if `type_identifier` has no cache.
+
+        :param str type_identifier: The textual type identifier of the ``type``
+
+        :returns: The hits, misses, maximum size and current size of the cache
+        :rtype: functools._CacheInfo
+        """
+        return cls.registry.get_cache_info(type_identifier)
+
+    @classmethod
+    def register_batch_decoder(cls, batch_decoder_fct, type_identifier):
+        """
+        Register `batch_decoder_fct` as the batch decode function for `type_identifier`.
+
+        A batch decode function receives the list of data of an encoded ``Batch`` and
+        returns the list of decoded objects, in order.
+
+        :param batch_decoder_fct: The batch decoder function to register
+        :param str type_identifier: The textual type identifier of the ``type`` to register
+        """
+        cls.registry.register_batch_decoder(batch_decoder_fct, type_identifier)
+
+    @classmethod
+    def get_batch_decoder(cls, type_identifier):
+        """
+        Get the registered batch decoder function for `type_identifier`.
+
+        Will return ``None`` if no batch function is registered for `type_identifier`.
+
+        :param str type_identifier: The textual type identifier of the ``type``
+
+        :returns: Batch decoder function registered for `type_identifier`
+        """
+        return cls.registry.get_batch_decoder(type_identifier)
+
+    def decode_batch(self, type_identifier, data):
+        """
+        Deserialize the list of `data` of an encoded ``Batch`` of `type_identifier` objects.
+
+        Uses the batch decoder function registered for `type_identifier`, called once,
+        or the decoder function registered for `type_identifier`, called for each item.
+
+        :param str type_identifier: The textual type identifier of the ``type``
+        :param iterable data: The data of the items
+
+        :raises Exception: No registered decoder function suits `type_identifier`
+
+        :returns: The deserialized objects
+        :rtype: list
+        """
+        batch_deserializer = self.registry.get_batch_decoder(type_identifier)
+        if batch_deserializer:
+            return batch_deserializer(data if data.__class__ is list else list(data))
+        deserializer = self.registry.get_decoder(type_identifier)
+        if not deserializer:
+            raise Exception("No decoder funtion registered for type {0} "
+                            "(batch: {1})".format(type_identifier, data))
+        return [deserializer(item) for item in data]
+
+    def decode_columns(self, type_identifier, columns):
+        """
+        Deserialize the `columns` of a columnar encoded ``Batch`` of `type_identifier` objects.
+
+        The rows are rebuilt as dictionaries one at a time and handed to ``decode_batch``.
+
+        :param str type_identifier: The textual type identifier of the ``type``
+        :param dict columns: The list of values of each key of the items data
+
+        :raises Exception: No registered decoder function suits `type_identifier`
+
+        :returns: The deserialized objects
+        :rtype: list
+        """
+        keys = list(columns)
+        rows = (dict(zip(keys, values)) for values in zip(*columns.values()))
+        return self.decode_batch(type_identifier, rows)
+
+    def __init__(self, prescan=False, pairs=False, lazy=False, select=None, registry=None, **kwargs):
+        """
+        :param bool prescan: Skip the ``object_handler`` hook for documents without any tag
+        :param bool pairs: Decode the objects from their key/value pairs with ``object_pairs_handler``.
+                           Implied by an `object_pairs_hook`
+        :param bool lazy: Decode the tagged objects to ``LazyObject`` proxies
+        :param list select: Only decode the values at these JSON paths, see ``parse_selection``
+        :param Registry registry: The registered decoder functions to use. Default is the class ``registry``
+        """
+        if registry is not None:
+            self.registry = registry
+        object_pairs_hook = kwargs.pop('object_pairs_hook', None)
+        pairs = pairs or object_pairs_hook is not None
+        super(AwesoJSONDecoder, self).__init__(
+            object_hook=self.object_handler,
+            object_pairs_hook=self.object_pairs_handler if pairs else None,
+            **kwargs)
+        self._pairs_hook = object_pairs_hook or dict
+        self.lazy = lazy
+        self._plain_decoder = json.JSONDecoder(object_pairs_hook=object_pairs_hook, **kwargs)
+        self._untagged_decoder = self._plain_decoder if prescan else None
+        self._selection = parse_selection(select) if select is not None else None
+
+    def with_buffers(self, buffers):
+        """
+        Get a copy of this decoder that resolves out-of-band buffer placeholders from `buffers`.
+
+        The buffers are returned as given, without copying them.
+
+        :param list buffers: The out-of-band buffers, in the order they were collected
+
+        :returns: The decoder using the buffers
+        :rtype: AwesoJSONDecoder
+        """
+        decoder = copy.copy(self)
+        decoder._buffers = buffers
+        decoder._untagged_decoder = None
+        decoder.object_hook = decoder._buffer_object_handler
+        if decoder.object_pairs_hook is not None:
+            decoder.object_pairs_hook = decoder.object_pairs_handler
+        decoder.scan_once = json.scanner.make_scanner(decoder)
+        return decoder
+
+    def _get_buffer(self, obj):
+        try:
+            return self._buffers[obj['awesojsonbuffer']]
+        except (IndexError, TypeError):
+            raise Exception("Reference to an unknown buffer "
+                            "(object: {0})".format(obj))
 
-    def __init__(self, **kwargs):
-        super(AwesoJSONDecoder, self).__init__(object_hook=self.object_handler,
-                                               **kwargs)
+    def _buffer_object_handler(self, obj):
+        if 'awesojsonbuffer' in obj:
+            return self._get_buffer(obj)
+        return self.object_handler(obj)
+
+    def decode(self, s, *args, **kwargs):
+        """
+        Deserialize `s`, a ``str`` containing a JSON document.
+
+        When `prescan` is enabled and `s` can't contain a tagged object, the document
+        is decoded with a plain ``JSONDecoder``. Escaped ``\\u006X`` and ``\\u007X``
+        sequences could spell the tag, so they disable the fast path.
+
+        :param str s: The string object containing a JSON document
+
+        :returns: The deserialized Python object
+        """
+        if (self._untagged_decoder is not None and 'awesojsontype' not in s and
+                '\\u006' not in s and '\\u007' not in s):
+            obj = self._untagged_decoder.decode(s, *args, **kwargs)
+            return obj if self._selection is None else self._select(obj, self._selection, False)
+        return super(AwesoJSONDecoder, self).decode(s, *args, **kwargs)
+
+    def raw_decode(self, s, idx=0):
+        """
+        Decode a JSON document from `s`, starting at `idx`.
+
+        See ``json.JSONDecoder.raw_decode``. Documents with a type table are decoded
+        with a scanner dedicated to the document. Objects which only start like one, e.g.
+        ``{"awesojsontypes": 1}``, are decoded as plain JSON.
+
+        :returns: The deserialized Python object and the index in `s` where the document ended
+        :rtype: (object, int)
+        """
+        head = _COMPACT_HEAD.match(s, idx)
+        if head is not None:
+            try:
+                types, end = self._plain_decoder.raw_decode(s, head.end())
+            except json.JSONDecodeError:
+                types = None
+            doc = _COMPACT_DOC.match(s, end) if isinstance(types, list) else None
+            if doc is not None:
+                result = self._compact_decode(s, doc.end(), types)
+                if result is not None:
+                    return result
+
+        if self._selection is not None:
+            obj, end = self._plain_decoder.raw_decode(s, idx)
+            return self._select(obj, self._selection, True), end
+        return super(AwesoJSONDecoder, self).raw_decode(s, idx)
+
+    def _compact_decode(self, s, idx, types):
+        """
+        Decode the ``awesojsondoc`` value of a document with a type table, starting at `idx`.
+
+        :returns: The deserialized Python object and the index in `s` where the document ended,
+                  or ``None`` if the value isn't the last one of the document
+        """
+        context = copy.copy(self)
+        context.object_hook = self._compact_object_handler(types)
+        if context.object_pairs_hook is not None:
+            context.object_pairs_hook = context.object_pairs_handler
+        scan_once = json.scanner.make_scanner(context)
+        try:
+            obj, end = scan_once(s, idx)
+        except StopIteration:
+            return None
+
+        tail = _COMPACT_END.match(s, end)
+        if tail is None:
+            return None
+        if self._selection is not None:
+            obj = self._select(obj, self._selection, False)
+        return obj, tail.end()
+
+    def _select(self, obj, selection, decode):
+        """
+        Get the values of `obj` at the paths of the `selection` tree.
+
+        With `decode`, `obj` was decoded without hooks, and the hooks are applied
+        to the selected values only. Tagged objects are always selected whole.
+        """
+        if selection is None:
+            return self._apply_hooks(obj) if decode else obj
+        if isinstance(obj, dict):
+            if decode and ('awesojsontype' in obj or 'awesojsonbuffer' in obj):
+                return self._apply_hooks(obj)
+            selected = {}
+            for key, child in selection.items():
+                if key.__class__ is str and key in obj:
+                    value = obj[key]
+                    if child is None and value.__class__ in _SCALAR_TYPES:
+                        selected[key] = value
+                    else:
+                        selected[key] = self._select(value, child, decode)
+            return selected
+        if obj.__class__ is list:
+            child = selection.get(_ALL_ITEMS, False)
+            if child is not False:
+                return [self._select(item, child, decode) for item in obj]
+            indexes = sorted(index for index in selection if index.__class__ is int and index < len(obj))
+            return [self._select(obj[index], selection[index], decode) for index in indexes]
+        return obj
+
+    def _apply_hooks(self, obj):
+        """
+        Apply the object hook to the objects of `obj`, innermost first, like the scanner does.
+        """
+        if obj.__class__ is list:
+            return [self._apply_hooks(item) for item in obj]
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if value.__class__ is list or isinstance(value, dict):
+                    obj[key] = self._apply_hooks(value)
+            return self.object_hook(obj)
+        return obj
+
+    def _compact_object_handler(self, types):
+        """
+        Build the ``object_handler`` of a document with the type table `types`.
+        """
+        get_decoder = self.registry.get_decoder
+        decoders = [get_decoder(type_identifier) for type_identifier in types]
+        get_buffer = self._get_buffer if self._buffers is not None else None
+        decode_batch = self.decode_batch
+        decode_columns = self.decode_columns
+        lazy = self.lazy
+        references = {}
+
+        def object_handler(obj):
+            if 'awesojsontype' in obj:
+                tag = obj['awesojsontype']
+                if tag.__class__ is int and 0 <= tag < len(decoders):
+                    deserializer = decoders[tag]
+                    type_identifier = types[tag]
+                else:
+                    deserializer = get_decoder(tag)
+                    type_identifier = tag
+                if 'awesojsonbatch' in obj:
+                    obj = decode_batch(type_identifier, obj['awesojsonbatch'])
+                elif 'awesojsoncolumns' in obj:
+                    obj = decode_columns(type_identifier, obj['awesojsoncolumns'])
+                elif deserializer:
+                    collector = instrumentation._active
+                    if collector is not None:
+                        deserializer = collector.bind('decode', type_identifier, deserializer)
+                    decoded = LazyObject(deserializer, obj['data']) if lazy else deserializer(obj['data'])
+                    if 'awesojsonid' in obj:
+                        references[obj['awesojsonid']] = decoded
+                    obj = decoded
+                else:
+                    raise Exception("No decoder funtion registered for type {0} "
+                                    "(object: {1})".format(type_identifier, obj))
+            elif 'awesojsonref' in obj:
+                try:
+                    obj = references[obj['awesojsonref']]
+                except KeyError:
+                    raise Exception("Reference to an unknown object "
+                                    "(object: {0})".format(obj))
+            elif get_buffer is not None and 'awesojsonbuffer' in obj:
+                obj = get_buffer(obj)
+            return obj
+
+        return object_handler
 
     def object_handler(self, obj):
         """
@@ -62,6 +454,9 @@ class AwesoJSONDecoder(json.JSONDecoder):
         Uses the decoder function registered for the ``type`` textual type identifier
         in the ``awesojsontype`` key of `obj`.
 
+        Encoded ``Batch`` objects, with an ``awesojsonbatch`` or ``awesojsoncolumns``
+        key, are deserialized to a list with ``decode_batch`` or ``decode_columns``.
+
         If no ``awesojsontype`` key is found, the dictionnary will be returned
         as is.
 
@@ -75,12 +470,48 @@ class AwesoJSONDecoder(json.JSONDecoder):
         """
         if 'awesojsontype' in obj:
             type_identifier = obj['awesojsontype']
-            deserializer = self.get_decoder(type_identifier)
+            if 'awesojsonbatch' in obj:
+                return self.decode_batch(type_identifier, obj['awesojsonbatch'])
+            if 'awesojsoncolumns' in obj:
+                return self.decode_columns(type_identifier, obj['awesojsoncolumns'])
+            deserializer = self.registry.snapshot().decoders.get(type_identifier)
             if deserializer:
-                obj = deserializer(obj['data'])
+                collector = instrumentation._active
+                if collector is not None:
+                    deserializer = collector.bind('decode', type_identifier, deserializer)
+                obj = LazyObject(deserializer, obj['data']) if self.lazy else deserializer(obj['data'])
             else:
                 raise Exception("No decoder funtion registered for type {0} "
                                 "(object: {1})".format(type_identifier, obj))
 
         return obj
 
+    def object_pairs_handler(self, pairs):
+        """
+        Deserialize the object of the key/value `pairs`.
+
+        Tagged objects written as ``{"awesojsontype": <type>, "data": <data>}`` are
+        deserialized straight from their pairs, without building their dictionary.
+        Other objects are built with the `object_pairs_hook`, ``dict`` by default, and
+        handed to the ``object_hook``.
+
+        :param list pairs: The key/value pairs of the JSON object to deserialize
+
+        :raises Exception: No registered decoder function suits the defined
+                           `awesojsontype`
+
+        :returns: A deserialized JSON object
+        :rtype: object
+        """
+        if len(pairs) == 2:
+            (tag_key, type_identifier), (data_key, data) = pairs
+            if tag_key == 'awesojsontype' and data_key == 'data' and type_identifier.__class__ is str:
+                deserializer = self.registry.snapshot().decoders.get(type_identifier)
+                if deserializer:
+                    collector = instrumentation._active
+                    if collector is not None:
+                        deserializer = collector.bind('decode', type_identifier, deserializer)
+                    return LazyObject(deserializer, data) if self.lazy else deserializer(data)
+                raise Exception("No decoder funtion registered for type {0} "
+                                "(object: {1})".format(type_identifier, pairs))
+        return self.object_hook(self._pairs_hook(pairs))
@@ -10,9 +10,192 @@ This module implements the AwesoJSON encoder classes.
 :license: MIT, see LICENSE for more details.
 """
 
+import base64
+import collections
+import copy
 import json
+import pickle
+import threading
+import uuid
 
-from awesojson.utils import get_fqcn
+from awesojson import instrumentation
+from awesojson.lazy import LazyObject, decoded
+from awesojson.registry import default_registry
+
+_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+_CONTAINER_TYPES = frozenset([list, tuple, dict])
+_JSON_TYPES = _SCALAR_TYPES | _CONTAINER_TYPES
+
+
+class Batch(object):
+    """
+    A homogeneous sequence of objects of a single ``type``, encoded at once.
+
+    A ``Batch`` is written as a single tagged object holding the data of all its items::
+
+        {"awesojsontype": "decimal.Decimal", "awesojsonbatch": ["1.5", "2.25", ...]}
+
+    and is decoded back to a list. The batch encoder function registered for the ``type``
+    is called once with all the items, or the encoder function is called for each item.
+    """
+
+    def __init__(self, items, type_object=None):
+        """
+        :param items: The sequence of objects, all of ``type`` `type_object`
+        :param type type_object: The type of the items. Default is the type of the first item
+        """
+        self.items = items
+        self.type_object = type_object
+
+
+class RawBuffer(object):
+    """
+    A bytes-like payload, written base64 encoded or as an out-of-band buffer.
+
+    Encoder functions can return a ``RawBuffer`` in their data for large binary
+    payloads. It is written as a base64 ``str``, unless the encoder collects out-of-band
+    buffers (see ``AwesoJSONEncoder.with_buffers``), in which case the buffer is not
+    copied into the JSON document at all.
+    """
+
+    def __init__(self, buffer):
+        """
+        :param buffer: The object supporting the buffer protocol
+        """
+        self.buffer = buffer
+
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class _FragmentCache(object):
+    """
+    A LRU cache of the JSON text of objects, keyed by identity.
+
+    The cache keeps its objects alive, so that their id isn't reused by another object.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, obj, encode_fct):
+        key = id(obj)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        fragment = encode_fct(obj)
+        with self._lock:
+            self._entries[key] = (obj, fragment)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+
+class _Tagged(object):
+    """
+    An instance of a registered ``dict``, ``list`` or ``tuple`` subclass, which ``json``
+    would otherwise write as a plain container without calling ``default``.
+    """
+
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+
+_BUFFER_TYPES = frozenset([bytes, bytearray, memoryview, RawBuffer])
+
+
+class _ContainerSubclassFound(Exception):
+    pass
+
+
+def _may_hold_container_subclasses(o, limit):
+    """
+    Look for ``dict``, ``list`` or ``tuple`` subclass instances in the plain containers of `o`.
+
+    This is cheaper than a ``_ContainerScanner`` for the small payloads returned by the
+    encoder functions. Once more than `limit` values are looked at, ``None`` is returned.
+
+    :returns: Whether `o` holds a subclass instance, registered or not, or ``None``
+    """
+    cls = o.__class__
+    if cls is dict:
+        values = o.values()
+    elif cls is list or cls is tuple:
+        values = o
+    else:
+        return isinstance(o, (dict, list, tuple))
+    limit -= len(values)
+    if limit < 0:
+        return None
+    if set(map(type, values)) <= _SCALAR_TYPES:
+        return False
+    for value in values:
+        if value.__class__ not in _SCALAR_TYPES:
+            found = _may_hold_container_subclasses(value, limit)
+            if found is not False:
+                return found
+            limit -= len(value) if value.__class__ in _CONTAINER_TYPES else 0
+    return False
+
+
+class _NullWriter(object):
+
+    def write(self, data):
+        pass
+
+
+_NULL_WRITER = _NullWriter()
+_PAYLOAD_SCAN_LIMIT = 256
+_SKIPPED = (tuple, ())
+
+
+class _ContainerScanner(pickle.Pickler):
+    """
+    A pickler used to find the instances of registered container subclasses in a document.
+
+    Pickling walks the plain containers in C, and only calls ``reducer_override`` for the
+    other objects. These are pickled as an empty tuple, or as the list of their items for
+    unregistered container subclasses, and nothing is written. The memo of the pickler
+    stops the walk at circular references.
+    """
+
+    def __init__(self, resolve_encoder):
+        super(_ContainerScanner, self).__init__(_NULL_WRITER, pickle.HIGHEST_PROTOCOL)
+        self.resolve_encoder = resolve_encoder
+
+    def reducer_override(self, obj):
+        if isinstance(obj, type):
+            return NotImplemented
+        if isinstance(obj, (dict, list, tuple)):
+            if self.resolve_encoder(obj.__class__):
+                raise _ContainerSubclassFound()
+            return list, (list(obj.values()) if isinstance(obj, dict) else list(obj),)
+        return _SKIPPED
+
+
+def _byte_view(obj):
+    """
+    Get a flat ``memoryview`` of unsigned bytes over `obj`, copying only non-contiguous buffers.
+    """
+    view = memoryview(obj.buffer if obj.__class__ is RawBuffer else obj)
+    try:
+        return view.cast('B')
+    except TypeError:
+        return memoryview(view.tobytes())
 
 
 class AwesoJSONEncoder(json.JSONEncoder):
@@ -25,28 +208,99 @@ class AwesoJSONEncoder(json.JSONEncoder):
     of the received object's ``type``. This allow users to define the encoding
     functions wherever they want and use this adapter class to register them
     to be used when serializing object as JSON.
+
+    Objects whose ``type`` is not registered are serialized with the encoder
+    function of their closest registered base class, following the MRO.
+
+    Since ``json`` writes ``dict``, ``list`` and ``tuple`` subclasses (e.g. namedtuples)
+    as plain containers, once such a subclass is registered in the registry of the encoder,
+    each document is checked for its instances, and only rebuilt if it holds any.
+
+    With `compact_types` enabled, the textual type identifiers are written once per
+    document, in a type table, and each object is tagged with its index in the table::
+
+        {"awesojsontypes": ["datetime.datetime"],
+         "awesojsondoc": [{"awesojsontype": 0, "data": ...}, ...]}
+
+    Documents without any typed object are written as usual. The type table is kept
+    on a copy of the encoder made for each document.
+
+    With `share_references` enabled, each typed object is serialized once per document,
+    tagged with an ``awesojsonid``, and its later occurrences are written as
+    ``{"awesojsonref": <id>}``. This implies `compact_types`.
+
+    With `columnar` enabled, lists and tuples of at least two objects of the same
+    registered ``type`` are encoded as a ``Batch``, and a ``Batch`` whose items are all
+    encoded to dictionaries with the same keys is written as one array per key::
+
+        {"awesojsontype": "my.Record", "awesojsoncolumns": {"id": [1, 2], "name": ["a", "b"]}}
+
+    Detecting these lists takes a walk of the containers of the document, so only
+    whole lists are detected, not runs within mixed lists.
+
+    Types registered with a `cache_size` are immutable: the JSON text of their objects
+    is kept in a LRU cache on the encoder and spliced into the output as is. The cache
+    isn't used with `compact_types`, `indent` or out-of-band buffers.
+
+    The encoder functions are looked up in the ``Registry`` given to the encoder, or in
+    the ``registry`` of the class, the global registry by default.
+
+    An encoder returned by ``with_buffers`` writes ``bytes``, ``bytearray``,
+    ``memoryview`` and ``RawBuffer`` objects as ``{"awesojsonbuffer": <index>}``
+    placeholders, and collects the buffers separately.
+
+    While ``awesojson.enable_stats`` is in effect, the calls of the encoder functions
+    are timed and recorded per textual type identifier.
     """
 
-    _encoder_table = {}
+    registry = default_registry
 
     @classmethod
-    def register_encoder(cls, encoder_fct, type_object, type_identifier=None):
+    def register_encoder(cls, encoder_fct, type_object, type_identifier=None, cache_size=None):
         """
         Register `encoder_fct` as the encode function for `type_object` identified as `type_identifier`.
 
+        With a `cache_size`, the JSON text of the objects of exactly `type_object` is cached
+        by identity on each encoder. It must only be used for immutable types.
+
         :param encoder_fct: The encoder function to register
         :param type type_object: The type object to register
         :param str type_identifier: The textual type identifier. Default is the fully qualified class name
+        :param int cache_size: The maximum number of encoded objects to cache
+
+        :raises Exception: The `type_object` is not a ``type``, or the `cache_size` is not positive
+        """
+        cls.registry.register_encoder(encoder_fct, type_object, type_identifier, cache_size)
+
+    @classmethod
+    def register_batch_encoder(cls, batch_encoder_fct, type_object, type_identifier=None):
+        """
+        Register `batch_encoder_fct` as the batch encode function for `type_object` identified as `type_identifier`.
+
+        A batch encode function receives the items of a ``Batch`` and returns the list of
+        their data, in order.
+
+        :param batch_encoder_fct: The batch encoder function to register
+        :param type type_object: The type object to register
+        :param str type_identifier: The textual type identifier. Default is the fully qualified class name
 
         :raises Exception: The `type_object` is not a ``type``
         """
-        if not isinstance(type_object, type):
-            raise Exception("type_object is not a type")
+        cls.registry.register_batch_encoder(batch_encoder_fct, type_object, type_identifier)
+
+    @classmethod
+    def get_batch_encoder(cls, type_object):
+        """
+        Get the registered batch encoder function and textual type identifier for `type_object`.
+
+        Will return ``None`` if no batch function is registered for `type_object`.
 
-        if type_identifier is None:
-            type_identifier = get_fqcn(type_object)
+        :param type type_object: The type object
 
-        cls._encoder_table[type_object] = (encoder_fct, type_identifier)
+        :returns: Batch encoder function registered for `type_object` and the textual type identifier
+        :rtype: (fct, str)
+        """
+        return cls.registry.get_batch_encoder(type_object)
 
     @classmethod
     def get_encoder(cls, type_object):
@@ -60,16 +314,136 @@ class AwesoJSONEncoder(json.JSONEncoder):
         :returns: Encoder function registered for `type_identifier` and the textual type identifier
         :rtype: (fct, str)
         """
-        if not isinstance(type_object, type):
-            raise Exception("type_object is not a type")
+        return cls.registry.get_encoder(type_object)
+
+    @classmethod
+    def resolve_encoder(cls, type_object):
+        """
+        Get the encoder function and textual type identifier to use for `type_object`.
+
+        The MRO of `type_object` is walked to find the closest registered ``type``.
+        The result of the walk is cached per ``type`` until the next registration,
+        so that repeated lookups cost a single dictionary access.
+
+        Will return ``None`` if no function is registered for `type_object` or any
+        of its base classes.
+
+        :param type type_object: The type object
+
+        :returns: Encoder function to use for `type_object` and the textual type identifier
+        :rtype: (fct, str)
+        """
+        return cls.registry.resolve_encoder(type_object)
+
+    def __init__(self, compact_types=False, share_references=False, columnar=False, registry=None, **kwargs):
+        """
+        :param bool compact_types: Write the textual type identifiers in a per-document type table
+        :param bool share_references: Write repeated typed objects once, and references after
+        :param bool columnar: Write lists of same-typed records as columns
+        :param Registry registry: The registered encoder functions to use. Default is the class ``registry``
+        """
+        super(AwesoJSONEncoder, self).__init__(**kwargs)
+        if registry is not None:
+            self.registry = registry
+        self.compact_types = compact_types or share_references
+        self.share_references = share_references
+        self.columnar = columnar
+        self._type_table = None
+        self._references = None
+        self._buffers = None
+        self._fragments = None
+        self._payloads = None
+        self._fragment_caches = {}
+        self._fragment_marker = 'awesojsonfragment-{0}'.format(uuid.uuid4().hex)
+
+    def with_buffers(self, buffers):
+        """
+        Get a copy of this encoder that collects bytes-like objects as out-of-band buffers.
+
+        Each bytes-like object is appended to `buffers` as a flat ``memoryview`` and
+        written as an ``{"awesojsonbuffer": <index>}`` placeholder.
+
+        :param list buffers: The list that receives the buffers
+
+        :returns: The encoder collecting the buffers
+        :rtype: AwesoJSONEncoder
+        """
+        encoder = copy.copy(self)
+        encoder._buffers = buffers
+        return encoder
+
+    def iterencode(self, o, _one_shot=False):
+        """
+        Encode `o` and yield each string representation as available.
+
+        See ``json.JSONEncoder.iterencode``. With `compact_types`, the whole document
+        is encoded before the first string is yielded, since the type table comes first.
+        """
+        if self.columnar:
+            o = self._columnize(o)
+        snapshot = self.registry.snapshot()
+        if snapshot.container_subclasses:
+            if self._has_tagged_containers(o):
+                o = self._tag_containers(o)
+            if _one_shot and self._payloads is None:
+                # The payloads of the encoder functions are collected and scanned at once.
+                # The document is only encoded again, checking each payload, if they hold instances.
+                context = copy.copy(self)
+                payloads = context._payloads = []
+                chunks = list(context._iterencode(o, _one_shot, snapshot))
+                if not self._has_tagged_containers(payloads):
+                    return chunks
+        return self._iterencode(o, _one_shot, snapshot)
+
+    def _iterencode(self, o, _one_shot, snapshot):
+        if self.compact_types:
+            return self._iterencode_compact(o, _one_shot)
+        if snapshot.cache_sizes and self.indent is None and self._buffers is None:
+            return self._iterencode_fragments(o, _one_shot)
+        return super(AwesoJSONEncoder, self).iterencode(o, _one_shot)
+
+    def _iterencode_fragments(self, o, _one_shot):
+        # The fragments of the document are kept on a copy, so that the encoder can be shared.
+        # The objects are written as a marker string, replaced by their fragments in order.
+        context = copy.copy(self)
+        fragments = context._fragments = []
+        marker = '"{0}"'.format(self._fragment_marker)
+        position = 0
+        for chunk in super(AwesoJSONEncoder, context).iterencode(o, _one_shot):
+            if marker in chunk:
+                parts = chunk.split(marker)
+                count = len(parts) - 1
+                spliced = [None] * (2 * count + 1)
+                spliced[0::2] = parts
+                spliced[1::2] = fragments[position:position + count]
+                position += count
+                chunk = ''.join(spliced)
+            yield chunk
+
+    def _iterencode_compact(self, o, _one_shot):
+        # The type table and the references are kept on a copy, so that the encoder can be shared
+        context = copy.copy(self)
+        type_table = context._type_table = {}
+        if self.share_references:
+            context._references = {}
+        chunks = list(super(AwesoJSONEncoder, context).iterencode(o, _one_shot))
+        types = sorted(type_table, key=type_table.get)
 
-        return cls._encoder_table.get(type_object)
+        if types:
+            yield ('{"awesojsontypes"' + self.key_separator +
+                   json.dumps(types, ensure_ascii=self.ensure_ascii) +
+                   self.item_separator + '"awesojsondoc"' + self.key_separator)
+        for chunk in chunks:
+            yield chunk
+        if types:
+            yield '}'
 
     def default(self, obj):
         """
         Serialize `obj` according to it's ``type``.
 
-        Uses the encoder function registered for the ``type`` of `obj`.
+        Uses the encoder function registered for the ``type`` of `obj`, or for its
+        closest registered base class.
 
         :param object obj: Object to serialize
 
@@ -78,12 +452,212 @@ class AwesoJSONEncoder(json.JSONEncoder):
         :returns: A JSON serializable object, with the AwesoJSON type metadata
         :rtype: dict
         """
+        cls = obj.__class__
+        if cls is _Tagged:
+            obj = obj.obj
+        elif cls is LazyObject:
+            obj = decoded(obj)
+            cls = obj.__class__
+            if cls in _JSON_TYPES:
+                return obj
+        if cls is Batch:
+            return self._encode_batch(obj)
+        if cls in _BUFFER_TYPES and (self._buffers is not None or cls is RawBuffer):
+            return self._encode_buffer(obj)
+
+        references = self._references
+        if references is not None and id(obj) in references:
+            return {'awesojsonref': references[id(obj)][0]}
+
         type_object = type(obj)
-        registration = self.get_encoder(type_object)
+        snapshot = self.registry.snapshot()
+        registration = snapshot.resolve_encoder(type_object)
         serializer, type_identifier = registration or (None, None)
         if serializer:
-            return {'awesojsontype': type_identifier, 'data': serializer(obj)}
+            fragments = self._fragments
+            if fragments is not None and type_object in snapshot.cache_sizes:
+                cache = self._get_fragment_cache(snapshot.cache_sizes[type_object], registration)
+                fragments.append(cache.get(obj, self._encode_fragment))
+                return self._fragment_marker
+            collector = instrumentation._active
+            if collector is not None:
+                serializer = collector.bind('encode', type_identifier, serializer)
+            type_table = self._type_table
+            if type_table is not None:
+                type_identifier = type_table.setdefault(type_identifier, len(type_table))
+            data = serializer(obj)
+            if snapshot.container_subclasses:
+                payloads = self._payloads
+                if payloads is not None:
+                    payloads.append(data)
+                elif (_may_hold_container_subclasses(data, _PAYLOAD_SCAN_LIMIT) is not False and
+                      self._has_tagged_containers(data)):
+                    data = self._tag_containers(data)
+            if references is not None:
+                # Keep obj alive so that its id isn't reused within the document
+                reference_id = len(references)
+                references[id(obj)] = (reference_id, obj)
+                return {'awesojsontype': type_identifier, 'awesojsonid': reference_id,
+                        'data': data}
+            return {'awesojsontype': type_identifier, 'data': data}
         else:
             raise Exception("No encoder funtion registered for type {0} "
                             "(object: {1})".format(type_identifier, obj))
 
+    def _encode_batch(self, batch):
+        """
+        Serialize the items of `batch` as a single tagged object.
+
+        :raises Exception: The items are not all of the same ``type``, or no registered
+                           encoder function suits their ``type``
+        """
+        items = batch.items
+        type_object = batch.type_object
+        if type_object is None:
+            if not len(items):
+                return []
+            type_object = type(next(iter(items)))
+
+        types = set(map(type, items))
+        if types and types != set([type_object]):
+            raise Exception("Batch items are not all of type {0} "
+                            "(types: {1})".format(type_object, types))
+
+        registry = self.registry
+        registration = registry.get_batch_encoder(type_object)
+        if registration:
+            batch_serializer, type_identifier = registration
+            data = list(batch_serializer(items))
+        else:
+            serializer, type_identifier = registry.resolve_encoder(type_object) or (None, None)
+            if not serializer:
+                raise Exception("No encoder funtion registered for type {0} "
+                                "(object: {1})".format(type_object, batch))
+            data = [serializer(item) for item in items]
+
+        type_table = self._type_table
+        if type_table is not None:
+            type_identifier = type_table.setdefault(type_identifier, len(type_table))
+        if self.columnar and data and data[0].__class__ is dict and data[0]:
+            keys = data[0].keys()
+            if all(row.__class__ is dict and row.keys() == keys for row in data):
+                columns = dict((key, [row[key] for row in data]) for key in keys)
+                return {'awesojsontype': type_identifier, 'awesojsoncolumns': columns}
+        return {'awesojsontype': type_identifier, 'awesojsonbatch': data}
+
+    def _columnize(self, o):
+        """
+        Replace the lists of `o` holding objects of a single registered ``type`` by a ``Batch``.
+
+        Containers are only copied when one of their descendants is replaced.
+        """
+        cls = o.__class__
+        if cls is dict:
+            values = dict((key, self._columnize(value)) for key, value in o.items())
+            if any(values[key] is not value for key, value in o.items()):
+                return values
+            return o
+        if cls is list or cls is tuple:
+            types = set(map(type, o))
+            if types <= _SCALAR_TYPES:
+                return o
+            if len(types) == 1 and len(o) > 1:
+                type_object = next(iter(types))
+                if (type_object not in _CONTAINER_TYPES and
+                        (self.registry.get_batch_encoder(type_object) or
+                         self.registry.resolve_encoder(type_object))):
+                    return Batch(o, type_object)
+            items = [self._columnize(item) for item in o]
+            if any(item is not original for item, original in zip(items, o)):
+                return items
+            return o
+        return o
+
+    def _has_tagged_containers(self, o):
+        """
+        Check whether `o` holds an instance of a registered ``dict``, ``list`` or ``tuple`` subclass.
+        """
+        try:
+            _ContainerScanner(self.registry.resolve_encoder).dump(o)
+        except _ContainerSubclassFound:
+            return True
+        except Exception:  # E.g. too deep documents, left to the walk and the encoder to report
+            return True
+        return False
+
+    def _tag_containers(self, o, markers=None):
+        """
+        Wrap the instances of registered ``dict``, ``list`` and ``tuple`` subclasses of `o`.
+
+        Containers are only copied when one of their descendants is replaced.
+
+        :raises ValueError: `o` holds a circular reference, with `check_circular`
+        """
+        cls = o.__class__
+        if cls not in _CONTAINER_TYPES:
+            if not isinstance(o, (dict, list, tuple)):
+                return o
+            if self.registry.resolve_encoder(cls):
+                return _Tagged(o)
+        if markers is None:
+            markers = {} if self.check_circular else None
+        if markers is not None:
+            marker_id = id(o)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = o
+        if isinstance(o, dict):
+            values = dict((key, self._tag_containers(value, markers)) for key, value in o.items())
+            changed = any(values[key] is not value for key, value in o.items())
+        else:
+            values = [self._tag_containers(item, markers) for item in o]
+            changed = any(item is not original for item, original in zip(values, o))
+        if markers is not None:
+            del markers[marker_id]
+        return values if changed else o
+
+    def get_fragment_cache_info(self, type_object):
+        """
+        Get the statistics of the cache of the JSON text of the `type_object` objects.
+
+        Will return ``None`` if the encoder has no cache for `type_object`.
+
+        :param type type_object: The type object
+
+        :returns: The hits, misses, maximum size and current size of the cache
+        :rtype: CacheInfo
+        """
+        cache = self._fragment_caches.get(self.registry.resolve_encoder(type_object))
+        return cache.cache_info() if cache is not None else None
+
+    def _get_fragment_cache(self, cache_size, registration):
+        """
+        Get the cache, of `cache_size` objects, of the JSON text of the objects encoded with `registration`.
+
+        A new registration of the same ``type`` gets its own cache.
+        """
+        try:
+            return self._fragment_caches[registration]
+        except KeyError:
+            pass
+        cache = _FragmentCache(cache_size)
+        return self._fragment_caches.setdefault(registration, cache)
+
+    def _encode_fragment(self, obj):
+        """
+        Encode `obj` to the JSON text spliced in the documents.
+        """
+        context = copy.copy(self)
+        context._fragments = None  # The nested objects are written as is
+        context._payloads = None  # The cached text must not depend on a later scan
+        return ''.join(super(AwesoJSONEncoder, context).iterencode(context.default(obj), True))
+
+    def _encode_buffer(self, obj):
+        """
+        Serialize the bytes-like `obj` as an out-of-band buffer placeholder, or base64.
+        """
+        buffers = self._buffers
+        if buffers is None:
+            return base64.b64encode(_byte_view(obj)).decode('ascii')
+        buffers.append(_byte_view(obj))
+        return {'awesojsonbuffer': len(buffers) - 1}
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.instrumentation
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements the per-type statistics of the AwesoJSON encoder and decoder functions.
+
+While the statistics are enabled, each call of a registered encoder or decoder function
+is timed, and the size of the data it returned or received is measured. When they are
+disabled, the encoder and decoder only check a module attribute per object.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import collections
+import functools
+import json
+import math
+import threading
+from time import perf_counter
+
+SAMPLE_SIZE = 1024
+
+TypeStats = collections.namedtuple('TypeStats', ['calls', 'total_time', 'p50_time', 'p90_time', 'p99_time',
+                                                 'total_size', 'max_size'])
+
+
+def _skip(obj):
+    return None
+
+
+def _payload_size(data):
+    """
+    Get the length of the compact JSON text of `data`, nested typed objects excluded.
+    """
+    return len(json.dumps(data, separators=(',', ':'), ensure_ascii=False, skipkeys=True, default=_skip))
+
+
+def _percentile(samples, fraction):
+    return samples[max(0, int(math.ceil(fraction * len(samples))) - 1)]
+
+
+class _TypeCounters(object):
+
+    __slots__ = ('calls', 'total_time', 'samples', 'total_size', 'max_size')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.samples = collections.deque(maxlen=SAMPLE_SIZE)
+        self.total_size = 0
+        self.max_size = 0
+
+
+class _Collector(object):
+    """
+    The counters of each operation and type identifier, updated under a lock.
+    """
+
+    def __init__(self):
+        self.hook = None
+        self.sizes = True
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def bind(self, operation, type_identifier, fct):
+        """
+        Get `fct` wrapped to record its calls for `operation` of `type_identifier`.
+        """
+        return functools.partial(self.call, operation, type_identifier, fct)
+
+    def call(self, operation, type_identifier, fct, data):
+        start = perf_counter()
+        result = fct(data)
+        elapsed = perf_counter() - start
+        size = None
+        if self.sizes:
+            size = _payload_size(result if operation == 'encode' else data)
+        self.record(operation, type_identifier, elapsed, size)
+        return result
+
+    def record(self, operation, type_identifier, elapsed, size):
+        with self._lock:
+            counters = self._counters.get((operation, type_identifier))
+            if counters is None:
+                counters = self._counters[(operation, type_identifier)] = _TypeCounters()
+            counters.calls += 1
+            counters.total_time += elapsed
+            counters.samples.append(elapsed)
+            if size is not None:
+                counters.total_size += size
+                counters.max_size = max(counters.max_size, size)
+        hook = self.hook
+        if hook is not None:
+            hook(operation, type_identifier, elapsed, size)
+
+    def stats(self):
+        result = {'encode': {}, 'decode': {}}
+        with self._lock:
+            for (operation, type_identifier), counters in self._counters.items():
+                samples = sorted(counters.samples)
+                result[operation][type_identifier] = TypeStats(
+                    counters.calls, counters.total_time,
+                    _percentile(samples, 0.5), _percentile(samples, 0.9), _percentile(samples, 0.99),
+                    counters.total_size, counters.max_size)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+_collector = _Collector()
+_active = None  # The collector while the statistics are enabled
+
+
+def enable_stats(hook=None, sizes=True):
+    """
+    Start recording the calls of the registered encoder and decoder functions.
+
+    The `hook` is called after each call with the operation (``'encode'`` or ``'decode'``),
+    the textual type identifier, the time spent in seconds and the payload size, e.g. to
+    forward them to a metrics system. The payload size is the length of the compact JSON
+    text of the data of the object, nested typed objects excluded, or ``None`` without `sizes`.
+
+    Batch encoder and decoder functions aren't recorded.
+
+    :param hook: The function called with each recorded call
+    :param bool sizes: Measure the payload sizes, which costs about as much as encoding the data
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.enable_stats(hook=lambda operation, type_identifier, seconds, size: ...)
+    """
+    global _active
+    _collector.hook = hook
+    _collector.sizes = sizes
+    _active = _collector
+
+
+def disable_stats():
+    """
+    Stop recording the calls of the registered encoder and decoder functions.
+
+    The statistics recorded so far are kept until ``reset_stats``.
+    """
+    global _active
+    _active = None
+    _collector.hook = None
+
+
+def stats():
+    """
+    Get the statistics of the recorded calls, by operation and textual type identifier.
+
+    The percentiles are computed over the last ``SAMPLE_SIZE`` calls of each type.
+
+    :returns: The ``TypeStats`` of each type identifier, in an ``'encode'`` and a ``'decode'`` dict
+    :rtype: dict
+
+    Usage::
+        >>> import awesojson
+        >>> awesojson.stats()['decode']['my.Currency']
+        TypeStats(calls=1000, total_time=0.0021, p50_time=1.9e-06, ..., total_size=12000, max_size=12)
+    """
+    return _collector.stats()
+
+
+def reset_stats():
+    """
+    Discard the statistics of the recorded calls.
+    """
+    _collector.reset()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.lazy
+~~~~~~~~~~~~~~
+
+This module implements the lazy decoding proxies of AwesoJSON tagged objects.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import copy
+
+_PENDING = object()
+
+
+def _loaded(value):
+    """
+    Unpickle a ``LazyObject`` as its decoded object.
+    """
+    return value
+
+
+class LazyObject(object):
+    """
+    A proxy of a tagged object, which runs its decoder function on first use.
+
+    Attribute access, calls, comparisons, hashing and the container protocol are
+    forwarded to the decoded object. The proxy isn't an instance of the class of the
+    decoded object: use ``decoded`` to get the object itself. Pickling and copying the
+    proxy give copies of the decoded object.
+    """
+
+    __slots__ = ('_decoder_fct', '_data', '_value')
+
+    def __init__(self, decoder_fct, data):
+        """
+        :param decoder_fct: The decoder function of the object
+        :param data: The data of the object
+        """
+        object.__setattr__(self, '_decoder_fct', decoder_fct)
+        object.__setattr__(self, '_data', data)
+        object.__setattr__(self, '_value', _PENDING)
+
+    def __getattr__(self, name):
+        return getattr(decoded(self), name)
+
+    def __setattr__(self, name, value):
+        setattr(decoded(self), name, value)
+
+    def __delattr__(self, name):
+        delattr(decoded(self), name)
+
+    def __repr__(self):
+        value = object.__getattribute__(self, '_value')
+        if value is _PENDING:
+            return '<LazyObject pending>'
+        return repr(value)
+
+    def __str__(self):
+        return str(decoded(self))
+
+    def __bool__(self):
+        return bool(decoded(self))
+
+    def __hash__(self):
+        return hash(decoded(self))
+
+    def __eq__(self, other):
+        return decoded(self) == decoded(other)
+
+    def __ne__(self, other):
+        return decoded(self) != decoded(other)
+
+    def __lt__(self, other):
+        return decoded(self) < decoded(other)
+
+    def __le__(self, other):
+        return decoded(self) <= decoded(other)
+
+    def __gt__(self, other):
+        return decoded(self) > decoded(other)
+
+    def __ge__(self, other):
+        return decoded(self) >= decoded(other)
+
+    def __call__(self, *args, **kwargs):
+        return decoded(self)(*args, **kwargs)
+
+    def __len__(self):
+        return len(decoded(self))
+
+    def __iter__(self):
+        return iter(decoded(self))
+
+    def __contains__(self, item):
+        return item in decoded(self)
+
+    def __getitem__(self, key):
+        return decoded(self)[key]
+
+    def __setitem__(self, key, value):
+        decoded(self)[key] = value
+
+    def __delitem__(self, key):
+        del decoded(self)[key]
+
+    def __reduce__(self):
+        return _loaded, (decoded(self),)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(decoded(self), memo)
+
+
+def decoded(obj):
+    """
+    Get the decoded object of a ``LazyObject``, running its decoder function if needed.
+
+    As when decoding eagerly, the decoder function receives data without any
+    ``LazyObject``. Other objects are returned as is.
+
+    :param obj: The ``LazyObject``, or any object
+
+    :raises Exception: The decoder function raised an exception
+
+    :returns: The decoded object
+    """
+    if obj.__class__ is not LazyObject:
+        return obj
+    value = object.__getattribute__(obj, '_value')
+    if value is _PENDING:
+        decoder_fct = object.__getattribute__(obj, '_decoder_fct')
+        value = decoder_fct(resolve(object.__getattribute__(obj, '_data')))
+        object.__setattr__(obj, '_value', value)
+        object.__setattr__(obj, '_decoder_fct', None)
+        object.__setattr__(obj, '_data', None)
+    return value
+
+
+def resolve(obj):
+    """
+    Decode all the ``LazyObject`` of a deserialized JSON document.
+
+    The proxies found in the dictionaries and lists of `obj` are replaced in place by
+    their decoded object.
+
+    :param obj: The deserialized JSON document
+
+    :raises Exception: A decoder function raised an exception
+
+    :returns: The document, or the decoded object if `obj` is a ``LazyObject``
+
+    Usage::
+        >>> import awesojson
+        >>> document = awesojson.resolve(awesojson.loads(json_string, lazy=True))
+    """
+    obj = decoded(obj)
+    cls = obj.__class__
+    if cls is dict:
+        for key, value in obj.items():
+            if value.__class__ in (LazyObject, dict, list):
+                obj[key] = resolve(value)
+    elif cls is list:
+        for index, value in enumerate(obj):
+            if value.__class__ in (LazyObject, dict, list):
+                obj[index] = resolve(value)
+    return obj
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.ndarray
+~~~~~~~~~~~~~~~~~
+
+This module implements the built-in AwesoJSON codec for NumPy arrays.
+
+The codec is registered when the package is imported after NumPy. Otherwise, it's
+registered with ``register``, so importing the package doesn't import NumPy.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import base64
+import functools
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+from .decoder import AwesoJSONDecoder
+from .encoder import AwesoJSONEncoder, RawBuffer
+from .utils import get_fqcn
+
+
+def encode_ndarray(array, raw=True):
+    """
+    Serialize a NumPy array to a JSON serializable dictionary.
+
+    In `raw` mode, the contiguous buffer of the array is written base64 encoded (or as
+    an out-of-band buffer, see ``dumps_oob``), along with its dtype, shape and memory
+    order. Otherwise, or when the dtype holds Python objects or fields, the array is
+    written as nested lists.
+
+    :param numpy.ndarray array: The array to serialize
+    :param bool raw: Write the raw buffer of the array
+
+    :returns: The JSON serializable representation of `array`
+    :rtype: dict
+    """
+    dtype = array.dtype
+    if not raw or dtype.hasobject or dtype.fields is not None:
+        # The fields (and padding) of structured dtypes are only kept by their description
+        return {'dtype': dtype.str if dtype.fields is None else numpy.lib.format.dtype_to_descr(dtype),
+                'shape': list(array.shape), 'data': array.tolist()}
+
+    if array.flags.c_contiguous:
+        order, contiguous = 'C', array
+    elif array.flags.f_contiguous:
+        order, contiguous = 'F', array.T
+    else:
+        order, contiguous = 'C', numpy.ascontiguousarray(array)
+    return {
+        'dtype': dtype.str,
+        'shape': list(array.shape),
+        'order': order,
+        'buffer': RawBuffer(contiguous),
+    }
+
+
+def _dtype_descr(descr):
+    """
+    Get the description of a structured dtype, see ``numpy.lib.format.descr_to_dtype``,
+    from its JSON representation.
+    """
+    fields = []
+    for field in descr:
+        name, dtype = field[0], field[1]
+        if isinstance(name, list):
+            name = tuple(name)  # (title, name)
+        if isinstance(dtype, list):
+            dtype = _dtype_descr(dtype)
+        fields.append((name, dtype) + tuple(tuple(shape) for shape in field[2:]))
+    return fields
+
+
+def _records(data, dtype, depth):
+    """
+    Rebuild the records of a structured dtype, nested `depth` lists deep in `data`, as tuples.
+    """
+    if depth:
+        return [_records(item, dtype, depth - 1) for item in data]
+    if dtype.fields is None:
+        return data
+    values = []
+    for name, value in zip(dtype.names, data):
+        field_dtype = dtype.fields[name][0]
+        base, shape = field_dtype.subdtype or (field_dtype, ())
+        values.append(_records(value, base, len(shape)))
+    return tuple(values)
+
+
+def decode_ndarray(data):
+    """
+    Deserialize a NumPy array from its ``encode_ndarray`` representation.
+
+    Raw buffers are decoded with ``numpy.frombuffer``, without creating a Python
+    object per element. Out-of-band buffers are used without copy, so the array is
+    read-only if the buffer is. The records of structured arrays are rebuilt as tuples.
+
+    :param dict data: The representation of the array
+
+    :returns: The deserialized array
+    :rtype: numpy.ndarray
+    """
+    dtype = data['dtype']
+    if isinstance(dtype, list):
+        dtype = numpy.lib.format.descr_to_dtype(_dtype_descr(dtype))
+        records = _records(data['data'], dtype, len(data['shape']))
+        return numpy.array(records, dtype=dtype).reshape(data['shape'])
+    dtype = numpy.dtype(dtype)
+    if 'buffer' not in data:
+        return numpy.array(data['data'], dtype=dtype).reshape(data['shape'])
+
+    buffer = data['buffer']
+    if isinstance(buffer, str):
+        buffer = bytearray(base64.b64decode(buffer))
+    if not len(buffer):
+        return numpy.empty(data['shape'], dtype=dtype, order=data['order'])
+    return numpy.frombuffer(buffer, dtype=dtype).reshape(data['shape'], order=data['order'])
+
+
+def register(raw=True):
+    """
+    Register the NumPy array codec to ``AwesoJSONEncoder`` and ``AwesoJSONDecoder``.
+
+    :param bool raw: Write the raw buffer of the arrays instead of nested lists
+
+    :raises Exception: NumPy can't be imported
+
+    Usage::
+        >>> import awesojson.ndarray
+        >>> awesojson.ndarray.register(raw=False)
+    """
+    if numpy is None:
+        raise Exception("NumPy can't be imported")
+
+    AwesoJSONEncoder.register_encoder(functools.partial(encode_ndarray, raw=raw), numpy.ndarray)
+    AwesoJSONDecoder.register_decoder(decode_ndarray, get_fqcn(numpy.ndarray))
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.parallel
+~~~~~~~~~~~~~~~~~~
+
+This module implements the process pool helpers of the AwesoJSON lib.
+
+The registered encoder and decoder functions are sent to the worker processes
+when the pool starts, so they must be picklable (module-level functions or classes,
+or the functions generated by :mod:`awesojson.classes`).
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import collections
+import itertools
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from .codec import Codec, _BufferedWriter, DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, DEFAULT_PARALLEL_THRESHOLD
+from .encoder import AwesoJSONEncoder
+from .utils import BYTES_TYPES, decode_bytes
+
+_TASKS_PER_WORKER = 4
+_MAX_ANCHOR_SIZE = 64
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_worker_codec = None
+
+
+def _init_worker(registry, encoder_kwargs, decoder_kwargs):
+    """
+    Build the codec of a worker process, with the parent process registrations.
+    """
+    global _worker_codec
+    _worker_codec = Codec(encoder_kwargs=encoder_kwargs, decoder_kwargs=decoder_kwargs, registry=registry)
+
+
+def _dump_lines_batch(batch):
+    dumps = _worker_codec.dumps
+    return ''.join([dumps(obj) + '\n' for obj in batch])
+
+
+def _load_lines_batch(text):
+    if isinstance(text, BYTES_TYPES):
+        text = decode_bytes(text)
+    loads = _worker_codec.loads
+    return [loads(line) for line in text.split('\n') if line.strip()]
+
+
+def _loads_array_chunk(text):
+    return _worker_codec.loads('[' + text + ']')
+
+
+def pool(workers, encoder_kwargs=None, decoder_kwargs=None, registry=None):
+    """
+    Create a process pool whose workers use the current registrations.
+
+    :param int workers: The number of worker processes
+    :param dict encoder_kwargs: Keyword arguments for the workers' encoder, see ``json.JSONEncoder``
+    :param dict decoder_kwargs: Keyword arguments for the workers' decoder, see ``json.JSONDecoder``
+    :param Registry registry: The registered functions to send to the workers. Default is the
+                              `registry` of the keyword arguments, or the global registry
+
+    :returns: The process pool
+    :rtype: concurrent.futures.ProcessPoolExecutor
+    """
+    if registry is None:
+        registry = (dict(decoder_kwargs or {}, **(encoder_kwargs or {})).get('registry') or
+                    AwesoJSONEncoder.registry)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(registry, encoder_kwargs, decoder_kwargs),
+    )
+
+
+def imap_ordered(executor, fct, iterable, window):
+    """
+    Apply `fct` to the items of `iterable` in `executor`, yielding results in order.
+
+    At most `window` items are in flight at once, so `iterable` is consumed lazily.
+    """
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(executor.submit(fct, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _batches(iterable, batch_size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def dump_lines(iterable, filehandle, workers, batch_size=DEFAULT_BATCH_SIZE, encoder_kwargs=None, registry=None):
+    """
+    Serialize the objects of `iterable` as JSON Lines to `filehandle`, encoding batches in a process pool.
+
+    :param iterable: The iterable of Python objects
+    :param file filehandle: The file-like object (supporting ``.write()``) that receives the lines
+    :param int workers: The number of worker processes
+    :param int batch_size: The number of objects encoded per task
+    :param dict encoder_kwargs: Keyword arguments for the workers' encoder, see ``json.JSONEncoder``
+    :param Registry registry: The registered encoder functions to use, see ``pool``
+
+    :raises Exception: `encoder_kwargs` defines an `indent`
+    """
+    if encoder_kwargs and encoder_kwargs.get('indent') is not None:
+        raise Exception("JSON Lines can't be written with an indent")
+
+    writer = _BufferedWriter(filehandle, DEFAULT_CHUNK_SIZE)
+    with pool(workers, encoder_kwargs=encoder_kwargs, registry=registry) as executor:
+        for text in imap_ordered(executor, _dump_lines_batch,
+                                 _batches(iterable, batch_size), workers * 2):
+            writer.write(text)
+    writer.flush()
+
+
+def load_lines(filehandle, workers, batch_size=DEFAULT_BATCH_SIZE, decoder_kwargs=None, registry=None):
+    """
+    Deserialize the JSON Lines of `filehandle`, decoding batches in a process pool.
+
+    The lines of a binary file are decoded from bytes in the worker processes.
+
+    :param file filehandle: The file-like object (iterable over ``str`` or bytes lines) containing the JSON Lines
+    :param int workers: The number of worker processes
+    :param int batch_size: The number of lines decoded per task
+    :param dict decoder_kwargs: Keyword arguments for the workers' decoder, see ``json.JSONDecoder``
+    :param Registry registry: The registered decoder functions to use, see ``pool``
+
+    :returns: An iterator over the deserialized Python objects, in order
+    """
+    texts = ((b'' if isinstance(lines[0], BYTES_TYPES) else '').join(lines)
+             for lines in _batches(filehandle, batch_size))
+    with pool(workers, decoder_kwargs=decoder_kwargs, registry=registry) as executor:
+        for objs in imap_ordered(executor, _load_lines_batch, texts, workers * 2):
+            for obj in objs:
+                yield obj
+
+
+def _array_bounds(strvalue):
+    """
+    Get the positions of the first and second top-level elements of a JSON array.
+
+    Returns ``None`` if `strvalue` is not an array of at least two elements.
+
+    :returns: The start of the first element, the position of the first top-level
+              comma and the start of the second element
+    :rtype: (int, int, int)
+    """
+    first = _WHITESPACE.match(strvalue).end()
+    if strvalue[first:first + 1] != '[':
+        return None
+    first = _WHITESPACE.match(strvalue, first + 1).end()
+    try:
+        end = json.JSONDecoder().raw_decode(strvalue, first)[1]
+    except ValueError:
+        return None
+    comma = _WHITESPACE.match(strvalue, end).end()
+    if strvalue[comma:comma + 1] != ',':
+        return None
+    second = _WHITESPACE.match(strvalue, comma + 1).end()
+    return first, comma, second
+
+
+def _split_array(strvalue, parts):
+    """
+    Split the elements of the JSON array `strvalue` in about `parts` chunks of text.
+
+    Split points are *guessed*: the text around the first top-level comma (the end of
+    the first element, the separator and the prefix shared by the first two elements)
+    is used as an anchor and searched for near evenly spaced positions. Guesses are
+    checked when decoding, see ``loads``.
+
+    Returns ``None`` if `strvalue` is not an array of at least two elements.
+
+    :returns: The start position of each chunk and the list of chunks
+    :rtype: ([int], [str])
+    """
+    bounds = _array_bounds(strvalue)
+    if bounds is None:
+        return None
+    first, comma, second = bounds
+
+    end = strvalue.rindex(']')
+    if _WHITESPACE.match(strvalue, end + 1).end() != len(strvalue):
+        return None
+
+    prefix_size = 0
+    while (prefix_size < _MAX_ANCHOR_SIZE and second + prefix_size < end and
+           strvalue[first + prefix_size] == strvalue[second + prefix_size]):
+        prefix_size += 1
+    # The last character of a container or string element is part of the anchor too
+    anchor_start = comma - 1 if strvalue[comma - 1] in '}]"' else comma
+    anchor = strvalue[anchor_start:second + prefix_size]
+    comma_offset = comma - anchor_start
+
+    chunk_size = max((end - first) // parts, 1)
+    starts = [first]
+    commas = []
+    target = first + chunk_size
+    while target < end:
+        found = strvalue.find(anchor, target, end)
+        if found == -1:
+            break
+        commas.append(found + comma_offset)
+        starts.append(found + comma_offset + 1)
+        target = found + chunk_size
+    commas.append(end)
+    return starts, [strvalue[start:stop] for start, stop in zip(starts, commas)]
+
+
+def loads(strvalue, workers=None, threshold=DEFAULT_PARALLEL_THRESHOLD, decoder_kwargs=None, registry=None):
+    """
+    Deserialize a ``str`` or bytes-like object containing a large JSON array, decoding chunks of it in a process pool.
+
+    Chunks start and end at guessed top-level element boundaries. A chunk is decoded
+    from a known boundary, so it only decodes successfully if it also ends on a true
+    boundary; the first chunk that fails to decode as JSON, and everything after it,
+    is decoded again in the current process.
+
+    Documents smaller than `threshold` characters, or which aren't arrays, are decoded
+    in the current process.
+
+    :param (str|bytes|bytearray|memoryview) strvalue: The string object containing a JSON document
+    :param int workers: The number of worker processes. Default is the number of CPUs
+    :param int threshold: The minimum size of documents decoded in parallel
+    :param dict decoder_kwargs: Keyword arguments for the decoder, see ``json.JSONDecoder``
+    :param Registry registry: The registered decoder functions to use, see ``pool``
+
+    :raises Exception: The JSON document contains an object with no registered
+                       decoder function which suits the *defined* `awesojsontype` for that object
+
+    :returns: The deserialized Python object
+    """
+    if isinstance(strvalue, BYTES_TYPES):
+        strvalue = decode_bytes(strvalue)
+    workers = workers or os.cpu_count() or 1
+    codec = Codec(decoder_kwargs=decoder_kwargs, registry=registry)
+    split = None
+    if workers > 1 and len(strvalue) >= threshold:
+        split = _split_array(strvalue, workers * _TASKS_PER_WORKER)
+    if split is None:
+        return codec.loads(strvalue)
+
+    starts, chunks = split
+    result = []
+    with pool(workers, decoder_kwargs=decoder_kwargs, registry=registry) as executor:
+        futures = [executor.submit(_loads_array_chunk, chunk) for chunk in chunks]
+        for start, future in zip(starts, futures):
+            try:
+                result.extend(future.result())
+            except ValueError:
+                for pending in futures:
+                    pending.cancel()
+                result.extend(codec.loads('[' + strvalue[start:]))
+                break
+    return result
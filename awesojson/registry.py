@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+
+"""
+awesojson.registry
+~~~~~~~~~~~~~~~~~~
+
+This module implements the registries of the AwesoJSON encoder and decoder functions.
+
+:copyright: (c) 2016 by Vincent Philippon.
+:license: MIT, see LICENSE for more details.
+"""
+
+import functools
+import threading
+
+from .utils import get_fqcn
+
+_CONTAINER_TYPES = (dict, list, tuple)
+
+
+def _call_with_kwargs(decoder_fct, data):
+    return decoder_fct(**data)
+
+
+def _call_with_pairs(decoder_fct, data):
+    return decoder_fct(data.items())
+
+
+_DECODER_CALLS = {'kwargs': _call_with_kwargs, 'pairs': _call_with_pairs}
+
+
+def _freeze(data):
+    """
+    Get the canonical, hashable key of a decoded JSON value.
+    """
+    cls = data.__class__
+    if cls is dict:
+        return dict, tuple(sorted((key, _freeze(value)) for key, value in data.items()))
+    if cls is list:
+        return list, tuple(_freeze(value) for value in data)
+    return cls, data
+
+
+def _thaw(key):
+    """
+    Get the decoded JSON value of a key built by ``_freeze``, or of a ``str``.
+    """
+    if key.__class__ is str:
+        return key
+    cls, value = key
+    if cls is dict:
+        return dict((item_key, _thaw(item_value)) for item_key, item_value in value)
+    if cls is list:
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _cached_decoder(decoder_fct, cache_size):
+    """
+    Wrap `decoder_fct` with a LRU cache of the decoded objects keyed on their data.
+    """
+    decode_key = functools.lru_cache(maxsize=cache_size)(lambda key: decoder_fct(_thaw(key)))
+
+    def decoder(data):
+        if data.__class__ is str:
+            return decode_key(data)
+        key = _freeze(data)
+        try:
+            hash(key)
+        except TypeError:  # The data holds unhashable decoded objects
+            return decoder_fct(data)
+        return decode_key(key)
+
+    decoder.cache_info = decode_key.cache_info
+    decoder.cache_clear = decode_key.cache_clear
+    decoder.uncached = decoder_fct
+    decoder.cache_size = cache_size
+    return decoder
+
+
+class Snapshot(object):
+    """
+    The registrations of a ``Registry`` at a given version.
+
+    A snapshot is never modified once published, except for its cache of the encoder
+    functions resolved through the MRO, which only depends on the snapshot itself.
+    """
+
+    __slots__ = ('version', 'encoders', 'batch_encoders', 'cache_sizes', 'container_subclasses',
+                 'decoders', 'batch_decoders', 'resolved', 'base')
+
+    def __init__(self, version=0, encoders=None, batch_encoders=None, cache_sizes=None,
+                 container_subclasses=False, decoders=None, batch_decoders=None, base=None):
+        self.version = version
+        self.encoders = encoders or {}
+        self.batch_encoders = batch_encoders or {}
+        self.cache_sizes = cache_sizes or {}
+        self.container_subclasses = container_subclasses
+        self.decoders = decoders or {}
+        self.batch_decoders = batch_decoders or {}
+        self.resolved = {}
+        self.base = base
+
+    def replace(self, **changes):
+        """
+        Get a copy of this snapshot, at the next version, with the given tables replaced.
+        """
+        tables = dict((name, getattr(self, name)) for name in (
+            'encoders', 'batch_encoders', 'cache_sizes', 'container_subclasses', 'decoders', 'batch_decoders'))
+        tables.update(changes)
+        return Snapshot(self.version + 1, **tables)
+
+    def merge(self, base):
+        """
+        Get the view of the registrations of this snapshot over the ones of `base`.
+        """
+        encoders = dict(base.encoders)
+        encoders.update(self.encoders)
+        batch_encoders = dict(base.batch_encoders)
+        batch_encoders.update(self.batch_encoders)
+        cache_sizes = dict((type_object, cache_size) for type_object, cache_size in base.cache_sizes.items()
+                           if type_object not in self.encoders)
+        cache_sizes.update(self.cache_sizes)
+        decoders = dict(base.decoders)
+        decoders.update(self.decoders)
+        batch_decoders = dict(base.batch_decoders)
+        batch_decoders.update(self.batch_decoders)
+        return Snapshot(self.version + base.version, encoders, batch_encoders, cache_sizes,
+                        self.container_subclasses or base.container_subclasses,
+                        decoders, batch_decoders, base)
+
+    def resolve_encoder(self, type_object):
+        try:
+            return self.resolved[type_object]
+        except KeyError:
+            pass
+
+        registration = None
+        for base in type_object.__mro__:
+            registration = self.encoders.get(base)
+            if registration is not None:
+                break
+
+        self.resolved[type_object] = registration
+        return registration
+
+
+class Registry(object):
+    """
+    A set of registered encoder and decoder functions, shared by the threads of a process.
+
+    Lookups read an immutable ``Snapshot`` of the registrations without taking any lock.
+    Each registration builds a new snapshot and swaps it in under a lock, so that lookups
+    running in other threads see either all of the previous registrations or all of the new
+    ones, and increments the ``version`` of the registry.
+
+    A registry falls back to the registrations of its `parent`, the global registry by
+    default, and its own registrations take precedence over those of its parent for the
+    same ``type`` or textual type identifier. The registrations of the parent are picked
+    up on the next lookup.
+
+    Usage::
+        >>> import awesojson
+        >>> registry = awesojson.Registry()
+        >>> registry.register_encoder(my_tenant_encode_fct, datetime.datetime)
+        >>> codec = awesojson.Codec(registry=registry)
+    """
+
+    def __init__(self, parent=None, isolated=False):
+        """
+        :param Registry parent: The registry to fall back to. Default is the global registry
+        :param bool isolated: Don't fall back to any registry
+        """
+        if parent is None and not isolated:
+            parent = default_registry
+        self.parent = parent
+        self._lock = threading.Lock()
+        self._own = Snapshot()
+        self._snapshot = self._own if parent is None else self._own.merge(parent.snapshot())
+
+    def __getstate__(self):
+        # The registrations are flattened and copied, e.g. to a worker process. The cached
+        # decoder functions are closures, so they are pickled uncached and wrapped again
+        snapshot = self.snapshot()
+        decoders = {}
+        decoder_cache_sizes = {}
+        for type_identifier, decoder_fct in snapshot.decoders.items():
+            if hasattr(decoder_fct, 'uncached'):
+                decoder_cache_sizes[type_identifier] = decoder_fct.cache_size
+                decoder_fct = decoder_fct.uncached
+            decoders[type_identifier] = decoder_fct
+        return {'encoders': dict(snapshot.encoders), 'batch_encoders': dict(snapshot.batch_encoders),
+                'cache_sizes': dict(snapshot.cache_sizes), 'decoders': decoders,
+                'batch_decoders': dict(snapshot.batch_decoders), 'decoder_cache_sizes': decoder_cache_sizes}
+
+    def __setstate__(self, state):
+        decoders = state['decoders']
+        for type_identifier, cache_size in state['decoder_cache_sizes'].items():
+            decoders[type_identifier] = _cached_decoder(decoders[type_identifier], cache_size)
+        self.parent = None
+        self._lock = threading.Lock()
+        self._own = self._snapshot = Snapshot(
+            encoders=state['encoders'], batch_encoders=state['batch_encoders'], cache_sizes=state['cache_sizes'],
+            container_subclasses=any(_is_container_subclass(type_object) for type_object in state['encoders']),
+            decoders=decoders, batch_decoders=state['batch_decoders'])
+
+    @property
+    def version(self):
+        """
+        The number of changes of the registrations of this registry and its parents.
+        """
+        return self.snapshot().version
+
+    def snapshot(self):
+        """
+        Get the current registrations.
+
+        :rtype: Snapshot
+        """
+        snapshot = self._snapshot
+        parent = self.parent
+        if parent is not None and snapshot.base is not parent.snapshot():
+            with self._lock:
+                snapshot = self._snapshot = self._own.merge(parent.snapshot())
+        return snapshot
+
+    def _publish(self, **changes):
+        """
+        Swap in a new snapshot of the own registrations with the given tables replaced.
+        """
+        own = self._own.replace(**changes)
+        self._own = own
+        self._snapshot = own if self.parent is None else own.merge(self.parent.snapshot())
+
+    def clear(self):
+        """
+        Remove all the registrations of this registry, not of its parent.
+        """
+        with self._lock:
+            self._publish(encoders={}, batch_encoders={}, cache_sizes={}, container_subclasses=False,
+                          decoders={}, batch_decoders={})
+
+    def register_encoder(self, encoder_fct, type_object, type_identifier=None, cache_size=None):
+        """
+        Register `encoder_fct` as the encode function for `type_object` identified as `type_identifier`.
+
+        See ``AwesoJSONEncoder.register_encoder``.
+
+        :param encoder_fct: The encoder function to register
+        :param type type_object: The type object to register
+        :param str type_identifier: The textual type identifier. Default is the fully qualified class name
+        :param int cache_size: The maximum number of encoded objects to cache
+
+        :raises Exception: The `type_object` is not a ``type``, or the `cache_size` is not positive
+        """
+        if not isinstance(type_object, type):
+            raise Exception("type_object is not a type")
+
+        if type_identifier is None:
+            type_identifier = get_fqcn(type_object)
+
+        if cache_size is not None and cache_size <= 0:
+            raise Exception("cache_size is not positive")
+
+        with self._lock:
+            own = self._own
+            encoders = dict(own.encoders)
+            encoders[type_object] = (encoder_fct, type_identifier)
+            cache_sizes = dict(own.cache_sizes)
+            if cache_size is not None:
+                cache_sizes[type_object] = cache_size
+            else:
+                cache_sizes.pop(type_object, None)
+            self._publish(encoders=encoders, cache_sizes=cache_sizes,
+                          container_subclasses=own.container_subclasses or _is_container_subclass(type_object))
+
+    def register_batch_encoder(self, batch_encoder_fct, type_object, type_identifier=None):
+        """
+        Register `batch_encoder_fct` as the batch encode function for `type_object` identified as `type_identifier`.
+
+        See ``AwesoJSONEncoder.register_batch_encoder``.
+
+        :param batch_encoder_fct: The batch encoder function to register
+        :param type type_object: The type object to register
+        :param str type_identifier: The textual type identifier. Default is the fully qualified class name
+
+        :raises Exception: The `type_object` is not a ``type``
+        """
+        if not isinstance(type_object, type):
+            raise Exception("type_object is not a type")
+
+        if type_identifier is None:
+            type_identifier = get_fqcn(type_object)
+
+        with self._lock:
+            batch_encoders = dict(self._own.batch_encoders)
+            batch_encoders[type_object] = (batch_encoder_fct, type_identifier)
+            self._publish(batch_encoders=batch_encoders)
+
+    def register_decoder(self, decoder_fct, type_identifier, arguments='data', cache_size=None):
+        """
+        Register `decoder_fct` as the decode function for `type_identifier`.
+
+        See ``AwesoJSONDecoder.register_decoder``.
+
+        :param decoder_fct: The decoder function to register
+        :param str type_identifier: The textual type identifier of the ``type`` to register
+        :param str arguments: How the data is passed: ``'data'``, ``'kwargs'`` or ``'pairs'``
+        :param int cache_size: The maximum number of decoded objects to cache
+
+        :raises Exception: The `arguments` are unknown, or the `cache_size` is not positive
+        """
+        if arguments != 'data':
+            try:
+                decoder_fct = functools.partial(_DECODER_CALLS[arguments], decoder_fct)
+            except KeyError:
+                raise Exception("Unknown decoder arguments {0}".format(arguments))
+        if cache_size is not None:
+            if cache_size <= 0:
+                raise Exception("cache_size is not positive")
+            decoder_fct = _cached_decoder(decoder_fct, cache_size)
+
+        with self._lock:
+            decoders = dict(self._own.decoders)
+            decoders[type_identifier] = decoder_fct
+            self._publish(decoders=decoders)
+
+    def register_batch_decoder(self, batch_decoder_fct, type_identifier):
+        """
+        Register `batch_decoder_fct` as the batch decode function for `type_identifier`.
+
+        See ``AwesoJSONDecoder.register_batch_decoder``.
+
+        :param batch_decoder_fct: The batch decoder function to register
+        :param str type_identifier: The textual type identifier of the ``type`` to register
+        """
+        with self._lock:
+            batch_decoders = dict(self._own.batch_decoders)
+            batch_decoders[type_identifier] = batch_decoder_fct
+            self._publish(batch_decoders=batch_decoders)
+
+    def get_encoder(self, type_object):
+        """
+        Get the registered encoder function and textual type identifier for `type_object`.
+
+        Will return ``None`` if no function is registered for `type_object`.
+
+        :param type type_object: The type object
+
+        :raises Exception: The `type_object` is not a ``type``
+
+        :returns: Encoder function registered for `type_object` and the textual type identifier
+        :rtype: (fct, str)
+        """
+        if not isinstance(type_object, type):
+            raise Exception("type_object is not a type")
+
+        return self.snapshot().encoders.get(type_object)
+
+    def resolve_encoder(self, type_object):
+        """
+        Get the encoder function and textual type identifier to use for `type_object`.
+
+        See ``AwesoJSONEncoder.resolve_encoder``.
+
+        :param type type_object: The type object
+
+        :returns: Encoder function to use for `type_object` and the textual type identifier
+        :rtype: (fct, str)
+        """
+        return self.snapshot().resolve_encoder(type_object)
+
+    def get_batch_encoder(self, type_object):
+        """
+        Get the registered batch encoder function and textual type identifier for `type_object`.
+
+        Will return ``None`` if no batch function is registered for `type_object`.
+
+        :param type type_object: The type object
+
+        :returns: Batch encoder function registered for `type_object` and the textual type identifier
+        :rtype: (fct, str)
+        """
+        return self.snapshot().batch_encoders.get(type_object)
+
+    def get_decoder(self, type_identifier):
+        """
+        Get the registered decoder function for `type_identifier`.
+
+        Will return ``None`` if no function is registered for `type_identifier`.
+
+        :param str type_identifier: The textual type identifier of the ``type``
+
+        :returns: Decoder function registered for `type_identifier`
+        """
+        return self.snapshot().decoders.get(type_identifier)
+
+    def get_batch_decoder(self, type_identifier):
+        """
+        Get the registered batch decoder function for `type_identifier`.
+
+        Will return ``None`` if no batch function is registered for `type_identifier`.
+
+        :param str type_identifier: The textual type identifier of the ``type``
+
+        :returns: Batch decoder function registered for `type_identifier`
+        """
+        return self.snapshot().batch_decoders.get(type_identifier)
+
+    def get_cache_info(self, type_identifier):
+        """
+        Get the statistics of the decode cache of `type_identifier`.
+
+        Will return ``None`` if `type_identifier` has no cache.
+
+        :param str type_identifier: The textual type identifier of the ``type``
+
+        :returns: The hits, misses, maximum size and current size of the cache
+        :rtype: functools._CacheInfo
+        """
+        cache_info = getattr(self.get_decoder(type_identifier), 'cache_info', None)
+        return cache_info() if cache_info is not None else None
+
+
+def _is_container_subclass(type_object):
+    return issubclass(type_object, _CONTAINER_TYPES) and type_object not in _CONTAINER_TYPES
+
+
+default_registry = Registry(isolated=True)
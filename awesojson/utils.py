@@ -10,6 +10,27 @@ This module provides common utilities for the AwesoJSON lib.
 :license: MIT, see LICENSE for more details.
 """
 
+import json
+
+BYTES_TYPES = (bytes, bytearray, memoryview)
+
+
+def decode_bytes(value):
+    """
+    Decodes a bytes-like JSON document to a ``str``.
+
+    The encoding (UTF-8, UTF-16 or UTF-32) is detected like ``json.loads`` does. The text
+    is decoded straight from the buffer of `value`, so a ``memoryview`` is not copied
+    to ``bytes`` first.
+
+    :param (bytes|bytearray|memoryview) value: The bytes-like JSON document
+
+    :returns: The JSON document
+    :rtype: str
+    """
+    encoding = json.detect_encoding(bytes(value[:4]))
+    return str(value, encoding, 'surrogatepass')
+
 
 def get_fqcn(type_object):
     """
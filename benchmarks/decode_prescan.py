@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the ``AwesoJSONDecoder`` `prescan` mode.
+
+Decodes documents of 0%, 1%, 10% and 100% tagged records, with and without
+`prescan`, and prints the best time of each.
+
+Usage::
+    $ python benchmarks/decode_prescan.py
+"""
+
+import json
+import timeit
+
+from awesojson import register_decoder
+from awesojson.decoder import AwesoJSONDecoder
+
+RECORDS = 20000
+REPEAT = 15
+NUMBER = 10
+
+
+def make_document(tagged_ratio):
+    records = []
+    tagged_every = int(1 / tagged_ratio) if tagged_ratio else 0
+    for i in range(RECORDS):
+        record = {'id': i}
+        if tagged_every and i % tagged_every == 0:
+            record = {'awesojsontype': 'bench.Record', 'data': record}
+        records.append(record)
+    return json.dumps(records)
+
+
+def best_time(decoder, document):
+    timer = timeit.Timer(lambda: decoder.decode(document))
+    return min(timer.repeat(repeat=REPEAT, number=NUMBER)) / NUMBER
+
+
+def main():
+    register_decoder(lambda data: data, 'bench.Record')
+    hooked = AwesoJSONDecoder()
+    prescan = AwesoJSONDecoder(prescan=True)
+    print('{0:>8} {1:>12} {2:>12} {3:>8}'.format('tagged', 'hook (ms)', 'prescan (ms)', 'speedup'))
+    for ratio in (0, 0.01, 0.1, 1):
+        document = make_document(ratio)
+        hooked_time = best_time(hooked, document)
+        prescan_time = best_time(prescan, document)
+        print('{0:>7.0%} {1:>12.2f} {2:>12.2f} {3:>7.2f}x'.format(
+            ratio, hooked_time * 1000, prescan_time * 1000, hooked_time / prescan_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the record class codecs generated by ``register_class``.
+
+Encodes and decodes a dataclass, a namedtuple and a class with ``__slots__``, with
+the generated functions and with generic functions looking the fields up by name,
+and prints the best time of each.
+
+Usage::
+    $ python benchmarks/record_codecs.py
+"""
+
+import collections
+import dataclasses
+import timeit
+
+from awesojson import classes
+
+REPEAT = 15
+NUMBER = 100000
+
+
+@dataclasses.dataclass
+class DataRecord(object):
+    id: int
+    name: str
+    price: float
+    tags: list
+
+
+TupleRecord = collections.namedtuple('TupleRecord', ['id', 'name', 'price', 'tags'])
+
+
+class SlotsRecord(object):
+    __slots__ = ('id', 'name', 'price', 'tags')
+
+    def __init__(self, id, name, price, tags):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.tags = tags
+
+
+def generic_codec(type_object):
+    fields, arguments = classes.class_fields(type_object)
+
+    def encode(obj):
+        return dict((field, getattr(obj, field)) for field in fields)
+
+    def decode(data):
+        if arguments is not None:
+            return type_object(**data)
+        obj = type_object.__new__(type_object)
+        for field in fields:
+            setattr(obj, field, data[field])
+        return obj
+
+    return encode, decode
+
+
+def best_time(fct, arg):
+    timer = timeit.Timer(lambda: fct(arg))
+    return min(timer.repeat(repeat=REPEAT, number=NUMBER)) / NUMBER
+
+
+def main():
+    print('{0:>12} {1:>6} {2:>12} {3:>14} {4:>8}'.format(
+        'class', 'way', 'generic (us)', 'generated (us)', 'speedup'))
+    for type_object in (DataRecord, TupleRecord, SlotsRecord):
+        record = type_object(1, 'name', 1.5, ['a', 'b'])
+        generic_encode, generic_decode = generic_codec(type_object)
+        encode = classes.make_encoder(type_object)
+        decode = classes.make_decoder(type_object)
+        data = encode(record)
+        for way, generic_fct, generated_fct, arg in (('encode', generic_encode, encode, record),
+                                                     ('decode', generic_decode, decode, data)):
+            generic_time = best_time(generic_fct, arg)
+            generated_time = best_time(generated_fct, arg)
+            print('{0:>12} {1:>6} {2:>12.3f} {3:>14.3f} {4:>7.2f}x'.format(
+                type_object.__name__, way, generic_time * 1e6, generated_time * 1e6,
+                generic_time / generated_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -26,7 +26,7 @@ if not version:
 with open('README.md', 'r', 'utf-8') as f:
     readme = f.read()
 
-packages = ['awesojson']
+packages = ['awesojson', 'awesojson.bench']
 requires = []
 
 setup(
@@ -42,6 +42,7 @@ setup(
     package_dir={'awesojson': 'awesojson'},
     include_package_data=True,
     install_requires=requires,
+    python_requires='>=3.8',
     license='MIT',
     zip_safe=True,
     classifiers=(
@@ -50,10 +51,12 @@ setup(
         'Natural Language :: English',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5'
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12'
     ),
 )
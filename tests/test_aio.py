@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from awesojson import aio, codec, decoder, encoder
+
+
+class DummyWriter(object):
+    """
+    Stream writer recording the written blocks and drains.
+    """
+    def __init__(self):
+        self.blocks = []
+        self.drains = 0
+
+    def write(self, data):
+        self.blocks.append(data)
+
+    async def drain(self):
+        self.drains += 1
+
+
+def make_reader(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+class AioTest(unittest.IsolatedAsyncioTestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: x.value, self.DummyClass, 'dummy')
+        decoder.AwesoJSONDecoder.register_decoder(self.DummyClass, 'dummy')
+
+    async def test_dump(self):
+        writer = DummyWriter()
+        await aio.dump([self.DummyClass(u'é')], writer)
+        self.assertEqual(b''.join(writer.blocks).decode('utf-8'),
+                         '[{"awesojsontype": "dummy", "data": "\\u00e9"}]')
+        self.assertEqual(writer.drains, len(writer.blocks))
+
+    async def test_dump_blocks_drained(self):
+        writer = DummyWriter()
+        await aio.dump(list(range(1000)), writer, chunk_size=100)
+        self.assertTrue(len(writer.blocks) > 10)
+        self.assertEqual(writer.drains, len(writer.blocks))
+        self.assertEqual(b''.join(writer.blocks), str(list(range(1000))).encode('utf-8'))
+
+    async def test_dump_offload(self):
+        writer = DummyWriter()
+        with ThreadPoolExecutor(1) as executor:
+            await aio.dump(list(range(1000)), writer, offload=True, executor=executor,
+                           chunk_size=100)
+        self.assertEqual(len(writer.blocks), writer.drains)
+        self.assertEqual(b''.join(writer.blocks), str(list(range(1000))).encode('utf-8'))
+
+    async def test_dump_codec(self):
+        writer = DummyWriter()
+        await aio.dump({'a': 1}, writer, codec=codec.Codec(encoder_kwargs={'indent': 1}))
+        self.assertEqual(b''.join(writer.blocks), b'{\n "a": 1\n}')
+
+    async def test_load(self):
+        reader = make_reader(b'[{"awesojsontype": "dummy", "data": 1}, 2]')
+        result = await aio.load(reader)
+        self.assertEqual(result[0].value, 1)
+        self.assertEqual(result[1], 2)
+
+    async def test_load_offload(self):
+        result = await aio.load(make_reader(b'[1, 2]'), offload=True)
+        self.assertEqual(result, [1, 2])
+
+    async def test_load_lines(self):
+        reader = make_reader(b'{"awesojsontype": "dummy", "data": 1}\n\n[2]\n3')
+        result = [obj async for obj in aio.load_lines(reader)]
+        self.assertEqual(result[0].value, 1)
+        self.assertEqual(result[1:], [[2], 3])
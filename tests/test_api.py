@@ -1,20 +1,21 @@
 import unittest
 import json
-
-try:
-    from StringIO import StringIO  # For Python 2.7
-except ImportError:  # Python 3.3+
-    from io import StringIO
-
-try:
-    from unittest.mock import patch
-except ImportError:  # Pre Python 3.3
-    from mock import patch
-
-from awesojson import (dump, dumps,
-                       load, loads,
+import subprocess
+import sys
+from io import StringIO
+from unittest.mock import patch
+
+from awesojson import (Codec, LazyObject, Registry,
+                       dump, dump_iter, dump_lines, dumpb, dumps, dumps_oob,
+                       get_cache_info,
+                       iterload, iterload_path,
+                       load, load_lines, load_path, loads, loads_oob, loads_parallel,
+                       register_batch_decoder,
+                       register_batch_encoder,
+                       register_class,
                        register_decoder,
-                       register_encoder)
+                       register_encoder,
+                       resolve)
 
 
 @patch('awesojson.encoder.AwesoJSONEncoder.default')
@@ -138,10 +139,12 @@ class JSONDumpsAPITest(unittest.TestCase):
         self.assertEquals(result, expected)
 
 
+# The default codec binds object_handler when built, rebuild it once patched
+@patch('awesojson.api._default_codec', new_callable=Codec)
 @patch('awesojson.decoder.AwesoJSONDecoder.object_handler')
 class JSONLoadAPITest(unittest.TestCase):
 
-    def test_int_do_not_call_decoder_object_handler(self, object_handler_mock):
+    def test_int_do_not_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = StringIO('0')
         expected = json.load(value)
         value.seek(0)
@@ -149,7 +152,7 @@ class JSONLoadAPITest(unittest.TestCase):
         self.assertFalse(object_handler_mock.called)
         self.assertEquals(result, expected)
 
-    def test_float_do_not_call_decoder_object_handler(self, object_handler_mock):
+    def test_float_do_not_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = StringIO('1.5')
         expected = json.load(value)
         value.seek(0)
@@ -157,7 +160,7 @@ class JSONLoadAPITest(unittest.TestCase):
         self.assertFalse(object_handler_mock.called)
         self.assertEquals(result, expected)
 
-    def test_string_do_not_call_decoder_object_handler(self, object_handler_mock):
+    def test_string_do_not_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = StringIO('"foo"')
         expected = json.load(value)
         value.seek(0)
@@ -165,7 +168,7 @@ class JSONLoadAPITest(unittest.TestCase):
         self.assertFalse(object_handler_mock.called)
         self.assertEquals(result, expected)
 
-    def test_list_do_not_call_decoder_object_handler(self, object_handler_mock):
+    def test_list_do_not_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = StringIO('[0, 1, 2]')
         expected = json.load(value)
         value.seek(0)
@@ -173,12 +176,12 @@ class JSONLoadAPITest(unittest.TestCase):
         self.assertFalse(object_handler_mock.called)
         self.assertEquals(result, expected)
 
-    def test_dict_call_decoder_object_handler(self, object_handler_mock):
+    def test_dict_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = StringIO('{}')
         load(value)
         self.assertTrue(object_handler_mock.called)
 
-    def test_dict_object_handler_return_value_used(self, object_handler_mock):
+    def test_dict_object_handler_return_value_used(self, object_handler_mock, default_codec):
         value = StringIO('{"foo": "bar"}')
         expected = json.load(value)
         value.seek(0)
@@ -188,43 +191,45 @@ class JSONLoadAPITest(unittest.TestCase):
         self.assertEquals(result, expected)
 
 
+# The default codec binds object_handler when built, rebuild it once patched
+@patch('awesojson.api._default_codec', new_callable=Codec)
 @patch('awesojson.decoder.AwesoJSONDecoder.object_handler')
 class JSONLoadsAPITest(unittest.TestCase):
 
-    def test_int_do_not_call_decoder_object_handler(self, object_handler_mock):
+    def test_int_do_not_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = '0'
         expected = json.loads(value)
         result = loads(value)
         self.assertFalse(object_handler_mock.called)
         self.assertEquals(result, expected)
 
-    def test_float_do_not_call_decoder_object_handler(self, object_handler_mock):
+    def test_float_do_not_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = '1.5'
         expected = json.loads(value)
         result = loads(value)
         self.assertFalse(object_handler_mock.called)
         self.assertEquals(result, expected)
 
-    def test_string_do_not_call_decoder_object_handler(self, object_handler_mock):
+    def test_string_do_not_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = '"foo"'
         expected = json.loads(value)
         result = loads(value)
         self.assertFalse(object_handler_mock.called)
         self.assertEquals(result, expected)
 
-    def test_list_do_not_call_decoder_object_handler(self, object_handler_mock):
+    def test_list_do_not_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = '[0, 1, 2]'
         expected = json.loads(value)
         result = loads(value)
         self.assertFalse(object_handler_mock.called)
         self.assertEquals(result, expected)
 
-    def test_dict_call_decoder_object_handler(self, object_handler_mock):
+    def test_dict_call_decoder_object_handler(self, object_handler_mock, default_codec):
         value = '{}'
         loads(value)
         self.assertTrue(object_handler_mock.called)
 
-    def test_dict_decoder_object_handler_return_value_used(self, object_handler_mock):
+    def test_dict_decoder_object_handler_return_value_used(self, object_handler_mock, default_codec):
         value = '{"foo": "bar"}'
         expected = json.loads(value)
         object_handler_mock.return_value = expected
@@ -233,22 +238,158 @@ class JSONLoadsAPITest(unittest.TestCase):
         self.assertEquals(result, expected)
 
 
+class JSONKwargsAPITest(unittest.TestCase):
+
+    def test_dumps_kwargs_used(self):
+        value = {"b": 1, "a": 2}
+        self.assertEqual(dumps(value, sort_keys=True), json.dumps(value, sort_keys=True))
+
+    def test_dump_kwargs_used(self):
+        value = {"b": 1, "a": 2}
+        result = StringIO()
+        dump(value, result, sort_keys=True)
+        self.assertEqual(result.getvalue(), json.dumps(value, sort_keys=True))
+
+    def test_loads_kwargs_used(self):
+        self.assertEqual(loads('[1]', parse_int=str), ['1'])
+
+    def test_load_kwargs_used(self):
+        self.assertEqual(load(StringIO('[1]'), parse_int=str), ['1'])
+
+    def test_loads_bytes(self):
+        self.assertEqual(loads(memoryview(b'[1]')), [1])
+
+    def test_loads_bytes_kwargs_used(self):
+        self.assertEqual(loads(memoryview(b'[1]'), parse_int=str), ['1'])
+
+    def test_oob(self):
+        document, buffers = dumps_oob({'a': b'xy'})
+        self.assertEqual(loads_oob(document, buffers), {'a': buffers[0]})
+
+    def test_oob_kwargs_used(self):
+        document, buffers = dumps_oob([1.5, b'xy'], separators=(',', ':'))
+        self.assertEqual(document, '[1.5,{"awesojsonbuffer":0}]')
+        self.assertEqual(loads_oob(document, buffers, parse_float=str), ['1.5', buffers[0]])
+
+    def test_loads_lazy(self):
+        registry = Registry()
+        registry.register_decoder(str, 'test.name')
+        result = loads('[{"awesojsontype": "test.name", "data": 1}]', lazy=True, registry=registry)
+        self.assertIs(type(result[0]), LazyObject)
+        self.assertEqual(resolve(result), ['1'])
+
+    def test_loads_select(self):
+        self.assertEqual(loads('{"a": [{"b": 1, "c": 2}], "d": 3}', select=['a[*].b']), {'a': [{'b': 1}]})
+
+    def test_dumpb(self):
+        self.assertEqual(dumpb([1, 2]), b'[1, 2]')
+
+    def test_dumpb_kwargs_used(self):
+        buf = bytearray()
+        dumpb([1, 2], into=buf, separators=(',', ':'))
+        self.assertEqual(buf, b'[1,2]')
+
+    def test_dump_iter(self):
+        result = StringIO()
+        dump_iter(iter([1, 2]), result)
+        self.assertEqual(result.getvalue(), '[1, 2]')
+
+    def test_dump_iter_kwargs_used(self):
+        result = StringIO()
+        dump_iter(iter([1, 2]), result, separators=(',', ':'))
+        self.assertEqual(result.getvalue(), '[1,2]')
+
+    def test_dump_lines(self):
+        result = StringIO()
+        dump_lines([1, 2], result)
+        self.assertEqual(result.getvalue(), '1\n2\n')
+
+    def test_dump_lines_kwargs_used(self):
+        result = StringIO()
+        dump_lines([{"b": 1, "a": 2}], result, sort_keys=True)
+        self.assertEqual(result.getvalue(), '{"a": 2, "b": 1}\n')
+
+    @patch('awesojson.parallel.dump_lines')
+    def test_dump_lines_workers(self, parallel_dump_lines_mock):
+        result = StringIO()
+        dump_lines([1], result, workers=2, batch_size=10, sort_keys=True)
+        parallel_dump_lines_mock.assert_called_with([1], result, 2, 10,
+                                                    encoder_kwargs={'sort_keys': True})
+
+    def test_load_lines(self):
+        self.assertEqual(list(load_lines(StringIO('1\n2\n'))), [1, 2])
+
+    def test_load_lines_kwargs_used(self):
+        self.assertEqual(list(load_lines(StringIO('1\n2\n'), parse_int=str)), ['1', '2'])
+
+    @patch('awesojson.parallel.load_lines')
+    def test_load_lines_workers(self, parallel_load_lines_mock):
+        value = StringIO('1\n')
+        load_lines(value, workers=2, batch_size=10, parse_int=str)
+        parallel_load_lines_mock.assert_called_with(value, 2, 10,
+                                                    decoder_kwargs={'parse_int': str})
+
+    @patch('awesojson.parallel.loads')
+    def test_loads_parallel(self, parallel_loads_mock):
+        loads_parallel('[1]', workers=2, threshold=10, parse_int=str)
+        parallel_loads_mock.assert_called_with('[1]', 2, 10, decoder_kwargs={'parse_int': str})
+
+    @patch('awesojson.api._default_codec')
+    def test_load_path(self, default_codec_mock):
+        load_path('document.json', mmap=False)
+        default_codec_mock.load_path.assert_called_with('document.json', False)
+
+    @patch('awesojson.codec.Codec.load_path')
+    def test_load_path_kwargs_used(self, load_path_mock):
+        load_path('document.json', parse_int=str)
+        load_path_mock.assert_called_with('document.json', True)
+
+    @patch('awesojson.api._default_codec')
+    def test_iterload_path(self, default_codec_mock):
+        iterload_path('document.json', mmap=False, chunk_size=10)
+        default_codec_mock.iterload_path.assert_called_with('document.json', False, 10)
+
+    @patch('awesojson.codec.Codec.iterload_path')
+    def test_iterload_path_kwargs_used(self, iterload_path_mock):
+        iterload_path('document.json', parse_int=str)
+        iterload_path_mock.assert_called_with('document.json', True, 65536)
+
+    def test_iterload(self):
+        self.assertEqual(list(iterload(StringIO('[1, 2]'))), [1, 2])
+
+    def test_iterload_kwargs_used(self):
+        self.assertEqual(list(iterload(StringIO('[1, 2]'), parse_int=str)), ['1', '2'])
+
+
 @patch('awesojson.decoder.AwesoJSONDecoder.register_decoder')
 class RegisterDecoderFunctionAPITest(unittest.TestCase):
 
     def test_basic_registration(self, AwesoJSONDecoder_register_decoder_mock):
         f = lambda x: x
         register_decoder(f, 'test.name')
-        AwesoJSONDecoder_register_decoder_mock.assert_called_with(f, 'test.name')
+        AwesoJSONDecoder_register_decoder_mock.assert_called_with(f, 'test.name', 'data', None)
 
     def test_None_fct_registration(self, AwesoJSONDecoder_register_decoder_mock):
         register_decoder(None, 'test.name')
-        AwesoJSONDecoder_register_decoder_mock.assert_called_with(None, 'test.name')
+        AwesoJSONDecoder_register_decoder_mock.assert_called_with(None, 'test.name', 'data', None)
 
     def test_None_type_identifier_registration(self, AwesoJSONDecoder_register_decoder_mock):
         f = lambda x: x
         register_decoder(f, None)
-        AwesoJSONDecoder_register_decoder_mock.assert_called_with(f, None)
+        AwesoJSONDecoder_register_decoder_mock.assert_called_with(f, None, 'data', None)
+
+    def test_arguments_registration(self, AwesoJSONDecoder_register_decoder_mock):
+        f = lambda x: x
+        register_decoder(f, 'test.name', arguments='kwargs')
+        AwesoJSONDecoder_register_decoder_mock.assert_called_with(f, 'test.name', 'kwargs', None)
+
+
+@patch('awesojson.decoder.AwesoJSONDecoder.get_cache_info')
+class GetCacheInfoAPITest(unittest.TestCase):
+
+    def test_get_cache_info(self, AwesoJSONDecoder_get_cache_info_mock):
+        self.assertIs(get_cache_info('test.name'), AwesoJSONDecoder_get_cache_info_mock.return_value)
+        AwesoJSONDecoder_get_cache_info_mock.assert_called_with('test.name')
 
 
 @patch('awesojson.encoder.AwesoJSONEncoder.register_encoder')
@@ -263,19 +404,97 @@ class RegisterEncoderFunctionAPITest(unittest.TestCase):
     def test_basic_registration(self, AwesoJSONEncoder_register_encoder_mock):
         f = lambda x: x
         register_encoder(f, self.DummyClass)
-        AwesoJSONEncoder_register_encoder_mock.assert_called_with(f, self.DummyClass, None)
+        AwesoJSONEncoder_register_encoder_mock.assert_called_with(f, self.DummyClass, None, None)
 
     def test_None_fct_registration(self, AwesoJSONEncoder_register_encoder_mock):
         register_encoder(None, self.DummyClass)
-        AwesoJSONEncoder_register_encoder_mock.assert_called_with(None, self.DummyClass, None)
+        AwesoJSONEncoder_register_encoder_mock.assert_called_with(None, self.DummyClass, None, None)
 
     def test_None_type_identifier_registration(self, AwesoJSONEncoder_register_encoder_mock):
         f = lambda x: x
         register_encoder(f, None)
-        AwesoJSONEncoder_register_encoder_mock.assert_called_with(f, None, None)
+        AwesoJSONEncoder_register_encoder_mock.assert_called_with(f, None, None, None)
 
     def test_specific_type_identifier_registration(self, AwesoJSONEncoder_register_encoder_mock):
         f = lambda x: x
         register_encoder(f, self.DummyClass, 'test.name')
-        AwesoJSONEncoder_register_encoder_mock.assert_called_with(f, self.DummyClass, 'test.name')
+        AwesoJSONEncoder_register_encoder_mock.assert_called_with(f, self.DummyClass, 'test.name', None)
+
+    def test_cache_size_registration(self, AwesoJSONEncoder_register_encoder_mock):
+        f = lambda x: x
+        register_encoder(f, self.DummyClass, cache_size=16)
+        AwesoJSONEncoder_register_encoder_mock.assert_called_with(f, self.DummyClass, None, 16)
+
+
+@patch('awesojson.decoder.AwesoJSONDecoder.register_batch_decoder')
+class RegisterBatchDecoderFunctionAPITest(unittest.TestCase):
+
+    def test_basic_registration(self, AwesoJSONDecoder_register_batch_decoder_mock):
+        f = lambda x: x
+        register_batch_decoder(f, 'test.name')
+        AwesoJSONDecoder_register_batch_decoder_mock.assert_called_with(f, 'test.name')
+
+
+@patch('awesojson.encoder.AwesoJSONEncoder.register_batch_encoder')
+class RegisterBatchEncoderFunctionAPITest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        pass
+
+    def test_basic_registration(self, AwesoJSONEncoder_register_batch_encoder_mock):
+        f = lambda x: x
+        register_batch_encoder(f, self.DummyClass)
+        AwesoJSONEncoder_register_batch_encoder_mock.assert_called_with(f, self.DummyClass, None)
+
+    def test_specific_type_identifier_registration(self, AwesoJSONEncoder_register_batch_encoder_mock):
+        f = lambda x: x
+        register_batch_encoder(f, self.DummyClass, 'test.name')
+        AwesoJSONEncoder_register_batch_encoder_mock.assert_called_with(f, self.DummyClass, 'test.name')
 
+
+@patch('awesojson.decoder.AwesoJSONDecoder.register_decoder')
+@patch('awesojson.encoder.AwesoJSONEncoder.register_encoder')
+class RegisterClassAPITest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        __slots__ = ('value',)
+
+    def test_basic_registration(self, AwesoJSONEncoder_register_encoder_mock,
+                                AwesoJSONDecoder_register_decoder_mock):
+        self.assertIs(register_class(self.DummyClass), self.DummyClass)
+        encoder_fct, type_object, type_identifier = AwesoJSONEncoder_register_encoder_mock.call_args[0]
+        self.assertIs(type_object, self.DummyClass)
+        self.assertEqual(type_identifier, 'test_api.DummyClass')
+        decoder_fct, type_identifier = AwesoJSONDecoder_register_decoder_mock.call_args[0]
+        self.assertEqual(type_identifier, 'test_api.DummyClass')
+        self.assertEqual(decoder_fct({'value': 1}).value, 1)
+
+    def test_specific_type_identifier_registration(self, AwesoJSONEncoder_register_encoder_mock,
+                                                   AwesoJSONDecoder_register_decoder_mock):
+        register_class(self.DummyClass, 'test.name')
+        self.assertEqual(AwesoJSONEncoder_register_encoder_mock.call_args[0][2], 'test.name')
+        self.assertEqual(AwesoJSONDecoder_register_decoder_mock.call_args[0][1], 'test.name')
+
+    def test_not_a_record(self, AwesoJSONEncoder_register_encoder_mock,
+                          AwesoJSONDecoder_register_decoder_mock):
+        self.assertRaises(Exception, register_class, object)
+        self.assertFalse(AwesoJSONEncoder_register_encoder_mock.called)
+
+
+class ImportAPITest(unittest.TestCase):
+
+    def imported_modules(self):
+        output = subprocess.check_output([sys.executable, '-c',
+                                          'import sys, awesojson; print(" ".join(sorted(sys.modules)))'])
+        return output.decode('ascii').split()
+
+    def test_parallel_not_imported(self):
+        modules = self.imported_modules()
+        self.assertNotIn('awesojson.parallel', modules)
+        self.assertNotIn('concurrent.futures', modules)
@@ -0,0 +1,115 @@
+import json
+import os
+import runpy
+import shutil
+import tempfile
+import unittest
+import warnings
+from io import StringIO
+from unittest.mock import patch
+
+from awesojson import bench, codec, encoder, registry
+from awesojson.bench import __main__ as bench_main, workloads
+
+
+class BenchTest(unittest.TestCase):
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+
+    def tearDown(self):
+        self.setUp()
+
+    def test_workloads_same_text(self):
+        registrations = registry.Registry(isolated=True)
+        workloads.register(registrations)
+        inst = codec.Codec(registry=registrations)
+        for name, workload in workloads.WORKLOADS:
+            typed, plain = workload(0.01)
+            self.assertEqual(json.loads(inst.dumps(typed)), plain)
+
+    def test_run(self):
+        results = bench.run(0.001, 1)
+        self.assertEqual(results['format'], bench.RESULTS_FORMAT)
+        self.assertEqual(results['scale'], 0.001)
+        self.assertEqual(len(results['results']), 4 * len(workloads.WORKLOADS))
+        self.assertEqual(json.loads(json.dumps(results)), results)
+        self.assertEqual(
+            set((result['library'], result['operation']) for result in results['results']),
+            set([('awesojson', 'encode'), ('awesojson', 'decode'), ('json', 'encode'), ('json', 'decode')]))
+
+    def test_run_global_registry(self):
+        version = registry.default_registry.version
+        bench.run(0.001, 1, ['tagged_100pct'])
+        self.assertEqual(registry.default_registry.version, version)
+        self.assertIsNone(registry.default_registry.get_decoder(workloads.TYPE_IDENTIFIER))
+
+    def test_run_workload(self):
+        results = bench.run(0.001, 1, ['flat_dicts'])
+        self.assertEqual(set(result['workload'] for result in results['results']), set(['flat_dicts']))
+
+    def test_run_unknown_workload(self):
+        with self.assertRaises(Exception):
+            bench.run(0.001, 1, ['flat_dicts', 'nope'])
+
+    def test_compare(self):
+        results = bench.run(0.001, 1, ['flat_dicts', 'big_strings'])
+        baseline = json.loads(json.dumps(results))
+        baseline['results'] = baseline['results'][:4]
+        for result in baseline['results']:
+            result['ops_per_sec'] = result['ops_per_sec'] / 2
+        ratios = bench.compare(results, baseline)
+        self.assertEqual(sorted(ratios), sorted(
+            (result['workload'], result['library'], result['operation']) for result in results['results'][:4]))
+        for ratio in ratios.values():
+            self.assertAlmostEqual(ratio, 2)
+
+        out = StringIO()
+        bench.report(results, ratios, out)
+        lines = out.getvalue().splitlines()
+        self.assertIn('vs base', lines[0])
+        self.assertTrue(lines[1].endswith('2.00x'))
+        self.assertTrue(lines[-1].endswith('-'))
+
+    def test_compare_different_scale(self):
+        results = bench.run(0.001, 1, ['flat_dicts'])
+        baseline = dict(results, scale=0.002)
+        with self.assertRaises(Exception):
+            bench.compare(results, baseline)
+
+
+class BenchMainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'results.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_output_and_compare(self):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            bench_main.main(['--scale', '0.001', '--repeat', '1', '--workload', 'flat_dicts',
+                             '--output', self.path])
+            with open(self.path) as filehandle:
+                self.assertEqual(len(json.load(filehandle)['results']), 4)
+            bench_main.main(['--scale', '0.001', '--repeat', '1', '--workload', 'flat_dicts',
+                             '--compare', self.path])
+        self.assertIn('vs base', stdout.getvalue())
+
+    def test_run_module(self):
+        argv = ['awesojson.bench', '--scale', '0.001', '--repeat', '1', '--workload', 'flat_dicts']
+        with patch('sys.argv', argv), patch('sys.stdout', new_callable=StringIO) as stdout:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # The module is already imported
+                with self.assertRaises(SystemExit) as context:
+                    runpy.run_module('awesojson.bench', run_name='__main__')
+        self.assertIsNone(context.exception.code)
+        self.assertIn('flat_dicts', stdout.getvalue())
+
+    def test_compare_different_scale(self):
+        with open(self.path, 'w') as filehandle:
+            json.dump({'format': bench.RESULTS_FORMAT, 'scale': 1.0, 'results': []}, filehandle)
+        with patch('sys.stderr', new_callable=StringIO):
+            with self.assertRaises(SystemExit):
+                bench_main.main(['--scale', '0.001', '--compare', self.path])
@@ -0,0 +1,212 @@
+import collections
+import dataclasses
+import pickle
+import threading
+import unittest
+from unittest.mock import patch
+
+from awesojson import classes, codec, decoder, encoder, registry
+
+
+@dataclasses.dataclass
+class DataRecord(object):
+    id: int
+    name: str = 'default'
+    count: int = dataclasses.field(default=0, init=False)
+
+
+@dataclasses.dataclass(frozen=True)
+class FrozenRecord(object):
+    id: int
+    count: int = dataclasses.field(default=0, init=False)
+
+
+@dataclasses.dataclass
+class PlainRecord(object):
+    id: int
+    name: str
+
+
+TupleRecord = collections.namedtuple('TupleRecord', ['id', 'name'])
+
+
+class SlotsBase(object):
+    __slots__ = 'id'
+
+
+class SlotsRecord(SlotsBase):
+    __slots__ = ('name', '__secret', '__weakref__')
+
+
+class ImmutableSlotsRecord(object):
+    __slots__ = ('id',)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(name)
+
+
+class ClassFieldsTest(unittest.TestCase):
+
+    def test_dataclass(self):
+        self.assertEqual(classes.class_fields(DataRecord), (('id', 'name', 'count'), ('id', 'name')))
+
+    def test_namedtuple(self):
+        self.assertEqual(classes.class_fields(TupleRecord), (('id', 'name'), ('id', 'name')))
+
+    def test_slots(self):
+        self.assertEqual(classes.class_fields(SlotsRecord), (('id', 'name', '_SlotsRecord__secret'), None))
+
+    def test_not_a_record(self):
+        self.assertRaises(Exception, classes.class_fields, object)
+        self.assertRaises(Exception, classes.class_fields, 'not a type')
+
+
+class GeneratedCodecTest(unittest.TestCase):
+
+    def roundtrip(self, type_object, obj):
+        data = classes.make_encoder(type_object)(obj)
+        return data, classes.make_decoder(type_object)(data)
+
+    def test_dataclass(self):
+        record = DataRecord(1, 'one')
+        record.count = 3
+        data, result = self.roundtrip(DataRecord, record)
+        self.assertEqual(data, {'id': 1, 'name': 'one', 'count': 3})
+        self.assertEqual(result, record)
+        self.assertEqual(result.count, 3)
+
+    def test_dataclass_init_fields(self):
+        data, result = self.roundtrip(PlainRecord, PlainRecord(1, 'one'))
+        self.assertEqual(data, {'id': 1, 'name': 'one'})
+        self.assertEqual(result, PlainRecord(1, 'one'))
+
+    def test_frozen_dataclass(self):
+        record = FrozenRecord(1)
+        object.__setattr__(record, 'count', 3)
+        data, result = self.roundtrip(FrozenRecord, record)
+        self.assertEqual(result.count, 3)
+
+    def test_namedtuple(self):
+        data, result = self.roundtrip(TupleRecord, TupleRecord(1, 'one'))
+        self.assertEqual(data, {'id': 1, 'name': 'one'})
+        self.assertEqual(result, TupleRecord(1, 'one'))
+        self.assertIs(type(result), TupleRecord)
+
+    def test_slots(self):
+        record = SlotsRecord()
+        record.id = 1
+        record.name = 'one'
+        record._SlotsRecord__secret = 's'
+        data, result = self.roundtrip(SlotsRecord, record)
+        self.assertEqual(data, {'id': 1, 'name': 'one', '_SlotsRecord__secret': 's'})
+        self.assertEqual((result.id, result.name, result._SlotsRecord__secret), (1, 'one', 's'))
+
+    def test_pickle(self):
+        encoder_fct = pickle.loads(pickle.dumps(classes.make_encoder(TupleRecord)))
+        decoder_fct = pickle.loads(pickle.dumps(classes.make_decoder(TupleRecord)))
+        self.assertEqual(decoder_fct(encoder_fct(TupleRecord(1, 'one'))), TupleRecord(1, 'one'))
+        self.assertEqual(repr(encoder_fct), '<awesojson make_encoder for {0!r}>'.format(TupleRecord))
+
+    def test_pickle_registry(self):
+        registrations = registry.Registry(isolated=True)
+        registrations.register_encoder(classes.make_encoder(DataRecord), DataRecord, 'data')
+        registrations.register_decoder(classes.make_decoder(DataRecord), 'data')
+        inst = codec.Codec(registry=pickle.loads(pickle.dumps(registrations)))
+        self.assertEqual(inst.loads(inst.dumps([DataRecord(1)])), [DataRecord(1)])
+
+    def test_slots_setattr(self):
+        record = object.__new__(ImmutableSlotsRecord)
+        object.__setattr__(record, 'id', 1)
+        data, result = self.roundtrip(ImmutableSlotsRecord, record)
+        self.assertEqual(result.id, 1)
+
+
+class RegisteredContainerSubclassTest(unittest.TestCase):
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(classes.make_encoder(TupleRecord), TupleRecord, 'record')
+        decoder.AwesoJSONDecoder.register_decoder(classes.make_decoder(TupleRecord), 'record')
+
+    def test_roundtrip(self):
+        inst = codec.Codec()
+        value = {'a': [TupleRecord(1, TupleRecord(2, 'two'))], 'b': (1, 2), 'c': {'d': [3]}}
+        document = inst.dumps(value)
+        self.assertEqual(document.count('"awesojsontype": "record"'), 2)
+        self.assertEqual(inst.loads(document),
+                         {'a': [TupleRecord(1, TupleRecord(2, 'two'))], 'b': [1, 2], 'c': {'d': [3]}})
+
+    def test_unregistered_subclass(self):
+        other = collections.namedtuple('Other', ['value'])
+        inst = codec.Codec()
+        self.assertEqual(inst.loads(inst.dumps(other(TupleRecord(1, 'one')))), [TupleRecord(1, 'one')])
+        self.assertEqual(inst.dumps(other(1)), '[1]')
+
+    def test_documents_without_instances_are_not_rebuilt(self):
+        inst = encoder.AwesoJSONEncoder()
+        document = {'a': [1, {'b': (2, threading.Lock())}], 'c': collections.OrderedDict(d=[3])}
+        self.assertFalse(inst._has_tagged_containers(document))
+        with patch.object(encoder.AwesoJSONEncoder, '_tag_containers') as tag_containers_mock:
+            self.assertEqual(inst.encode({'a': [1, (2, 3)]}), '{"a": [1, [2, 3]]}')
+        self.assertEqual(tag_containers_mock.call_count, 0)
+
+    def test_instances_are_found(self):
+        inst = encoder.AwesoJSONEncoder()
+        self.assertTrue(inst._has_tagged_containers(TupleRecord(1, 'one')))
+        self.assertTrue(inst._has_tagged_containers([{'a': (1, TupleRecord(1, 'one'))}]))
+        self.assertTrue(inst._has_tagged_containers(collections.OrderedDict(a=[TupleRecord(1, 'one')])))
+
+    def test_payloads_are_scanned(self):
+        class Holder(object):
+            pass
+
+        encoder.AwesoJSONEncoder.register_encoder(lambda obj: {'items': [TupleRecord(1, 'one')]}, Holder, 'holder')
+        inst = encoder.AwesoJSONEncoder()
+        expected = ('{"awesojsontype": "holder", "data": {"items": [{"awesojsontype": "record", '
+                    '"data": {"id": 1, "name": "one"}}]}}')
+        self.assertEqual(inst.encode(Holder()), expected)
+        self.assertEqual(''.join(inst.iterencode(Holder())), expected)
+        self.assertEqual(inst._payloads, None)
+        with patch.object(encoder.AwesoJSONEncoder, '_tag_containers') as tag_containers_mock:
+            self.assertEqual(inst.encode([1, (2, 3)]), '[1, [2, 3]]')
+        self.assertEqual(tag_containers_mock.call_count, 0)
+
+    def test_may_hold_container_subclasses(self):
+        self.assertFalse(encoder._may_hold_container_subclasses({'a': [1, 'b', None], 'c': {}}, 256))
+        self.assertTrue(encoder._may_hold_container_subclasses({'a': [1, (2, TupleRecord(1, 'one'))]}, 256))
+        self.assertTrue(encoder._may_hold_container_subclasses([collections.OrderedDict()], 256))
+        self.assertIsNone(encoder._may_hold_container_subclasses({'a': list(range(10))}, 5))
+
+    def test_too_deep_document(self):
+        inst = encoder.AwesoJSONEncoder()
+        document = []
+        for _ in range(100000):
+            document = [document]
+        self.assertTrue(inst._has_tagged_containers(document))
+
+    def test_circular_document(self):
+        inst = encoder.AwesoJSONEncoder()
+        document = [1]
+        document.append(document)
+        self.assertFalse(inst._has_tagged_containers(document))
+        with self.assertRaisesRegex(ValueError, 'Circular reference detected'):
+            inst.encode(document)
+
+    def test_circular_document_with_instances(self):
+        inst = encoder.AwesoJSONEncoder()
+        document = [TupleRecord(1, 'one')]
+        document.append(document)
+        with self.assertRaisesRegex(ValueError, 'Circular reference detected'):
+            inst.encode(document)
+        document = {'record': TupleRecord(1, 'one')}
+        document['self'] = document
+        with self.assertRaisesRegex(ValueError, 'Circular reference detected'):
+            inst.encode(document)
+        inst = encoder.AwesoJSONEncoder(check_circular=False)
+        self.assertRaises(RecursionError, inst.encode, document)
+
+    def test_share_references(self):
+        inst = codec.Codec(encoder_kwargs={'share_references': True})
+        shared = TupleRecord(1, 'one')
+        result = inst.loads(inst.dumps([shared, shared]))
+        self.assertIs(result[0], result[1])
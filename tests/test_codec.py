@@ -0,0 +1,310 @@
+import unittest
+
+import io
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from awesojson import codec, decoder, encoder
+
+
+class CodecTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: x.value, self.DummyClass, 'dummy')
+        decoder.AwesoJSONDecoder.register_decoder(self.DummyClass, 'dummy')
+
+    def test_dumps_loads_roundtrip(self):
+        inst = codec.Codec()
+        result = inst.loads(inst.dumps([self.DummyClass(1), {'a': 2}]))
+        self.assertEqual(result[0].value, 1)
+        self.assertEqual(result[1], {'a': 2})
+
+    def test_dump_load_roundtrip(self):
+        inst = codec.Codec()
+        stream = StringIO()
+        inst.dump(self.DummyClass('foo'), stream)
+        stream.seek(0)
+        self.assertEqual(inst.load(stream).value, 'foo')
+
+    def test_oob_roundtrip(self):
+        inst = codec.Codec()
+        document, buffers = inst.dumps_oob([self.DummyClass(b'xy'), b'z'])
+        self.assertEqual(len(buffers), 2)
+        result = inst.loads_oob(document.encode('utf-8'), buffers)
+        self.assertEqual(result[0].value.tobytes(), b'xy')
+        self.assertEqual(result[1].tobytes(), b'z')
+
+    def test_compact_types_roundtrip(self):
+        inst = codec.Codec(encoder_kwargs={'compact_types': True})
+        document = inst.dumps([self.DummyClass(1), self.DummyClass(2)])
+        self.assertEqual(document.count('dummy'), 1)
+        self.assertEqual([obj.value for obj in inst.loads(document)], [1, 2])
+
+    def test_compact_types_dump_iter(self):
+        for encoder_kwargs in ({'compact_types': True}, {'share_references': True}):
+            inst = codec.Codec(encoder_kwargs=encoder_kwargs)
+            stream = StringIO()
+            self.assertRaises(Exception, inst.dump_iter, iter([self.DummyClass(1), 2]), stream)
+            self.assertEqual(stream.getvalue(), '')
+
+    def test_share_references_roundtrip(self):
+        inst = codec.Codec(encoder_kwargs={'share_references': True})
+        shared = self.DummyClass({'big': list(range(100))})
+        result = inst.loads(inst.dumps([shared] * 10))
+        self.assertEqual(result[0].value, {'big': list(range(100))})
+        self.assertTrue(all(obj is result[0] for obj in result))
+
+    def test_columnar_roundtrip(self):
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: {'v': x.value}, self.DummyClass, 'dummy')
+        decoder.AwesoJSONDecoder.register_decoder(lambda data: self.DummyClass(data['v']), 'dummy')
+        inst = codec.Codec(encoder_kwargs={'columnar': True, 'compact_types': True})
+        document = inst.dumps({'records': [self.DummyClass(i) for i in range(100)]})
+        self.assertEqual(document.count('"v"'), 1)
+        result = inst.loads(document)
+        self.assertEqual([obj.value for obj in result['records']], list(range(100)))
+
+    def test_encoder_kwargs_used(self):
+        inst = codec.Codec(encoder_kwargs={'sort_keys': True, 'separators': (',', ':')})
+        self.assertEqual(inst.dumps({'b': 1, 'a': 2}), '{"a":2,"b":1}')
+
+    def test_decoder_kwargs_used(self):
+        inst = codec.Codec(decoder_kwargs={'parse_int': str})
+        self.assertEqual(inst.loads('[1]'), ['1'])
+
+    def test_loads_bytes(self):
+        inst = codec.Codec()
+        self.assertEqual(inst.loads(b'{"a": 1}'), {'a': 1})
+        self.assertEqual(inst.loads(bytearray(b'{"a": 1}')), {'a': 1})
+        self.assertEqual(inst.loads(memoryview(b'{"a": 1}')), {'a': 1})
+
+    def test_load_binary_file(self):
+        inst = codec.Codec()
+        self.assertEqual(inst.load(io.BytesIO(b'{"a": 1}')), {'a': 1})
+
+    def test_dumpb(self):
+        inst = codec.Codec(encoder_kwargs={'ensure_ascii': False})
+        result = inst.dumpb([self.DummyClass(u'\u00e9')])
+        self.assertEqual(result, u'[{"awesojsontype": "dummy", "data": "\u00e9"}]'.encode('utf-8'))
+
+    def test_dumpb_into(self):
+        inst = codec.Codec()
+        buf = bytearray(b'prefix:')
+        result = inst.dumpb(list(range(20000)), into=buf)
+        self.assertIs(result, buf)
+        self.assertEqual(bytes(buf), b'prefix:' + json.dumps(list(range(20000))).encode('utf-8'))
+
+    def test_dumpb_into_non_ascii(self):
+        inst = codec.Codec(encoder_kwargs={'ensure_ascii': False})
+        value = [u'\u00e9\u4e2d' * 7] * 5000
+        result = inst.dumpb(value, into=bytearray())
+        self.assertEqual(bytes(result), json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+    def test_instances_are_reused(self):
+        inst = codec.Codec()
+        encoder_inst, decoder_inst = inst.encoder, inst.decoder
+        inst.loads(inst.dumps(self.DummyClass(1)))
+        self.assertIs(inst.encoder, encoder_inst)
+        self.assertIs(inst.decoder, decoder_inst)
+
+
+class CodecIterloadTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(self.DummyClass, 'dummy')
+
+    def iterload(self, document, chunk_size):
+        return list(codec.Codec().iterload(StringIO(document), chunk_size))
+
+    def test_elements(self):
+        document = ' [1, 12345, "a,]b", {"c": [1, 2]}, [], null, true, 1.5e3, -0.25, 1E-2,1.0] '
+        for chunk_size in (1, 2, 3, 4, 5, 7, 1024):
+            self.assertEqual(self.iterload(document, chunk_size),
+                             [1, 12345, 'a,]b', {'c': [1, 2]}, [], None, True, 1500.0, -0.25, 0.01, 1.0])
+
+    def test_float_elements_chunk_offsets(self):
+        for offset in range(12):
+            document = ' ' * offset + '[' + ', '.join(['1.25e10'] * 50) + ']'
+            self.assertEqual(self.iterload(document, 16), [1.25e10] * 50)
+
+    def test_tagged_elements(self):
+        document = '[{"awesojsontype": "dummy", "data": 1}, {"awesojsontype": "dummy", "data": 2}]'
+        result = self.iterload(document, 5)
+        self.assertEqual([obj.value for obj in result], [1, 2])
+
+    def test_empty_array(self):
+        self.assertEqual(self.iterload(' [ ] ', 1), [])
+
+    def test_is_lazy(self):
+        stream = StringIO('[1, 2, ' + '3, ' * 1000 + '4]')
+        iterator = codec.Codec().iterload(stream, 4)
+        self.assertEqual(next(iterator), 1)
+        self.assertTrue(stream.tell() < 20)
+
+    def test_bytes_stream(self):
+        stream = io.BytesIO(u'["\u00e9t\u00e9", "\u20ac"]'.encode('utf-8'))
+        self.assertEqual(list(codec.Codec().iterload(stream, 1)), [u'\u00e9t\u00e9', u'\u20ac'])
+
+    def test_bytes_stream_encodings(self):
+        document = u'[1.5, "\u00e9t\u00e9", "\u20ac"]'
+        for encoding in ('utf-8-sig', 'utf-16', 'utf-16-le', 'utf-16-be', 'utf-32', 'utf-32-le', 'utf-32-be'):
+            for chunk_size in (1, 3, 1024):
+                stream = io.BytesIO(document.encode(encoding))
+                self.assertEqual(list(codec.Codec().iterload(stream, chunk_size)), [1.5, u'\u00e9t\u00e9', u'\u20ac'])
+
+    def test_short_bytes_stream(self):
+        self.assertEqual(list(codec.Codec().iterload(io.BytesIO(b'[]'), 1)), [])
+
+    def test_not_an_array(self):
+        self.assertRaises(ValueError, self.iterload, '{"a": 1}', 2)
+
+    def test_empty_document(self):
+        self.assertRaises(ValueError, self.iterload, '', 2)
+
+    def test_missing_delimiter(self):
+        self.assertRaises(ValueError, self.iterload, '[1 2]', 2)
+
+    def test_trailing_comma(self):
+        self.assertRaises(ValueError, self.iterload, '[1, 2,]', 2)
+
+    def test_truncated_document(self):
+        self.assertRaises(ValueError, self.iterload, '[1, {"a": 2', 2)
+
+    def test_extra_data(self):
+        self.assertRaises(ValueError, self.iterload, '[1, 2] 3', 2)
+
+
+class CodecDumpIterTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: x.value, self.DummyClass, 'dummy')
+
+    def dump_iter(self, values, buffer_size=1024, **encoder_kwargs):
+        stream = StringIO()
+        codec.Codec(encoder_kwargs=encoder_kwargs).dump_iter(iter(values), stream, buffer_size)
+        return stream.getvalue()
+
+    def test_elements(self):
+        values = [1, 'a', {'b': [1, 2]}, None]
+        self.assertEqual(self.dump_iter(values), json.dumps(values))
+
+    def test_empty(self):
+        self.assertEqual(self.dump_iter([]), '[]')
+        self.assertEqual(self.dump_iter([], indent=2), json.dumps([], indent=2))
+
+    def test_generator(self):
+        result = self.dump_iter(self.DummyClass(i) for i in range(3))
+        self.assertEqual(json.loads(result),
+                         [{'awesojsontype': 'dummy', 'data': i} for i in range(3)])
+
+    def test_indent(self):
+        values = [1, {'b': [1, 'x\ny']}, []]
+        for indent in (0, 2, '\t'):
+            self.assertEqual(self.dump_iter(values, indent=indent),
+                             json.dumps(values, indent=indent))
+
+    def test_separators(self):
+        values = [1, {'b': 2}]
+        self.assertEqual(self.dump_iter(values, separators=(',', ':')),
+                         json.dumps(values, separators=(',', ':')))
+
+    def test_writes_are_buffered(self):
+        stream = StringIO()
+        with patch.object(stream, 'write', wraps=stream.write) as write_mock:
+            codec.Codec().dump_iter(iter(range(1000)), stream, 1024)
+        self.assertTrue(write_mock.call_count <= len(stream.getvalue()) // 1024 + 1)
+        self.assertEqual(json.loads(stream.getvalue()), list(range(1000)))
+
+
+class CodecLinesTest(unittest.TestCase):
+
+    def test_dump_lines(self):
+        stream = StringIO()
+        codec.Codec().dump_lines(iter([1, {'a': 'b\nc'}]), stream)
+        self.assertEqual(stream.getvalue(), '1\n{"a": "b\\nc"}\n')
+
+    def test_dump_lines_indent(self):
+        inst = codec.Codec(encoder_kwargs={'indent': 2})
+        self.assertRaises(Exception, inst.dump_lines, [1], StringIO())
+
+    def test_load_lines(self):
+        stream = StringIO('1\n\n{"a": "b\\nc"}\n  \n[]')
+        self.assertEqual(list(codec.Codec().load_lines(stream)), [1, {'a': 'b\nc'}, []])
+
+
+class CodecPathTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(self.DummyClass, 'dummy')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_file(self, content):
+        path = os.path.join(self.directory, 'document.json')
+        with open(path, 'wb') as filehandle:
+            filehandle.write(content)
+        return path
+
+    def test_load_path(self):
+        path = self.make_file(u'[{"awesojsontype": "dummy", "data": "\u00e9"}, 1]'.encode('utf-8'))
+        for mmap in (True, False):
+            result = codec.Codec().load_path(path, mmap=mmap)
+            self.assertEqual(result[0].value, u'\u00e9')
+            self.assertEqual(result[1], 1)
+
+    def test_load_path_empty_file(self):
+        path = self.make_file(b'')
+        self.assertRaises(ValueError, codec.Codec().load_path, path)
+
+    def test_iterload_path(self):
+        path = self.make_file(b'[{"awesojsontype": "dummy", "data": 1}, 2, [3]]')
+        for mmap in (True, False):
+            result = list(codec.Codec().iterload_path(path, mmap=mmap, chunk_size=4))
+            self.assertEqual(result[0].value, 1)
+            self.assertEqual(result[1:], [2, [3]])
+
+    def test_iterload_path_bom(self):
+        path = self.make_file(u'[1, "\u00e9"]'.encode('utf-8-sig'))
+        for mmap in (True, False):
+            self.assertEqual(list(codec.Codec().iterload_path(path, mmap=mmap, chunk_size=2)), [1, u'\u00e9'])
+
+    def test_iterload_path_empty_file(self):
+        path = self.make_file(b'')
+        self.assertRaises(ValueError, list, codec.Codec().iterload_path(path))
@@ -0,0 +1,24 @@
+import unittest
+from awesojson import utils
+
+
+class DecodeBytesTest(unittest.TestCase):
+
+    def test_decode_bytes_utf8(self):
+        value = u'{"a": "é"}'.encode('utf-8')
+        self.assertEqual(utils.decode_bytes(value), u'{"a": "é"}')
+
+    def test_decode_bytes_utf8_bom(self):
+        value = u'{"a": 1}'.encode('utf-8-sig')
+        self.assertEqual(utils.decode_bytes(value), u'{"a": 1}')
+
+    def test_decode_bytes_utf16(self):
+        value = u'{"a": 1}'.encode('utf-16-le')
+        self.assertEqual(utils.decode_bytes(value), u'{"a": 1}')
+
+    def test_decode_bytearray(self):
+        self.assertEqual(utils.decode_bytes(bytearray(b'[1]')), u'[1]')
+
+    def test_decode_memoryview(self):
+        value = memoryview(b'xx[1, 2]xx')[2:-2]
+        self.assertEqual(utils.decode_bytes(value), u'[1, 2]')
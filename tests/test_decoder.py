@@ -1,49 +1,53 @@
+import collections
+import json
 import unittest
-from awesojson import decoder
+from unittest.mock import patch
+
+from awesojson import decoder, lazy
 
 
 class AwesoJSONDecoderRegisterTest(unittest.TestCase):
 
     def setUp(self):
-        decoder.AwesoJSONDecoder._decoder_table.clear()
+        decoder.AwesoJSONDecoder.registry.clear()
 
     def test_basic_registration(self):
         f = lambda x: x
         decoder.AwesoJSONDecoder.register_decoder(f, 'test.name')
-        self.assertEquals(decoder.AwesoJSONDecoder._decoder_table,
+        self.assertEquals(decoder.AwesoJSONDecoder.registry.snapshot().decoders,
                           {'test.name': f})
 
     def test_None_fct_registration(self):
         decoder.AwesoJSONDecoder.register_decoder(None, 'test.name')
-        self.assertEquals(decoder.AwesoJSONDecoder._decoder_table,
+        self.assertEquals(decoder.AwesoJSONDecoder.registry.snapshot().decoders,
                           {'test.name': None})
 
     def test_None_type_identifier_registration(self):
         f = lambda x: x
         decoder.AwesoJSONDecoder.register_decoder(f, None)
-        self.assertEquals(decoder.AwesoJSONDecoder._decoder_table,
+        self.assertEquals(decoder.AwesoJSONDecoder.registry.snapshot().decoders,
                           {None: f})
 
 
 class AwesoJSONDecoderGetEncoderTest(unittest.TestCase):
 
     def setUp(self):
-        decoder.AwesoJSONDecoder._decoder_table.clear()
+        decoder.AwesoJSONDecoder.registry.clear()
 
     def test_basic_register_get(self):
         f = lambda x: x
-        decoder.AwesoJSONDecoder._decoder_table = {'test.name': f}
+        decoder.AwesoJSONDecoder.register_decoder(f, 'test.name')
         result = decoder.AwesoJSONDecoder.get_decoder('test.name')
         self.assertEquals(result, f)
 
     def test_type_None_register_get(self):
         f = lambda x: x
-        decoder.AwesoJSONDecoder._decoder_table = {None: f}
+        decoder.AwesoJSONDecoder.register_decoder(f, None)
         result = decoder.AwesoJSONDecoder.get_decoder(None)
         self.assertEquals(result, f)
 
     def test_explicit_None_register_get(self):
-        decoder.AwesoJSONDecoder._decoder_table = {'test.name': None}
+        decoder.AwesoJSONDecoder.register_decoder(None, 'test.name')
         result = decoder.AwesoJSONDecoder.get_decoder('test.name')
         self.assertEquals(result, None)
 
@@ -55,7 +59,7 @@ class AwesoJSONDecoderGetEncoderTest(unittest.TestCase):
 class AwesoJSONDecoderObjectHandler(unittest.TestCase):
 
     def setUp(self):
-        decoder.AwesoJSONDecoder._decoder_table.clear()
+        decoder.AwesoJSONDecoder.registry.clear()
 
     def test_empty_table_object_handler(self):
         inst = decoder.AwesoJSONDecoder()
@@ -63,19 +67,487 @@ class AwesoJSONDecoderObjectHandler(unittest.TestCase):
                           {'awesojsontype': 'foo', 'data': 'bar'})
 
     def test_no_function_registrered_object_handler(self):
-        decoder.AwesoJSONDecoder._decoder_table['not_foo'] = lambda x: str(x)
+        decoder.AwesoJSONDecoder.register_decoder(lambda x: str(x), 'not_foo')
         inst = decoder.AwesoJSONDecoder()
         self.assertRaises(Exception, inst.object_handler,
                           {'awesojsontype': 'foo', 'data': 'bar'})
 
     def test_basic_object_handler(self):
-        decoder.AwesoJSONDecoder._decoder_table['foo'] = lambda x: x
+        decoder.AwesoJSONDecoder.register_decoder(lambda x: x, 'foo')
         inst = decoder.AwesoJSONDecoder()
         result = inst.object_handler({'awesojsontype': 'foo', 'data': 'bar'})
         self.assertEquals(result, 'bar')
 
     def test_no_awesojsontype_object_handler(self):
-        decoder.AwesoJSONDecoder._decoder_table['foo'] = lambda x: x
+        decoder.AwesoJSONDecoder.register_decoder(lambda x: x, 'foo')
         inst = decoder.AwesoJSONDecoder()
         result = inst.object_handler({'data': 'bar'})
         self.assertEquals(result, {'data': 'bar'})
+
+
+class AwesoJSONDecoderPrescanTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(lambda x: 'decoded ' + x, 'foo')
+
+    def test_untagged_document_skips_object_handler(self):
+        with patch('awesojson.decoder.AwesoJSONDecoder.object_handler') as object_handler_mock:
+            inst = decoder.AwesoJSONDecoder(prescan=True)
+            result = inst.decode('{"a": [{"b": 1}]}')
+        self.assertFalse(object_handler_mock.called)
+        self.assertEqual(result, {'a': [{'b': 1}]})
+
+    def test_untagged_document_without_prescan_calls_object_handler(self):
+        with patch('awesojson.decoder.AwesoJSONDecoder.object_handler') as object_handler_mock:
+            inst = decoder.AwesoJSONDecoder()
+            inst.decode('{"a": 1}')
+        self.assertTrue(object_handler_mock.called)
+
+    def test_tagged_document(self):
+        inst = decoder.AwesoJSONDecoder(prescan=True)
+        result = inst.decode('[{"a": 1}, {"awesojsontype": "foo", "data": "bar"}]')
+        self.assertEqual(result, [{'a': 1}, 'decoded bar'])
+
+    def test_escaped_tag_document(self):
+        inst = decoder.AwesoJSONDecoder(prescan=True)
+        result = inst.decode('{"awesojson\\u0074ype": "foo", "data": "bar"}')
+        self.assertEqual(result, 'decoded bar')
+
+    def test_kwargs_kept_for_untagged_document(self):
+        inst = decoder.AwesoJSONDecoder(prescan=True, parse_int=str)
+        self.assertEqual(inst.decode('[1]'), ['1'])
+
+
+class AwesoJSONDecoderCompactTypesTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(lambda x: 'foo ' + x, 'foo')
+        decoder.AwesoJSONDecoder.register_decoder(lambda x: 'bar ' + x, 'bar')
+
+    def test_type_table(self):
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode(
+            ' { "awesojsontypes" : ["foo", "bar"] , "awesojsondoc" : ['
+            '{"awesojsontype": 1, "data": "a"}, {"awesojsontype": 0, "data": "b"}, '
+            '{"awesojsontype": "foo", "data": "c"}, {"d": 1}] } '
+        )
+        self.assertEqual(result, ['bar a', 'foo b', 'foo c', {'d': 1}])
+
+    def test_type_table_resolved_once(self):
+        with patch('awesojson.registry.Registry.get_decoder',
+                   return_value=lambda x: x) as get_decoder_mock:
+            inst = decoder.AwesoJSONDecoder()
+            result = inst.decode('{"awesojsontypes": ["foo"], "awesojsondoc": ['
+                                 '{"awesojsontype": 0, "data": 1}, {"awesojsontype": 0, "data": 2}]}')
+        self.assertEqual(result, [1, 2])
+        self.assertEqual(get_decoder_mock.call_count, 1)
+
+    def test_unregistered_type(self):
+        inst = decoder.AwesoJSONDecoder()
+        for tag in ('0', '1', '"baz"'):
+            self.assertRaises(Exception, inst.decode,
+                              '{"awesojsontypes": ["baz"], "awesojsondoc": '
+                              '{"awesojsontype": %s, "data": "a"}}' % tag)
+
+    def test_plain_document(self):
+        inst = decoder.AwesoJSONDecoder()
+        for document in ('{"awesojsontypes": 1, "x": 2}',
+                         '{"awesojsontypes": "foo", "awesojsondoc": 1}',
+                         '{"awesojsontypes": ["foo"], "other": 1}',
+                         '{"awesojsontypes": ["foo"], "awesojsondoc": 1, "other": 1}',
+                         '{"awesojsontypes": {"a": [1]}, "awesojsondoc": 1}'):
+            self.assertEqual(inst.decode(document), json.loads(document))
+        selecting = decoder.AwesoJSONDecoder(select=['x'])
+        self.assertEqual(selecting.decode('{"awesojsontypes": 1, "x": 2}'), {'x': 2})
+
+    def test_invalid_type_table(self):
+        inst = decoder.AwesoJSONDecoder()
+        for document in ('{"awesojsontypes": ["foo"], "awesojsondoc": }',
+                         '{"awesojsontypes": ["foo"], "awesojsondoc": 1',
+                         '{"awesojsontypes": [1, }'):
+            self.assertRaises(ValueError, inst.decode, document)
+
+    def test_prescan_type_table(self):
+        inst = decoder.AwesoJSONDecoder(prescan=True)
+        result = inst.decode('{"awesojsontypes": ["foo"], "awesojsondoc": '
+                             '{"awesojsontype": 0, "data": "a"}}')
+        self.assertEqual(result, 'foo a')
+
+
+class AwesoJSONDecoderReferencesTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(self.DummyClass, 'dummy')
+
+    def test_references(self):
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode(
+            '{"awesojsontypes": ["dummy"], "awesojsondoc": ['
+            '{"awesojsontype": 0, "awesojsonid": 0, "data": ['
+            '{"awesojsontype": 0, "awesojsonid": 1, "data": "inner"}]}, '
+            '{"awesojsonref": 1}, {"awesojsonref": 0}]}'
+        )
+        self.assertIs(result[0].value[0], result[1])
+        self.assertIs(result[0], result[2])
+
+    def test_unknown_reference(self):
+        inst = decoder.AwesoJSONDecoder()
+        self.assertRaises(Exception, inst.decode,
+                          '{"awesojsontypes": ["dummy"], "awesojsondoc": ['
+                          '{"awesojsontype": 0, "awesojsonid": 0, "data": 1}, {"awesojsonref": 1}]}')
+
+
+class AwesoJSONDecoderArgumentsTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, a, b):
+            self.a = a
+            self.b = b
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+
+    def test_kwargs(self):
+        decoder.AwesoJSONDecoder.register_decoder(self.DummyClass, 'dummy', arguments='kwargs')
+        result = decoder.AwesoJSONDecoder().decode('{"awesojsontype": "dummy", "data": {"a": 1, "b": 2}}')
+        self.assertEqual((result.a, result.b), (1, 2))
+
+    def test_pairs(self):
+        decoder.AwesoJSONDecoder.register_decoder(list, 'dummy', arguments='pairs')
+        result = decoder.AwesoJSONDecoder().decode('{"awesojsontype": "dummy", "data": {"a": 1, "b": 2}}')
+        self.assertEqual(result, [('a', 1), ('b', 2)])
+
+    def test_unknown_arguments(self):
+        self.assertRaises(Exception, decoder.AwesoJSONDecoder.register_decoder,
+                          self.DummyClass, 'dummy', arguments='args')
+        self.assertIsNone(decoder.AwesoJSONDecoder.get_decoder('dummy'))
+
+
+class AwesoJSONDecoderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        self.calls = []
+
+    def decode_fct(self, data):
+        self.calls.append(data)
+        return ('decoded', data)
+
+    def test_cache(self):
+        decoder.AwesoJSONDecoder.register_decoder(self.decode_fct, 'dummy', cache_size=2)
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('[{"awesojsontype": "dummy", "data": "EUR"}, '
+                             '{"awesojsontype": "dummy", "data": "EUR"}]')
+        self.assertIs(result[0], result[1])
+        self.assertIs(inst.decode('{"awesojsontype": "dummy", "data": "EUR"}'), result[0])
+        self.assertEqual(self.calls, ['EUR'])
+        cache_info = decoder.AwesoJSONDecoder.get_cache_info('dummy')
+        self.assertEqual((cache_info.hits, cache_info.misses, cache_info.maxsize, cache_info.currsize),
+                         (2, 1, 2, 1))
+
+    def test_cache_eviction(self):
+        decoder.AwesoJSONDecoder.register_decoder(self.decode_fct, 'dummy', cache_size=2)
+        inst = decoder.AwesoJSONDecoder()
+        inst.decode('[{"awesojsontype": "dummy", "data": 1}, {"awesojsontype": "dummy", "data": 2}, '
+                    '{"awesojsontype": "dummy", "data": 3}, {"awesojsontype": "dummy", "data": 1}]')
+        self.assertEqual(self.calls, [1, 2, 3, 1])
+        self.assertEqual(decoder.AwesoJSONDecoder.get_cache_info('dummy').currsize, 2)
+
+    def test_cache_key_types(self):
+        decoder.AwesoJSONDecoder.register_decoder(self.decode_fct, 'dummy', cache_size=8)
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('[{"awesojsontype": "dummy", "data": 1}, {"awesojsontype": "dummy", "data": 1.0}, '
+                             '{"awesojsontype": "dummy", "data": true}]')
+        self.assertEqual([type(data) for _, data in result], [int, float, bool])
+
+    def test_cache_containers(self):
+        decoder.AwesoJSONDecoder.register_decoder(self.decode_fct, 'dummy', cache_size=8)
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('[{"awesojsontype": "dummy", "data": {"a": [1, 2], "b": null}}, '
+                             '{"awesojsontype": "dummy", "data": {"b": null, "a": [1, 2]}}, '
+                             '{"awesojsontype": "dummy", "data": [[1, 2]]}]')
+        self.assertIs(result[0], result[1])
+        self.assertEqual(self.calls, [{'a': [1, 2], 'b': None}, [[1, 2]]])
+
+    def test_cache_unhashable(self):
+        decoder.AwesoJSONDecoder.register_decoder(self.decode_fct, 'dummy', cache_size=8)
+        decoder.AwesoJSONDecoder.register_decoder(set, 'set')
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('[{"awesojsontype": "dummy", "data": {"awesojsontype": "set", "data": [1]}}, '
+                             '{"awesojsontype": "dummy", "data": {"awesojsontype": "set", "data": [1]}}]')
+        self.assertEqual(result, [('decoded', set([1])), ('decoded', set([1]))])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_cache_kwargs(self):
+        decoder.AwesoJSONDecoder.register_decoder(dict, 'dummy', arguments='kwargs', cache_size=8)
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('[{"awesojsontype": "dummy", "data": {"a": 1}}, '
+                             '{"awesojsontype": "dummy", "data": {"a": 1}}]')
+        self.assertEqual(result[0], {'a': 1})
+        self.assertIs(result[0], result[1])
+
+    def test_no_cache(self):
+        decoder.AwesoJSONDecoder.register_decoder(self.decode_fct, 'dummy')
+        self.assertIsNone(decoder.AwesoJSONDecoder.get_cache_info('dummy'))
+        self.assertIsNone(decoder.AwesoJSONDecoder.get_cache_info('unknown'))
+
+    def test_invalid_cache_size(self):
+        self.assertRaises(Exception, decoder.AwesoJSONDecoder.register_decoder,
+                          self.decode_fct, 'dummy', cache_size=0)
+
+
+class AwesoJSONDecoderLazyTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        self.calls = []
+        decoder.AwesoJSONDecoder.register_decoder(self.decode_fct, 'dummy')
+
+    def decode_fct(self, data):
+        self.calls.append(data)
+        return ('decoded', data)
+
+    def test_lazy(self):
+        inst = decoder.AwesoJSONDecoder(lazy=True)
+        result = inst.decode('[{"awesojsontype": "dummy", "data": 1}, {"awesojsontype": "dummy", "data": 2}]')
+        self.assertIs(type(result[0]), lazy.LazyObject)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(result[1][0], 'decoded')
+        self.assertEqual(self.calls, [2])
+
+    def test_lazy_batch(self):
+        inst = decoder.AwesoJSONDecoder(lazy=True)
+        result = inst.decode('{"awesojsontype": "dummy", "awesojsonbatch": [1, 2]}')
+        self.assertEqual(result, [('decoded', 1), ('decoded', 2)])
+
+    def test_lazy_compact_references(self):
+        inst = decoder.AwesoJSONDecoder(lazy=True)
+        result = inst.decode('{"awesojsontypes": ["dummy"], "awesojsondoc": ['
+                             '{"awesojsontype": 0, "awesojsonid": 0, "data": 1}, {"awesojsonref": 0}]}')
+        self.assertIs(result[0], result[1])
+        self.assertIs(type(result[0]), lazy.LazyObject)
+        self.assertEqual(lazy.resolve(result), [('decoded', 1), ('decoded', 1)])
+        self.assertEqual(self.calls, [1])
+
+    def test_lazy_pairs(self):
+        inst = decoder.AwesoJSONDecoder(lazy=True, pairs=True)
+        result = inst.decode('{"awesojsontype": "dummy", "data": 1}')
+        self.assertIs(type(result), lazy.LazyObject)
+        self.assertEqual(lazy.decoded(result), ('decoded', 1))
+
+
+class AwesoJSONDecoderSelectTest(unittest.TestCase):
+
+    document = ('{"meta": {"ts": {"awesojsontype": "dummy", "data": 1}, "other": 2}, '
+                '"items": [{"id": 1, "price": {"awesojsontype": "dummy", "data": 10}}, '
+                '{"id": 2, "price": {"awesojsontype": "dummy", "data": 20}}, {"name": "x"}]}')
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        self.calls = []
+        decoder.AwesoJSONDecoder.register_decoder(self.decode_fct, 'dummy')
+
+    def decode_fct(self, data):
+        self.calls.append(data)
+        return ('decoded', data)
+
+    def test_parse_selection(self):
+        self.assertEqual(decoder.parse_selection(['items[*].id', 'items[*].name', 'meta', 'meta.ts', 'm[0][2]']),
+                         {'items': {'[*]': {'id': None, 'name': None}}, 'meta': None, 'm': {0: {2: None}}})
+
+    def test_parse_invalid_selection(self):
+        for path in ('', 'a..b', '.a', 'a.', 'a[x]', 'a['):
+            self.assertRaises(Exception, decoder.parse_selection, [path])
+
+    def test_select(self):
+        inst = decoder.AwesoJSONDecoder(select=['items[*].id', 'meta.ts'])
+        self.assertEqual(inst.decode(self.document),
+                         {'meta': {'ts': ('decoded', 1)}, 'items': [{'id': 1}, {'id': 2}, {}]})
+        self.assertEqual(self.calls, [1])
+
+    def test_select_indexes(self):
+        inst = decoder.AwesoJSONDecoder(select=['items[1]', 'items[0].price', 'items[5]', 'items.id'])
+        self.assertEqual(inst.decode(self.document),
+                         {'items': [{'price': ('decoded', 10)},
+                                    {'id': 2, 'price': ('decoded', 20)}]})
+        self.assertEqual(self.calls, [10, 20])
+
+    def test_select_through_tagged_object(self):
+        inst = decoder.AwesoJSONDecoder(select=['meta.ts.data', 'meta.other.x', 'missing.x'])
+        self.assertEqual(inst.decode(self.document), {'meta': {'ts': ('decoded', 1), 'other': 2}})
+
+    def test_select_whole_list(self):
+        inst = decoder.AwesoJSONDecoder(select=['items'])
+        result = inst.decode('{"items": [{"awesojsontype": "dummy", "data": 1}, [2, {"a": [3]}]], "other": 4}')
+        self.assertEqual(result, {'items': [('decoded', 1), [2, {'a': [3]}]]})
+
+    def test_select_checks_document(self):
+        inst = decoder.AwesoJSONDecoder(select=['meta'])
+        self.assertRaises(ValueError, inst.decode, '{"meta": 1, "other": [1, }')
+
+    def test_select_prescan(self):
+        inst = decoder.AwesoJSONDecoder(prescan=True, select=['a'])
+        self.assertEqual(inst.decode('{"a": {"b": 1}, "c": 2}'), {'a': {'b': 1}})
+
+    def test_select_compact_types(self):
+        inst = decoder.AwesoJSONDecoder(select=['a[1]'])
+        result = inst.decode('{"awesojsontypes": ["dummy"], "awesojsondoc": '
+                             '{"a": [{"awesojsontype": 0, "data": 1}, {"awesojsontype": 0, "data": 2}]}}')
+        self.assertEqual(result, {'a': [('decoded', 2)]})
+
+
+class AwesoJSONDecoderPairsTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(lambda data: ('decoded', data), 'dummy')
+
+    def test_pairs(self):
+        inst = decoder.AwesoJSONDecoder(pairs=True)
+        result = inst.decode('[{"awesojsontype": "dummy", "data": {"a": 1}}, {"b": 2}, '
+                             '{"awesojsontype": "dummy", "awesojsonbatch": [1]}]')
+        self.assertEqual(result, [('decoded', {'a': 1}), {'b': 2}, [('decoded', 1)]])
+
+    @patch('awesojson.decoder.AwesoJSONDecoder.object_handler')
+    def test_tagged_pairs_skip_object_handler(self, object_handler_mock):
+        inst = decoder.AwesoJSONDecoder(pairs=True)
+        self.assertEqual(inst.decode('{"awesojsontype": "dummy", "data": 1}'), ('decoded', 1))
+        self.assertFalse(object_handler_mock.called)
+
+    def test_unknown_type(self):
+        inst = decoder.AwesoJSONDecoder(pairs=True)
+        self.assertRaises(Exception, inst.decode, '{"awesojsontype": "unknown", "data": 1}')
+
+    def test_object_pairs_hook(self):
+        inst = decoder.AwesoJSONDecoder(object_pairs_hook=collections.OrderedDict)
+        result = inst.decode('[{"b": 1, "a": 2}, {"awesojsontype": "dummy", "data": {"b": 1, "a": 2}}]')
+        self.assertIs(type(result[0]), collections.OrderedDict)
+        self.assertEqual(list(result[0]), ['b', 'a'])
+        self.assertIs(type(result[1][1]), collections.OrderedDict)
+
+    def test_object_pairs_hook_prescan(self):
+        inst = decoder.AwesoJSONDecoder(prescan=True, object_pairs_hook=collections.OrderedDict)
+        self.assertIs(type(inst.decode('{"b": 1}')), collections.OrderedDict)
+
+    def test_compact_types(self):
+        inst = decoder.AwesoJSONDecoder(pairs=True)
+        result = inst.decode('{"awesojsontypes": ["dummy"], "awesojsondoc": '
+                             '[{"awesojsontype": 0, "data": 1}, {"awesojsontype": "dummy", "data": 2}]}')
+        self.assertEqual(result, [('decoded', 1), ('decoded', 2)])
+
+    def test_with_buffers(self):
+        inst = decoder.AwesoJSONDecoder(pairs=True).with_buffers([b'xy'])
+        self.assertEqual(inst.decode('[{"awesojsonbuffer": 0}]'), [b'xy'])
+
+
+class AwesoJSONDecoderBuffersTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(lambda data: data, 'dummy')
+
+    def test_with_buffers(self):
+        buffers = [memoryview(b'xy')]
+        inst = decoder.AwesoJSONDecoder().with_buffers(buffers)
+        result = inst.decode('{"a": {"awesojsontype": "dummy", "data": {"awesojsonbuffer": 0}}}')
+        self.assertIs(result['a'], buffers[0])
+
+    def test_with_buffers_copy(self):
+        inst = decoder.AwesoJSONDecoder(prescan=True)
+        inst.with_buffers([b'xy'])
+        self.assertEqual(inst.decode('{"awesojsonbuffer": 0}'), {'awesojsonbuffer': 0})
+
+    def test_compact_types(self):
+        inst = decoder.AwesoJSONDecoder().with_buffers([b'xy'])
+        result = inst.decode('{"awesojsontypes": ["dummy"], "awesojsondoc": '
+                             '{"awesojsontype": 0, "data": [{"awesojsonbuffer": 0}]}}')
+        self.assertEqual(result, [b'xy'])
+
+    def test_unknown_buffer(self):
+        inst = decoder.AwesoJSONDecoder().with_buffers([b'xy'])
+        self.assertRaises(Exception, inst.decode, '{"awesojsonbuffer": 1}')
+        self.assertRaises(Exception, inst.decode, '{"awesojsonbuffer": "0"}')
+
+
+class AwesoJSONDecoderBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(lambda x: 'foo ' + x, 'foo')
+
+    def test_batch_registration(self):
+        f = lambda x: x
+        decoder.AwesoJSONDecoder.register_batch_decoder(f, 'test.name')
+        self.assertEqual(decoder.AwesoJSONDecoder.registry.snapshot().batch_decoders, {'test.name': f})
+
+    def test_get_batch_decoder(self):
+        f = lambda x: x
+        decoder.AwesoJSONDecoder.register_batch_decoder(f, 'test.name')
+        self.assertEqual(decoder.AwesoJSONDecoder.get_batch_decoder('test.name'), f)
+        self.assertIsNone(decoder.AwesoJSONDecoder.get_batch_decoder('foo'))
+
+    def test_batch_decoder_called_once(self):
+        calls = []
+
+        def batch_decoder(data):
+            calls.append(data)
+            return ['batch ' + item for item in data]
+
+        decoder.AwesoJSONDecoder.register_batch_decoder(batch_decoder, 'foo')
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('{"awesojsontype": "foo", "awesojsonbatch": ["a", "b"]}')
+        self.assertEqual(result, ['batch a', 'batch b'])
+        self.assertEqual(calls, [['a', 'b']])
+
+    def test_batch_fallback_to_decoder(self):
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('{"awesojsontype": "foo", "awesojsonbatch": ["a", "b"]}')
+        self.assertEqual(result, ['foo a', 'foo b'])
+
+    def test_unregistered_batch(self):
+        inst = decoder.AwesoJSONDecoder()
+        self.assertRaises(Exception, inst.decode,
+                          '{"awesojsontype": "bar", "awesojsonbatch": ["a"]}')
+
+    def test_compact_types_batch(self):
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('{"awesojsontypes": ["foo"], "awesojsondoc": '
+                             '{"awesojsontype": 0, "awesojsonbatch": ["a", "b"]}}')
+        self.assertEqual(result, ['foo a', 'foo b'])
+
+
+class AwesoJSONDecoderColumnsTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(lambda x: ('foo', x), 'foo')
+
+    def test_columns(self):
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('{"awesojsontype": "foo", "awesojsoncolumns": {"a": [1, 2], "b": [3, 4]}}')
+        self.assertEqual(result, [('foo', {'a': 1, 'b': 3}), ('foo', {'a': 2, 'b': 4})])
+
+    def test_columns_batch_decoder(self):
+        decoder.AwesoJSONDecoder.register_batch_decoder(lambda rows: rows, 'foo')
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('{"awesojsontype": "foo", "awesojsoncolumns": {"a": [1, 2]}}')
+        self.assertEqual(result, [{'a': 1}, {'a': 2}])
+
+    def test_compact_types_columns(self):
+        inst = decoder.AwesoJSONDecoder()
+        result = inst.decode('{"awesojsontypes": ["foo"], "awesojsondoc": '
+                             '{"awesojsontype": 0, "awesojsoncolumns": {"a": [1]}}}')
+        self.assertEqual(result, [('foo', {'a': 1})])
@@ -1,5 +1,8 @@
+import json
+import threading
 import unittest
 from awesojson import (encoder,
+                       lazy,
                        utils)
 
 
@@ -12,20 +15,20 @@ class AwesoJSONEncoderRegisterTest(unittest.TestCase):
         pass
 
     def setUp(self):
-        encoder.AwesoJSONEncoder._encoder_table.clear()
+        encoder.AwesoJSONEncoder.registry.clear()
 
     def test_basic_registration(self):
         f = lambda x: x
         encoder.AwesoJSONEncoder.register_encoder(f, self.DummyClass)
         self.assertEquals(
-            encoder.AwesoJSONEncoder._encoder_table,
+            encoder.AwesoJSONEncoder.registry.snapshot().encoders,
             {self.DummyClass: (f, utils.get_fqcn(self.DummyClass))}
         )
 
     def test_None_fct_registration(self):
         encoder.AwesoJSONEncoder.register_encoder(None, self.DummyClass)
         self.assertEquals(
-            encoder.AwesoJSONEncoder._encoder_table,
+            encoder.AwesoJSONEncoder.registry.snapshot().encoders,
             {self.DummyClass: (None, utils.get_fqcn(self.DummyClass))}
         )
 
@@ -42,7 +45,7 @@ class AwesoJSONEncoderRegisterTest(unittest.TestCase):
         type_identifier = 'custom.test.name'
         encoder.AwesoJSONEncoder.register_encoder(f, self.DummyClass, type_identifier)
         self.assertEquals(
-            encoder.AwesoJSONEncoder._encoder_table,
+            encoder.AwesoJSONEncoder.registry.snapshot().encoders,
             {self.DummyClass: (f, type_identifier)}
         )
 
@@ -56,17 +59,15 @@ class AwesoJSONEncoderGetEncoderTest(unittest.TestCase):
         pass
 
     def setUp(self):
-        encoder.AwesoJSONEncoder._encoder_table.clear()
+        encoder.AwesoJSONEncoder.registry.clear()
 
     def test_basic_register_get(self):
         f = lambda x: x
-        encoder.AwesoJSONEncoder._encoder_table = {self.DummyClass: f}
+        encoder.AwesoJSONEncoder.register_encoder(f, self.DummyClass)
         result = encoder.AwesoJSONEncoder.get_encoder(self.DummyClass)
-        self.assertEquals(result, f)
+        self.assertEquals(result, (f, utils.get_fqcn(self.DummyClass)))
 
     def test_type_None_register_get(self):
-        f = lambda x: x
-        encoder.AwesoJSONEncoder._encoder_table = {None: f}
         self.assertRaises(
             Exception,
             encoder.AwesoJSONEncoder.get_encoder,
@@ -74,15 +75,75 @@ class AwesoJSONEncoderGetEncoderTest(unittest.TestCase):
         )
 
     def test_explicit_None_register_get(self):
-        encoder.AwesoJSONEncoder._encoder_table = {self.DummyClass: None}
+        encoder.AwesoJSONEncoder.register_encoder(None, self.DummyClass)
         result = encoder.AwesoJSONEncoder.get_encoder(self.DummyClass)
-        self.assertEquals(result, None)
+        self.assertEquals(result, (None, utils.get_fqcn(self.DummyClass)))
 
     def test_implicit_None_register_get(self):
         result = encoder.AwesoJSONEncoder.get_encoder(self.DummyClass)
         self.assertEquals(result, None)
 
 
+class AwesoJSONEncoderResolveEncoderTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        pass
+
+    class DummySubClass(DummyClass):
+        """
+        Dummy subclass to test MRO resolution.
+        """
+        pass
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+
+    def test_exact_type_resolve(self):
+        f = lambda x: x
+        encoder.AwesoJSONEncoder.register_encoder(f, self.DummyClass)
+        result = encoder.AwesoJSONEncoder.resolve_encoder(self.DummyClass)
+        self.assertEqual(result, (f, utils.get_fqcn(self.DummyClass)))
+
+    def test_subclass_resolve(self):
+        f = lambda x: x
+        encoder.AwesoJSONEncoder.register_encoder(f, self.DummyClass)
+        result = encoder.AwesoJSONEncoder.resolve_encoder(self.DummySubClass)
+        self.assertEqual(result, (f, utils.get_fqcn(self.DummyClass)))
+
+    def test_closest_base_resolve(self):
+        f = lambda x: x
+        g = lambda x: x
+        encoder.AwesoJSONEncoder.register_encoder(f, object)
+        encoder.AwesoJSONEncoder.register_encoder(g, self.DummyClass)
+        result = encoder.AwesoJSONEncoder.resolve_encoder(self.DummySubClass)
+        self.assertEqual(result, (g, utils.get_fqcn(self.DummyClass)))
+
+    def test_unregistered_resolve(self):
+        result = encoder.AwesoJSONEncoder.resolve_encoder(self.DummySubClass)
+        self.assertEqual(result, None)
+
+    def test_resolution_is_cached(self):
+        f = lambda x: x
+        encoder.AwesoJSONEncoder.register_encoder(f, self.DummyClass)
+        encoder.AwesoJSONEncoder.resolve_encoder(self.DummySubClass)
+        self.assertEqual(
+            encoder.AwesoJSONEncoder.registry.snapshot().resolved,
+            {self.DummySubClass: (f, utils.get_fqcn(self.DummyClass))}
+        )
+
+    def test_registration_invalidates_cache(self):
+        f = lambda x: x
+        g = lambda x: x
+        encoder.AwesoJSONEncoder.register_encoder(f, self.DummyClass)
+        encoder.AwesoJSONEncoder.resolve_encoder(self.DummySubClass)
+        encoder.AwesoJSONEncoder.register_encoder(g, self.DummySubClass)
+        result = encoder.AwesoJSONEncoder.resolve_encoder(self.DummySubClass)
+        self.assertEqual(result, (g, utils.get_fqcn(self.DummySubClass)))
+
+
 class AwesoJSONEncoderDefaultTest(unittest.TestCase):
 
     class DummyClass(object):
@@ -92,23 +153,446 @@ class AwesoJSONEncoderDefaultTest(unittest.TestCase):
         pass
 
     def setUp(self):
-        encoder.AwesoJSONEncoder._encoder_table.clear()
+        encoder.AwesoJSONEncoder.registry.clear()
 
     def test_empty_table_default(self):
         inst = encoder.AwesoJSONEncoder()
         self.assertRaises(Exception, inst.default, self.DummyClass)
 
     def test_no_function_registrered_default(self):
-        encoder.AwesoJSONEncoder._encoder_table[self.DummyClass] = lambda x: str(x)
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: str(x), self.DummyClass)
         inst = encoder.AwesoJSONEncoder()
         self.assertRaises(Exception, inst.default, object())
 
     def test_basic_default(self):
-        encoder.AwesoJSONEncoder._encoder_table[self.DummyClass] = (
-            (lambda x: 'test', utils.get_fqcn(self.DummyClass))
-        )
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: 'test', self.DummyClass)
         inst = encoder.AwesoJSONEncoder()
         result = inst.default(self.DummyClass())
         self.assertEquals(
             result, {'awesojsontype': utils.get_fqcn(self.DummyClass), 'data': 'test'}
         )
+
+    def test_subclass_default(self):
+        class DummySubClass(self.DummyClass):
+            pass
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: 'test', self.DummyClass)
+        inst = encoder.AwesoJSONEncoder()
+        result = inst.default(DummySubClass())
+        self.assertEqual(
+            result, {'awesojsontype': utils.get_fqcn(self.DummyClass), 'data': 'test'}
+        )
+
+
+class AwesoJSONEncoderCompactTypesTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        pass
+
+    class OtherDummyClass(object):
+        """
+        Other dummy class to test registration.
+        """
+        pass
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: 'test', self.DummyClass, 'dummy')
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: 'other', self.OtherDummyClass, 'other')
+
+    def test_type_table(self):
+        inst = encoder.AwesoJSONEncoder(compact_types=True)
+        result = inst.encode([self.DummyClass(), self.OtherDummyClass(), self.DummyClass()])
+        self.assertEqual(
+            result,
+            '{"awesojsontypes": ["dummy", "other"], "awesojsondoc": ['
+            '{"awesojsontype": 0, "data": "test"}, '
+            '{"awesojsontype": 1, "data": "other"}, '
+            '{"awesojsontype": 0, "data": "test"}]}'
+        )
+
+    def test_type_table_per_document(self):
+        inst = encoder.AwesoJSONEncoder(compact_types=True, separators=(',', ':'))
+        inst.encode(self.DummyClass())
+        result = inst.encode(self.OtherDummyClass())
+        self.assertEqual(
+            result,
+            '{"awesojsontypes":["other"],"awesojsondoc":{"awesojsontype":0,"data":"other"}}'
+        )
+
+    def test_untyped_document(self):
+        inst = encoder.AwesoJSONEncoder(compact_types=True)
+        self.assertEqual(inst.encode({'a': [1]}), '{"a": [1]}')
+
+    def test_error_resets_type_table(self):
+        inst = encoder.AwesoJSONEncoder(compact_types=True)
+        self.assertRaises(Exception, inst.encode, [self.DummyClass(), object()])
+        self.assertEqual(inst._type_table, None)
+        self.assertEqual(inst.default(self.DummyClass()), {'awesojsontype': 'dummy', 'data': 'test'})
+
+    def test_shared_encoder(self):
+        # A document encoded while another one is being encoded, as from another thread
+        inst = encoder.AwesoJSONEncoder(compact_types=True, separators=(',', ':'))
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: inst.encode(self.OtherDummyClass()),
+                                                  self.DummyClass, 'dummy')
+        result = inst.encode([self.DummyClass(), self.DummyClass()])
+        inner = '{"awesojsontypes":["other"],"awesojsondoc":{"awesojsontype":0,"data":"other"}}'
+        self.assertEqual(result, '{{"awesojsontypes":["dummy"],"awesojsondoc":['
+                                 '{{"awesojsontype":0,"data":{0}}},'
+                                 '{{"awesojsontype":0,"data":{0}}}]}}'.format(json.dumps(inner, separators=(',', ':'))))
+        self.assertEqual(inst._type_table, None)
+
+    def test_threads(self):
+        inst = encoder.AwesoJSONEncoder(share_references=True)
+        documents = [[self.DummyClass(), self.OtherDummyClass()] * 100 for _ in range(8)]
+        expected = inst.encode(documents[0])
+
+        def encode_all(results):
+            for document in documents:
+                results.append(inst.encode(document))
+
+        results = []
+        threads = [threading.Thread(target=encode_all, args=(results,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [expected] * 32)
+
+
+class AwesoJSONEncoderShareReferencesTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: x.value, self.DummyClass, 'dummy')
+
+    def test_references(self):
+        inst = encoder.AwesoJSONEncoder(share_references=True, separators=(',', ':'))
+        shared = self.DummyClass('shared')
+        result = inst.encode([shared, self.DummyClass('other'), shared, shared])
+        self.assertEqual(
+            result,
+            '{"awesojsontypes":["dummy"],"awesojsondoc":['
+            '{"awesojsontype":0,"awesojsonid":0,"data":"shared"},'
+            '{"awesojsontype":0,"awesojsonid":1,"data":"other"},'
+            '{"awesojsonref":0},{"awesojsonref":0}]}'
+        )
+
+    def test_nested_references(self):
+        inst = encoder.AwesoJSONEncoder(share_references=True, separators=(',', ':'))
+        inner = self.DummyClass('inner')
+        result = inst.encode([self.DummyClass([inner]), inner])
+        self.assertEqual(
+            result,
+            '{"awesojsontypes":["dummy"],"awesojsondoc":['
+            '{"awesojsontype":0,"awesojsonid":0,"data":['
+            '{"awesojsontype":0,"awesojsonid":1,"data":"inner"}]},'
+            '{"awesojsonref":1}]}'
+        )
+
+    def test_references_per_document(self):
+        inst = encoder.AwesoJSONEncoder(share_references=True)
+        shared = self.DummyClass('shared')
+        inst.encode(shared)
+        self.assertEqual(inst.encode(shared).count('awesojsonref'), 0)
+
+    def test_circular_reference(self):
+        inst = encoder.AwesoJSONEncoder(share_references=True)
+        looping = self.DummyClass(None)
+        looping.value = [looping]
+        self.assertRaises(ValueError, inst.encode, looping)
+
+
+class AwesoJSONEncoderLazyTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: x.value, self.DummyClass, 'dummy')
+
+    def test_lazy_object(self):
+        inst = encoder.AwesoJSONEncoder(separators=(',', ':'))
+        self.assertEqual(inst.encode([lazy.LazyObject(self.DummyClass, 1), lazy.LazyObject(list, [2])]),
+                         '[{"awesojsontype":"dummy","data":1},[2]]')
+
+
+class AwesoJSONEncoderFragmentCacheTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        self.calls = []
+        encoder.AwesoJSONEncoder.register_encoder(self.encode_fct, self.DummyClass, 'dummy', cache_size=2)
+
+    def tearDown(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+
+    def encode_fct(self, obj):
+        self.calls.append(obj)
+        return obj.value
+
+    def test_cache(self):
+        inst = encoder.AwesoJSONEncoder(separators=(',', ':'))
+        shared = self.DummyClass('shared')
+        self.assertEqual(inst.encode([shared, {'a': shared}]),
+                         '[{"awesojsontype":"dummy","data":"shared"},'
+                         '{"a":{"awesojsontype":"dummy","data":"shared"}}]')
+        self.assertEqual(inst.encode(shared), '{"awesojsontype":"dummy","data":"shared"}')
+        self.assertEqual(self.calls, [shared])
+        self.assertEqual(inst.get_fragment_cache_info(self.DummyClass), encoder.CacheInfo(2, 1, 2, 1))
+
+    def test_iterencode(self):
+        inst = encoder.AwesoJSONEncoder()
+        shared = self.DummyClass([1, 2])
+        self.assertEqual(''.join(inst.iterencode([shared, 'a', shared])),
+                         '[{"awesojsontype": "dummy", "data": [1, 2]}, "a", '
+                         '{"awesojsontype": "dummy", "data": [1, 2]}]')
+        self.assertEqual(len(self.calls), 1)
+
+    def test_nested(self):
+        inst = encoder.AwesoJSONEncoder(separators=(',', ':'))
+        inner = self.DummyClass(1)
+        outer = self.DummyClass([inner])
+        self.assertEqual(inst.encode([outer, inner, outer]),
+                         '[{"awesojsontype":"dummy","data":[{"awesojsontype":"dummy","data":1}]},'
+                         '{"awesojsontype":"dummy","data":1},'
+                         '{"awesojsontype":"dummy","data":[{"awesojsontype":"dummy","data":1}]}]')
+
+    def test_eviction(self):
+        inst = encoder.AwesoJSONEncoder()
+        first, second, third = self.DummyClass(1), self.DummyClass(2), self.DummyClass(3)
+        inst.encode([first, second, third, first])
+        self.assertEqual(self.calls, [first, second, third, first])
+        self.assertEqual(inst.get_fragment_cache_info(self.DummyClass).currsize, 2)
+
+    def test_not_used(self):
+        shared = self.DummyClass(1)
+        for inst in (encoder.AwesoJSONEncoder(indent=2), encoder.AwesoJSONEncoder(compact_types=True)):
+            self.calls = []
+            inst.encode([shared, shared])
+            self.assertEqual(len(self.calls), 2)
+            self.assertIsNone(inst.get_fragment_cache_info(self.DummyClass))
+
+    def test_registration(self):
+        inst = encoder.AwesoJSONEncoder()
+        inst.encode(self.DummyClass(1))
+        encoder.AwesoJSONEncoder.register_encoder(lambda obj: 'other', self.DummyClass, 'dummy', cache_size=2)
+        self.assertEqual(inst.encode(self.DummyClass(1)), '{"awesojsontype": "dummy", "data": "other"}')
+        encoder.AwesoJSONEncoder.register_encoder(self.encode_fct, self.DummyClass, 'dummy')
+        self.assertEqual(encoder.AwesoJSONEncoder.registry.snapshot().cache_sizes, {})
+
+    def test_invalid_cache_size(self):
+        self.assertRaises(Exception, encoder.AwesoJSONEncoder.register_encoder,
+                          self.encode_fct, self.DummyClass, cache_size=0)
+
+
+class AwesoJSONEncoderBuffersTest(unittest.TestCase):
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+
+    def test_with_buffers(self):
+        buffers = []
+        inst = encoder.AwesoJSONEncoder(separators=(',', ':')).with_buffers(buffers)
+        data = bytearray(b'abc')
+        result = inst.encode({'a': b'xy', 'b': [data, memoryview(b'z')]})
+        self.assertEqual(result, '{"a":{"awesojsonbuffer":0},"b":[{"awesojsonbuffer":1},{"awesojsonbuffer":2}]}')
+        self.assertEqual([buf.tobytes() for buf in buffers], [b'xy', b'abc', b'z'])
+        self.assertIs(buffers[1].obj, data)
+
+    def test_with_buffers_copy(self):
+        inst = encoder.AwesoJSONEncoder()
+        inst.with_buffers([])
+        self.assertRaises(Exception, inst.encode, b'xy')
+
+    def test_non_contiguous_buffer(self):
+        buffers = []
+        inst = encoder.AwesoJSONEncoder().with_buffers(buffers)
+        inst.encode(memoryview(b'abcdef')[::2])
+        self.assertEqual(buffers[0].tobytes(), b'ace')
+
+    def test_raw_buffer(self):
+        buffers = []
+        inst = encoder.AwesoJSONEncoder().with_buffers(buffers)
+        self.assertEqual(inst.encode(encoder.RawBuffer(b'xy')), '{"awesojsonbuffer": 0}')
+        self.assertEqual(buffers[0].tobytes(), b'xy')
+
+    def test_raw_buffer_base64(self):
+        inst = encoder.AwesoJSONEncoder()
+        self.assertEqual(inst.encode(encoder.RawBuffer(b'xy')), '"eHk="')
+
+
+class AwesoJSONEncoderBatchTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: x.value, self.DummyClass, 'dummy')
+
+    def test_batch_registration(self):
+        f = lambda x: x
+        encoder.AwesoJSONEncoder.register_batch_encoder(f, self.DummyClass)
+        self.assertEqual(
+            encoder.AwesoJSONEncoder.registry.snapshot().batch_encoders,
+            {self.DummyClass: (f, utils.get_fqcn(self.DummyClass))}
+        )
+
+    def test_get_batch_encoder(self):
+        f = lambda x: x
+        encoder.AwesoJSONEncoder.register_batch_encoder(f, self.DummyClass, 'dummy')
+        self.assertEqual(encoder.AwesoJSONEncoder.get_batch_encoder(self.DummyClass), (f, 'dummy'))
+        self.assertIsNone(encoder.AwesoJSONEncoder.get_batch_encoder(object))
+
+    def test_None_type_object_batch_registration(self):
+        self.assertRaises(Exception, encoder.AwesoJSONEncoder.register_batch_encoder,
+                          lambda x: x, None)
+
+    def test_batch_encoder_called_once(self):
+        calls = []
+
+        def batch_encoder(items):
+            calls.append(items)
+            return [item.value * 2 for item in items]
+
+        encoder.AwesoJSONEncoder.register_batch_encoder(batch_encoder, self.DummyClass, 'dummy')
+        inst = encoder.AwesoJSONEncoder()
+        items = [self.DummyClass(i) for i in range(3)]
+        result = inst.default(encoder.Batch(items))
+        self.assertEqual(result, {'awesojsontype': 'dummy', 'awesojsonbatch': [0, 2, 4]})
+        self.assertEqual(calls, [items])
+
+    def test_batch_fallback_to_encoder(self):
+        inst = encoder.AwesoJSONEncoder()
+        result = inst.default(encoder.Batch([self.DummyClass(1), self.DummyClass(2)]))
+        self.assertEqual(result, {'awesojsontype': 'dummy', 'awesojsonbatch': [1, 2]})
+
+    def test_empty_batch(self):
+        inst = encoder.AwesoJSONEncoder()
+        self.assertEqual(inst.default(encoder.Batch([])), [])
+        self.assertEqual(inst.default(encoder.Batch([], self.DummyClass)),
+                         {'awesojsontype': 'dummy', 'awesojsonbatch': []})
+
+    def test_heterogeneous_batch(self):
+        inst = encoder.AwesoJSONEncoder()
+        self.assertRaises(Exception, inst.default, encoder.Batch([self.DummyClass(1), 2]))
+
+    def test_unregistered_batch(self):
+        inst = encoder.AwesoJSONEncoder()
+        self.assertRaises(Exception, inst.default, encoder.Batch([object()]))
+
+    def test_compact_types_batch(self):
+        inst = encoder.AwesoJSONEncoder(compact_types=True, separators=(',', ':'))
+        result = inst.encode(encoder.Batch([self.DummyClass(1)]))
+        self.assertEqual(
+            result,
+            '{"awesojsontypes":["dummy"],"awesojsondoc":{"awesojsontype":0,"awesojsonbatch":[1]}}'
+        )
+
+
+class AwesoJSONEncoderColumnarTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        def __init__(self, value):
+            self.value = value
+
+    class OtherDummyClass(object):
+        """
+        Other dummy class to test registration.
+        """
+        pass
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(
+            lambda x: {'value': x.value, 'double': x.value * 2}, self.DummyClass, 'dummy'
+        )
+
+    def test_columnar_list(self):
+        inst = encoder.AwesoJSONEncoder(columnar=True, sort_keys=True, separators=(',', ':'))
+        result = inst.encode({'records': [self.DummyClass(1), self.DummyClass(2)]})
+        self.assertEqual(
+            result,
+            '{"records":{"awesojsoncolumns":{"double":[2,4],"value":[1,2]},"awesojsontype":"dummy"}}'
+        )
+
+    def test_columnar_nested_lists(self):
+        inst = encoder.AwesoJSONEncoder(columnar=True, separators=(',', ':'))
+        result = inst.encode([[1, 'a'], ({'a': [self.DummyClass(1), self.DummyClass(2)]},)])
+        self.assertEqual(
+            result,
+            '[[1,"a"],[{"a":{"awesojsontype":"dummy",'
+            '"awesojsoncolumns":{"value":[1,2],"double":[2,4]}}}]]'
+        )
+
+    def test_columnar_input_not_modified(self):
+        inst = encoder.AwesoJSONEncoder(columnar=True)
+        value = {'a': [[self.DummyClass(1), self.DummyClass(2)]]}
+        inst.encode(value)
+        self.assertEqual(type(value['a'][0]), list)
+
+    def test_columnar_plain_dict(self):
+        inst = encoder.AwesoJSONEncoder(columnar=True)
+        value = {'a': {'b': [1, 2]}}
+        self.assertIs(inst._columnize(value), value)
+        self.assertEqual(inst.encode(value), '{"a": {"b": [1, 2]}}')
+
+    def test_columnar_mixed_list(self):
+        inst = encoder.AwesoJSONEncoder(columnar=True, separators=(',', ':'))
+        result = inst.encode([self.DummyClass(1), 2])
+        self.assertEqual(
+            result,
+            '[{"awesojsontype":"dummy","data":{"value":1,"double":2}},2]'
+        )
+
+    def test_columnar_single_item(self):
+        inst = encoder.AwesoJSONEncoder(columnar=True, separators=(',', ':'))
+        result = inst.encode([self.DummyClass(1)])
+        self.assertEqual(result, '[{"awesojsontype":"dummy","data":{"value":1,"double":2}}]')
+
+    def test_columnar_unregistered_list(self):
+        inst = encoder.AwesoJSONEncoder(columnar=True)
+        self.assertRaises(Exception, inst.encode, [self.OtherDummyClass(), self.OtherDummyClass()])
+
+    def test_columnar_non_dict_data(self):
+        encoder.AwesoJSONEncoder.register_encoder(lambda x: x.value, self.DummyClass, 'dummy')
+        inst = encoder.AwesoJSONEncoder(columnar=True, separators=(',', ':'))
+        result = inst.encode([self.DummyClass(1), self.DummyClass(2)])
+        self.assertEqual(result, '{"awesojsontype":"dummy","awesojsonbatch":[1,2]}')
+
+    def test_columnar_different_keys(self):
+        encoder.AwesoJSONEncoder.register_encoder(
+            lambda x: {str(x.value): 1}, self.DummyClass, 'dummy'
+        )
+        inst = encoder.AwesoJSONEncoder(columnar=True, separators=(',', ':'))
+        result = inst.encode([self.DummyClass(1), self.DummyClass(2)])
+        self.assertEqual(result, '{"awesojsontype":"dummy","awesojsonbatch":[{"1":1},{"2":1}]}')
@@ -0,0 +1,96 @@
+import json
+import unittest
+
+from awesojson import decoder, encoder, instrumentation, lazy
+
+
+class DummyClass(object):
+    """
+    Dummy class to test the statistics.
+    """
+    def __init__(self, value):
+        self.value = value
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(lambda obj: {'value': obj.value}, DummyClass, 'test.Dummy')
+        decoder.AwesoJSONDecoder.register_decoder(lambda data: DummyClass(data['value']), 'test.Dummy')
+        instrumentation.reset_stats()
+        self.calls = []
+        instrumentation.enable_stats(hook=lambda *args: self.calls.append(args))
+
+    def tearDown(self):
+        instrumentation.disable_stats()
+        instrumentation.reset_stats()
+        encoder.AwesoJSONEncoder.registry.clear()
+
+    def test_encode(self):
+        text = encoder.AwesoJSONEncoder().encode([DummyClass(1), DummyClass('abc')])
+        self.assertEqual(json.loads(text)[1]['data'], {'value': 'abc'})
+        stats = instrumentation.stats()
+        self.assertEqual(stats['decode'], {})
+        dummy_stats = stats['encode']['test.Dummy']
+        self.assertEqual(dummy_stats.calls, 2)
+        self.assertEqual(dummy_stats.total_size, len('{"value":1}') + len('{"value":"abc"}'))
+        self.assertEqual(dummy_stats.max_size, len('{"value":"abc"}'))
+        self.assertTrue(0 <= dummy_stats.p50_time <= dummy_stats.p90_time <= dummy_stats.p99_time)
+        self.assertTrue(dummy_stats.total_time >= dummy_stats.p99_time)
+        self.assertEqual([(call[0], call[1], call[3]) for call in self.calls],
+                         [('encode', 'test.Dummy', 11), ('encode', 'test.Dummy', 15)])
+
+    def test_encode_compact(self):
+        encoder.AwesoJSONEncoder(compact_types=True).encode([DummyClass(1)])
+        self.assertEqual(list(instrumentation.stats()['encode']), ['test.Dummy'])
+
+    def test_decode(self):
+        text = ('[{"awesojsontype": "test.Dummy", "data": {"value": '
+                '[1, {"awesojsontype": "test.Dummy", "data": {"value": 2}}]}}]')
+        obj = decoder.AwesoJSONDecoder().decode(text)
+        self.assertEqual(obj[0].value[1].value, 2)
+        dummy_stats = instrumentation.stats()['decode']['test.Dummy']
+        self.assertEqual(dummy_stats.calls, 2)
+        self.assertEqual(dummy_stats.max_size, len('{"value":[1,null]}'))
+
+    def test_decode_pairs(self):
+        decoder.AwesoJSONDecoder(pairs=True).decode('{"awesojsontype": "test.Dummy", "data": {"value": 1}}')
+        self.assertEqual(instrumentation.stats()['decode']['test.Dummy'].calls, 1)
+
+    def test_decode_compact(self):
+        decoder.AwesoJSONDecoder().decode(encoder.AwesoJSONEncoder(compact_types=True).encode([DummyClass(1)]))
+        self.assertEqual(instrumentation.stats()['decode']['test.Dummy'].calls, 1)
+
+    def test_decode_lazy(self):
+        obj = decoder.AwesoJSONDecoder(lazy=True).decode('{"awesojsontype": "test.Dummy", "data": {"value": 1}}')
+        self.assertEqual(instrumentation.stats()['decode'], {})
+        self.assertEqual(lazy.decoded(obj).value, 1)
+        self.assertEqual(instrumentation.stats()['decode']['test.Dummy'].calls, 1)
+
+    def test_without_sizes(self):
+        instrumentation.enable_stats(sizes=False)
+        encoder.AwesoJSONEncoder().encode(DummyClass(1))
+        dummy_stats = instrumentation.stats()['encode']['test.Dummy']
+        self.assertEqual((dummy_stats.calls, dummy_stats.total_size, dummy_stats.max_size), (1, 0, 0))
+        self.assertEqual(self.calls, [])
+
+    def test_disable_stats(self):
+        encoder.AwesoJSONEncoder().encode(DummyClass(1))
+        instrumentation.disable_stats()
+        encoder.AwesoJSONEncoder().encode(DummyClass(1))
+        self.assertEqual(instrumentation.stats()['encode']['test.Dummy'].calls, 1)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_reset_stats(self):
+        encoder.AwesoJSONEncoder().encode(DummyClass(1))
+        instrumentation.reset_stats()
+        self.assertEqual(instrumentation.stats(), {'encode': {}, 'decode': {}})
+
+    def test_percentiles(self):
+        collector = instrumentation._Collector()
+        for elapsed in range(1, 101):
+            collector.record('encode', 'test.Dummy', elapsed, None)
+        dummy_stats = collector.stats()['encode']['test.Dummy']
+        self.assertEqual((dummy_stats.p50_time, dummy_stats.p90_time, dummy_stats.p99_time), (50, 90, 99))
+        self.assertEqual(dummy_stats.total_time, 5050)
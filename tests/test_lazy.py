@@ -0,0 +1,94 @@
+import copy
+import pickle
+import unittest
+
+from awesojson import lazy
+
+
+class LazyObjectTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test decoding.
+        """
+        def __init__(self, value):
+            self.value = value
+
+        def __call__(self, suffix):
+            return self.value + suffix
+
+    def setUp(self):
+        self.calls = []
+
+    def decode_fct(self, data):
+        self.calls.append(data)
+        return self.DummyClass(data)
+
+    def test_decoded_on_first_use(self):
+        proxy = lazy.LazyObject(self.decode_fct, 'a')
+        self.assertEqual(repr(proxy), '<LazyObject pending>')
+        self.assertEqual(self.calls, [])
+        self.assertEqual(proxy.value, 'a')
+        self.assertEqual(proxy('b'), 'ab')
+        self.assertEqual(self.calls, ['a'])
+        self.assertIs(lazy.decoded(proxy), lazy.decoded(proxy))
+
+    def test_setattr(self):
+        proxy = lazy.LazyObject(self.decode_fct, 'a')
+        proxy.value = 'b'
+        self.assertEqual(lazy.decoded(proxy).value, 'b')
+        del proxy.value
+        self.assertFalse(hasattr(lazy.decoded(proxy), 'value'))
+
+    def test_value_protocols(self):
+        proxy = lazy.LazyObject(int, '2')
+        self.assertEqual(repr(proxy), '<LazyObject pending>')
+        self.assertEqual(str(proxy), '2')
+        self.assertEqual(repr(proxy), '2')
+        self.assertTrue(proxy)
+        self.assertEqual(hash(proxy), hash(2))
+        self.assertTrue(proxy == 2)
+        self.assertTrue(proxy == lazy.LazyObject(int, '2'))
+        self.assertFalse(proxy != 2)
+        self.assertTrue(proxy < 3 and proxy <= 2 and proxy > 1 and proxy >= 2)
+
+    def test_container_protocols(self):
+        proxy = lazy.LazyObject(dict, {'a': 1})
+        self.assertEqual(len(proxy), 1)
+        self.assertEqual(list(proxy), ['a'])
+        self.assertIn('a', proxy)
+        self.assertEqual(proxy['a'], 1)
+        proxy['b'] = 2
+        del proxy['a']
+        self.assertEqual(lazy.decoded(proxy), {'b': 2})
+
+    def test_pickle(self):
+        proxy = lazy.LazyObject(lambda data: {'value': data}, [1])
+        self.assertEqual(pickle.loads(pickle.dumps(proxy)), {'value': [1]})
+        self.assertEqual(pickle.loads(pickle.dumps([proxy, proxy])), [{'value': [1]}, {'value': [1]}])
+
+    def test_copy(self):
+        proxy = lazy.LazyObject(lambda data: {'value': data}, [1])
+        result = copy.deepcopy([proxy, proxy])
+        self.assertEqual(result, [{'value': [1]}, {'value': [1]}])
+        self.assertIs(result[0], result[1])
+        self.assertIsNot(result[0], lazy.decoded(proxy))
+        self.assertIs(copy.copy(proxy), lazy.decoded(proxy))
+
+    def test_decoded_not_lazy(self):
+        value = object()
+        self.assertIs(lazy.decoded(value), value)
+
+    def test_nested_data_resolved(self):
+        inner = lazy.LazyObject(self.decode_fct, 'inner')
+        outer = lazy.LazyObject(lambda data: data, {'a': [inner]})
+        self.assertIsInstance(lazy.decoded(outer)['a'][0], self.DummyClass)
+
+    def test_resolve(self):
+        document = {'a': [lazy.LazyObject(self.decode_fct, 'a'), 1], 'b': lazy.LazyObject(self.decode_fct, 'b'),
+                    'c': 'c'}
+        self.assertIs(lazy.resolve(document), document)
+        self.assertIsInstance(document['a'][0], self.DummyClass)
+        self.assertIsInstance(document['b'], self.DummyClass)
+        self.assertEqual(self.calls, ['a', 'b'])
+        self.assertIsInstance(lazy.resolve(lazy.LazyObject(self.decode_fct, 'c')), self.DummyClass)
@@ -0,0 +1,120 @@
+import importlib
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+import awesojson
+from awesojson import codec, encoder, ndarray
+
+numpy = ndarray.numpy
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class NDArrayCodecTest(unittest.TestCase):
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        ndarray.register()
+
+    def roundtrip(self, array):
+        inst = codec.Codec()
+        return inst.loads(inst.dumps(array))
+
+    def assertArrayEqual(self, result, expected):
+        self.assertEqual(result.dtype, expected.dtype)
+        self.assertEqual(result.shape, expected.shape)
+        self.assertTrue(numpy.array_equal(result, expected))
+
+    def test_raw_roundtrip(self):
+        array = numpy.arange(12, dtype='>i4').reshape(3, 4)
+        result = self.roundtrip(array)
+        self.assertArrayEqual(result, array)
+        self.assertTrue(result.flags.writeable)
+
+    def test_raw_fortran_order(self):
+        array = numpy.asfortranarray(numpy.arange(6.0).reshape(2, 3))
+        self.assertEqual(ndarray.encode_ndarray(array)['order'], 'F')
+        result = self.roundtrip(array)
+        self.assertArrayEqual(result, array)
+        self.assertTrue(result.flags.f_contiguous)
+
+    def test_raw_non_contiguous(self):
+        array = numpy.arange(20).reshape(4, 5)[::2, 1::2]
+        self.assertArrayEqual(self.roundtrip(array), array)
+
+    def test_oob_roundtrip(self):
+        inst = codec.Codec()
+        array = numpy.arange(12, dtype='<f8').reshape(3, 4)
+        document, buffers = inst.dumps_oob(array)
+        self.assertNotIn('AAAA', document)
+        self.assertEqual(len(buffers), 1)
+        result = inst.loads_oob(document, buffers)
+        self.assertArrayEqual(result, array)
+        self.assertTrue(numpy.shares_memory(result, array))
+
+    def test_raw_empty(self):
+        array = numpy.zeros((0, 3), dtype='f4')
+        self.assertArrayEqual(self.roundtrip(array), array)
+
+    def test_object_dtype(self):
+        array = numpy.array(['a', 1, None], dtype=object)
+        self.assertNotIn('buffer', ndarray.encode_ndarray(array))
+        self.assertArrayEqual(self.roundtrip(array), array)
+
+    def test_structured_dtype(self):
+        dtype = numpy.dtype([('id', '<i4'), ('point', [('x', '<f8'), ('tags', 'u1', (2,))]), ('name', '<U4')])
+        array = numpy.array([[(1, (0.5, [1, 2]), 'a')], [(2, (-1.0, [3, 4]), 'bcd')]], dtype=dtype)
+        self.assertEqual(ndarray.encode_ndarray(array)['dtype'][0], ('id', '<i4'))
+        self.assertArrayEqual(self.roundtrip(array), array)
+
+    def test_structured_dtype_titles_and_objects(self):
+        dtype = numpy.dtype([(('Identifier', 'id'), '<i8'), ('value', object)])
+        array = numpy.array([(1, 'a'), (2, None)], dtype=dtype)
+        self.assertArrayEqual(self.roundtrip(array), array)
+
+    def test_aligned_structured_dtype(self):
+        dtype = numpy.dtype({'names': ['a', 'b'], 'formats': ['i1', '<f8'], 'aligned': True})
+        array = numpy.array([(1, 2.5)], dtype=dtype)
+        self.assertArrayEqual(self.roundtrip(array), array)
+
+    def test_list_mode(self):
+        ndarray.register(raw=False)
+        array = numpy.arange(6, dtype='u2').reshape(2, 3)
+        self.assertNotIn('buffer', ndarray.encode_ndarray(array, raw=False))
+        self.assertArrayEqual(self.roundtrip(array), array)
+
+
+class NDArrayCodecWithoutNumpyTest(unittest.TestCase):
+
+    def test_register(self):
+        with patch.object(ndarray, 'numpy', None):
+            self.assertRaises(Exception, ndarray.register)
+
+    def test_import(self):
+        try:
+            with patch.dict(sys.modules, {'numpy': None}):
+                self.assertIsNone(importlib.reload(ndarray).numpy)
+        finally:
+            importlib.reload(ndarray)
+
+
+class NDArrayRegistrationTest(unittest.TestCase):
+
+    def run_python(self, code):
+        return subprocess.check_output([sys.executable, '-c', code]).decode('ascii').strip()
+
+    def test_numpy_not_imported(self):
+        self.assertEqual(self.run_python('import sys, awesojson; print("numpy" in sys.modules)'), 'False')
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_registered_after_numpy(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        importlib.reload(awesojson)
+        self.assertIsNotNone(encoder.AwesoJSONEncoder.registry.get_encoder(numpy.ndarray))
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_registered_explicitly(self):
+        code = ('import awesojson, awesojson.ndarray, numpy; awesojson.ndarray.register(); '
+                'print(awesojson.loads(awesojson.dumps(numpy.arange(3))).tolist())')
+        self.assertEqual(self.run_python(code), '[0, 1, 2]')
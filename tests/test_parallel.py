@@ -0,0 +1,200 @@
+import json
+import unittest
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from awesojson import codec, decoder, encoder, parallel, registry
+
+
+class Point(object):
+    """
+    Picklable class to test registration in worker processes.
+    """
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __eq__(self, other):
+        return (self.x, self.y) == (other.x, other.y)
+
+
+def encode_point(point):
+    return [point.x, point.y]
+
+
+def decode_point(data):
+    return Point(*data)
+
+
+def make_tenant_registry():
+    tenant_registry = registry.Registry(isolated=True)
+    tenant_registry.register_encoder(encode_point, Point, 'tenant.point')
+    tenant_registry.register_decoder(decode_point, 'tenant.point')
+    return tenant_registry
+
+
+class ParallelLinesTest(unittest.TestCase):
+
+    def setUp(self):
+        encoder.AwesoJSONEncoder.registry.clear()
+        encoder.AwesoJSONEncoder.register_encoder(encode_point, Point, 'point')
+        decoder.AwesoJSONDecoder.register_decoder(decode_point, 'point')
+
+    def test_dump_lines_order(self):
+        values = [Point(i, -i) for i in range(100)]
+        stream = StringIO()
+        parallel.dump_lines(iter(values), stream, workers=2, batch_size=7)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertEqual(lines[3], '{"awesojsontype": "point", "data": [3, -3]}')
+
+    def test_dump_lines_encoder_kwargs(self):
+        stream = StringIO()
+        parallel.dump_lines([{'b': 1, 'a': 2}], stream, workers=1,
+                            encoder_kwargs={'sort_keys': True})
+        self.assertEqual(stream.getvalue(), '{"a": 2, "b": 1}\n')
+
+    def test_dump_lines_indent(self):
+        self.assertRaises(Exception, parallel.dump_lines, [1], StringIO(), workers=1,
+                          encoder_kwargs={'indent': 2})
+
+    def test_load_lines_order(self):
+        text = ''.join('{"awesojsontype": "point", "data": [%d, 0]}\n\n' % i for i in range(100))
+        result = list(parallel.load_lines(StringIO(text), workers=2, batch_size=7))
+        self.assertEqual(result, [Point(i, 0) for i in range(100)])
+
+    def test_load_lines_bytes(self):
+        text = ''.join(json.dumps({'i': i, 's': '\u00e9'}) + '\n' for i in range(20))
+        result = list(parallel.load_lines(BytesIO(text.encode('utf-8')), workers=2, batch_size=7))
+        self.assertEqual(result, [{'i': i, 's': '\u00e9'} for i in range(20)])
+
+    def test_load_lines_decoder_kwargs(self):
+        result = list(parallel.load_lines(StringIO('1\n2\n'), workers=1,
+                                          decoder_kwargs={'parse_int': str}))
+        self.assertEqual(result, ['1', '2'])
+
+    def test_registry(self):
+        tenant_registry = make_tenant_registry()
+        stream = StringIO()
+        parallel.dump_lines([Point(1, 2)], stream, workers=1, registry=tenant_registry)
+        self.assertEqual(stream.getvalue(), '{"awesojsontype": "tenant.point", "data": [1, 2]}\n')
+        stream.seek(0)
+        self.assertEqual(list(parallel.load_lines(stream, workers=1, registry=tenant_registry)), [Point(1, 2)])
+
+    def test_registry_in_kwargs(self):
+        stream = StringIO()
+        parallel.dump_lines([Point(1, 2)], stream, workers=1, encoder_kwargs={'registry': make_tenant_registry()})
+        self.assertEqual(stream.getvalue(), '{"awesojsontype": "tenant.point", "data": [1, 2]}\n')
+
+    def test_codec_registry(self):
+        inst = codec.Codec(encoder_kwargs={'sort_keys': True}, registry=make_tenant_registry())
+        stream = StringIO()
+        inst.dump_lines([{'b': Point(1, 2), 'a': 0}] * 3, stream, workers=2, batch_size=2)
+        self.assertEqual(stream.getvalue(),
+                         '{"a": 0, "b": {"awesojsontype": "tenant.point", "data": [1, 2]}}\n' * 3)
+        stream.seek(0)
+        self.assertEqual(list(inst.load_lines(stream, workers=2)), [{'a': 0, 'b': Point(1, 2)}] * 3)
+
+    def test_codec_indent(self):
+        inst = codec.Codec(encoder_kwargs={'indent': 2})
+        self.assertRaises(Exception, inst.dump_lines, [1], StringIO(), workers=1)
+
+    def test_worker_error(self):
+        iterator = parallel.load_lines(StringIO('{"awesojsontype": "unknown", "data": 1}\n'),
+                                       workers=1)
+        self.assertRaises(Exception, list, iterator)
+
+
+class ParallelWorkerTest(unittest.TestCase):
+    """
+    The worker functions called in the current process, where coverage is measured.
+    """
+
+    def setUp(self):
+        parallel._init_worker(make_tenant_registry(), {'sort_keys': True}, {'parse_float': str})
+
+    def tearDown(self):
+        parallel._worker_codec = None
+
+    def test_init_worker(self):
+        self.assertEqual(parallel._worker_codec.encoder.registry.get_decoder('tenant.point'), decode_point)
+        self.assertTrue(parallel._worker_codec.encoder.sort_keys)
+
+    def test_dump_lines_batch(self):
+        self.assertEqual(parallel._dump_lines_batch([Point(1, 2), {'b': 1, 'a': 2}]),
+                         '{"awesojsontype": "tenant.point", "data": [1, 2]}\n{"a": 2, "b": 1}\n')
+
+    def test_load_lines_batch(self):
+        self.assertEqual(parallel._load_lines_batch('{"awesojsontype": "tenant.point", "data": [1, 2]}\n\n1.5\n'),
+                         [Point(1, 2), '1.5'])
+        self.assertEqual(parallel._load_lines_batch(b'[1]\n{"a": "\xc3\xa9"}\n'), [[1], {'a': '\u00e9'}])
+
+    def test_loads_array_chunk(self):
+        self.assertEqual(parallel._loads_array_chunk('{"awesojsontype": "tenant.point", "data": [1, 2]}, 1.5'),
+                         [Point(1, 2), '1.5'])
+
+
+class ParallelLoadsTest(unittest.TestCase):
+
+    def setUp(self):
+        decoder.AwesoJSONDecoder.registry.clear()
+        decoder.AwesoJSONDecoder.register_decoder(decode_point, 'point')
+
+    def loads(self, document, workers=2):
+        return parallel.loads(document, workers=workers, threshold=0)
+
+    def test_tagged_records(self):
+        values = [{'awesojsontype': 'point', 'data': [i, -i]} for i in range(200)]
+        result = self.loads(json.dumps(values))
+        self.assertEqual(result, [Point(i, -i) for i in range(200)])
+
+    def test_scalars(self):
+        values = list(range(500)) + ['a, b', None]
+        self.assertEqual(self.loads(json.dumps(values)), values)
+
+    def test_misleading_anchors(self):
+        values = [{'k': 1}, {'k': 2}] + [{'n': [{'m': 0}, {'k': 3}], 's': '}, {"k": 4'}] * 200
+        self.assertEqual(self.loads(json.dumps(values)), values)
+        self.assertEqual(self.loads(json.dumps(values, indent=1)), values)
+
+    def test_below_threshold(self):
+        with patch('awesojson.parallel.pool') as pool_mock:
+            result = parallel.loads('[1, 2, 3]', workers=2)
+        self.assertFalse(pool_mock.called)
+        self.assertEqual(result, [1, 2, 3])
+
+    def test_not_an_array(self):
+        self.assertEqual(self.loads('{"a": [1, 2]}'), {'a': [1, 2]})
+        self.assertEqual(self.loads('[1]'), [1])
+        self.assertEqual(self.loads('[]'), [])
+
+    def test_single_worker(self):
+        self.assertEqual(self.loads('[1, 2]', workers=1), [1, 2])
+
+    def test_invalid_document(self):
+        self.assertRaises(ValueError, self.loads, '[1, 2, 3')
+        self.assertRaises(ValueError, self.loads, '[1, 2] 3')
+        self.assertRaises(ValueError, self.loads, '[{"a": 1}, {"a": 2}, {"a" 3}]')
+
+    def test_bytes(self):
+        values = [{'k': i, 's': '\u00e9'} for i in range(100)]
+        for encoding in ('utf-8', 'utf-16', 'utf-32-le'):
+            document = json.dumps(values, ensure_ascii=False).encode(encoding)
+            self.assertEqual(self.loads(document), values)
+            self.assertEqual(self.loads(bytearray(document)), values)
+            self.assertEqual(self.loads(memoryview(document)), values)
+
+    def test_registry(self):
+        document = json.dumps([{'awesojsontype': 'tenant.point', 'data': [i, -i]} for i in range(100)])
+        result = parallel.loads(document, workers=2, threshold=0, registry=make_tenant_registry())
+        self.assertEqual(result, [Point(i, -i) for i in range(100)])
+
+    def test_decoder_kwargs(self):
+        result = parallel.loads(json.dumps(list(range(100))), workers=2, threshold=0,
+                                decoder_kwargs={'parse_int': str})
+        self.assertEqual(result, [str(i) for i in range(100)])
+
+    def test_lazy(self):
+        values = [{'awesojsontype': 'point', 'data': [i, -i]} for i in range(200)]
+        result = parallel.loads(json.dumps(values), workers=2, threshold=0, decoder_kwargs={'lazy': True})
+        self.assertEqual(result, [Point(i, -i) for i in range(200)])
@@ -0,0 +1,192 @@
+import collections
+import pickle
+import threading
+import unittest
+
+from awesojson import codec, decoder, encoder, registry, utils
+
+
+Point = collections.namedtuple('Point', ['x', 'y'])
+
+
+def encode_point(point):
+    return [point.x, point.y]
+
+
+def decode_point(data):
+    return Point(*data)
+
+
+class RegistryTest(unittest.TestCase):
+
+    class DummyClass(object):
+        """
+        Dummy class to test registration.
+        """
+        pass
+
+    class DummySubClass(DummyClass):
+        """
+        Dummy subclass to test MRO resolution.
+        """
+        pass
+
+    def setUp(self):
+        registry.default_registry.clear()
+
+    def tearDown(self):
+        registry.default_registry.clear()
+
+    def test_register(self):
+        f = lambda x: x
+        inst = registry.Registry(isolated=True)
+        inst.register_encoder(f, self.DummyClass)
+        inst.register_batch_encoder(f, self.DummyClass, 'test.batch')
+        inst.register_decoder(f, 'test.name')
+        inst.register_batch_decoder(f, 'test.name')
+        self.assertEqual(inst.get_encoder(self.DummyClass), (f, utils.get_fqcn(self.DummyClass)))
+        self.assertEqual(inst.resolve_encoder(self.DummySubClass), (f, utils.get_fqcn(self.DummyClass)))
+        self.assertEqual(inst.get_batch_encoder(self.DummyClass), (f, 'test.batch'))
+        self.assertEqual(inst.get_decoder('test.name'), f)
+        self.assertEqual(inst.get_batch_decoder('test.name'), f)
+        self.assertEqual(inst.version, 4)
+
+    def test_register_errors(self):
+        inst = registry.Registry(isolated=True)
+        self.assertRaises(Exception, inst.register_encoder, None, None)
+        self.assertRaises(Exception, inst.register_encoder, None, self.DummyClass, cache_size=0)
+        self.assertRaises(Exception, inst.register_batch_encoder, None, None)
+        self.assertRaises(Exception, inst.register_decoder, None, 'test.name', arguments='nope')
+        self.assertRaises(Exception, inst.register_decoder, None, 'test.name', cache_size=0)
+        self.assertRaises(Exception, inst.get_encoder, None)
+        self.assertEqual(inst.version, 0)
+
+    def test_snapshot_is_not_modified(self):
+        inst = registry.Registry(isolated=True)
+        inst.register_encoder(encode_point, Point)
+        snapshot = inst.snapshot()
+        snapshot.resolve_encoder(Point)
+        inst.register_decoder(decode_point, 'test.point')
+        self.assertEqual(snapshot.decoders, {})
+        self.assertEqual(snapshot.resolved, {Point: (encode_point, utils.get_fqcn(Point))})
+        self.assertEqual(inst.snapshot().resolved, {})
+        self.assertEqual((snapshot.version, inst.version), (1, 2))
+
+    def test_container_subclasses(self):
+        inst = registry.Registry(isolated=True)
+        inst.register_encoder(list, tuple)
+        self.assertFalse(inst.snapshot().container_subclasses)
+        inst.register_encoder(encode_point, Point)
+        self.assertTrue(inst.snapshot().container_subclasses)
+        inst.clear()
+        self.assertFalse(inst.snapshot().container_subclasses)
+
+    def test_cache_info(self):
+        inst = registry.Registry(isolated=True)
+        inst.register_decoder(Point, 'test.point', arguments='kwargs', cache_size=2)
+        self.assertEqual(inst.get_decoder('test.point')({'x': 1, 'y': 2}), Point(1, 2))
+        self.assertEqual(inst.get_cache_info('test.point').misses, 1)
+        self.assertIsNone(inst.get_cache_info('test.other'))
+
+    def test_global_fallback(self):
+        f = lambda x: x
+        g = lambda x: x
+        inst = registry.Registry()
+        registry.default_registry.register_encoder(f, self.DummyClass)
+        registry.default_registry.register_decoder(f, 'test.name')
+        self.assertEqual(inst.resolve_encoder(self.DummySubClass), (f, utils.get_fqcn(self.DummyClass)))
+        self.assertEqual(inst.get_decoder('test.name'), f)
+
+        inst.register_encoder(g, self.DummyClass, 'test.tenant')
+        inst.register_decoder(g, 'test.name')
+        self.assertEqual(inst.resolve_encoder(self.DummySubClass), (g, 'test.tenant'))
+        self.assertEqual(inst.get_decoder('test.name'), g)
+        self.assertEqual(registry.default_registry.get_decoder('test.name'), f)
+
+        version = inst.version
+        registry.default_registry.register_batch_decoder(f, 'test.name')
+        self.assertEqual(inst.get_batch_decoder('test.name'), f)
+        self.assertEqual(inst.version, version + 1)
+
+        inst.clear()
+        self.assertEqual(inst.get_decoder('test.name'), f)
+
+    def test_parent_cache_size_overridden(self):
+        parent = registry.Registry(isolated=True)
+        parent.register_encoder(encode_point, Point, cache_size=8)
+        parent.register_encoder(encode_point, self.DummyClass, cache_size=8)
+        inst = registry.Registry(parent)
+        inst.register_encoder(encode_point, Point)
+        self.assertEqual(inst.snapshot().cache_sizes, {self.DummyClass: 8})
+
+    def test_isolated(self):
+        registry.default_registry.register_decoder(decode_point, 'test.point')
+        self.assertIsNone(registry.Registry(isolated=True).get_decoder('test.point'))
+
+    def test_pickle(self):
+        parent = registry.Registry(isolated=True)
+        parent.register_encoder(encode_point, Point)
+        inst = registry.Registry(parent)
+        inst.register_decoder(decode_point, 'test.point')
+        copy = pickle.loads(pickle.dumps(inst))
+        self.assertIsNone(copy.parent)
+        self.assertEqual(copy.resolve_encoder(Point), (encode_point, utils.get_fqcn(Point)))
+        self.assertEqual(copy.get_decoder('test.point'), decode_point)
+        self.assertTrue(copy.snapshot().container_subclasses)
+
+    def test_pickle_tables(self):
+        inst = registry.Registry(isolated=True)
+        inst.register_encoder(encode_point, Point, 'test.point', cache_size=8)
+        inst.register_batch_encoder(encode_point, Point, 'test.point')
+        inst.register_decoder(Point, 'test.point', arguments='kwargs', cache_size=2)
+        inst.register_batch_decoder(decode_point, 'test.point')
+        copy = pickle.loads(pickle.dumps(inst))
+        self.assertEqual(copy.get_batch_encoder(Point), (encode_point, 'test.point'))
+        self.assertEqual(copy.snapshot().cache_sizes, {Point: 8})
+        self.assertEqual(copy.get_batch_decoder('test.point'), decode_point)
+        self.assertEqual(copy.get_decoder('test.point')({'x': 1, 'y': 2}), Point(1, 2))
+        self.assertEqual(copy.get_decoder('test.point')({'x': 1, 'y': 2}), Point(1, 2))
+        self.assertEqual(copy.get_cache_info('test.point')[:], (1, 1, 2, 1))
+
+    def test_concurrent_registrations(self):
+        inst = registry.Registry(isolated=True)
+
+        def register(start):
+            for index in range(start, start + 100):
+                inst.register_decoder(decode_point, index)
+
+        threads = [threading.Thread(target=register, args=(start,)) for start in range(0, 800, 100)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(inst.snapshot().decoders), 800)
+        self.assertEqual(inst.version, 800)
+
+
+class CodecRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        registry.default_registry.clear()
+
+    def tearDown(self):
+        registry.default_registry.clear()
+
+    def test_codec_registry(self):
+        inst = registry.Registry()
+        inst.register_encoder(encode_point, Point, 'test.point')
+        inst.register_decoder(decode_point, 'test.point')
+        tenant_codec = codec.Codec(registry=inst)
+        text = tenant_codec.dumps([Point(1, 2)])
+        self.assertEqual(tenant_codec.loads(text), [Point(1, 2)])
+        self.assertEqual(codec.Codec().dumps([Point(1, 2)]), '[[1, 2]]')
+        self.assertRaises(Exception, codec.Codec().loads, text)
+
+    def test_encoder_decoder_registry(self):
+        inst = registry.Registry()
+        inst.register_encoder(encode_point, Point, 'test.point')
+        inst.register_decoder(decode_point, 'test.point')
+        text = encoder.AwesoJSONEncoder(registry=inst, compact_types=True).encode([Point(1, 2)])
+        self.assertEqual(decoder.AwesoJSONDecoder(registry=inst).decode(text), [Point(1, 2)])
+        self.assertIs(encoder.AwesoJSONEncoder().registry, registry.default_registry)
+        self.assertIs(decoder.AwesoJSONDecoder().registry, registry.default_registry)